@@ -1,43 +1,33 @@
-import os
+import logging
+import secrets
 from datetime import datetime
-from dash import Dash, dcc, html, Input, Output, State, callback_context, no_update
+from dash import Dash, dcc, html, Input, Output, State, ALL, ClientsideFunction, callback_context, no_update
 import dash_bootstrap_components as dbc
+from flask import Response, request, session
 from flask_login import LoginManager, UserMixin, login_user, logout_user, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
-from pymongo import MongoClient
-from youtube_transcript_api import YouTubeTranscriptApi
-from services.auth_service import AuthService
-from services.youtube_service import YouTubeService
-from services.quiz_service import QuizService
+from pymongo.errors import DuplicateKeyError
+from services.container import ServiceContainer
+from services.job_service import QueueFullError
+from services.quota_manager import QuotaExceededError
+from services.stats_service import score_percent
+from services.leaderboard_service import GLOBAL_BOARD, video_board
 from components.header import create_header
 from components.sidebar import create_sidebar
-from components.quiz_components import create_quiz_interface
-from utils.logger import setup_logger
+from components.quiz_components import create_quiz_interface, create_quiz_progress
+from components.history import create_history_layout, create_history_table
+from components.profile import create_profile_layout
+from components.leaderboard import create_leaderboard_layout, create_leaderboard_table
+from utils.callback_registry import CallbackRegistry
+from utils.logger import LOGGER_NAME, bind_callback_names, request_id_var, setup_logger, user_id_var
+from utils.metrics import instrument_callbacks
+from utils.helpers import answers_match
+from utils.transcript_codec import decode_transcript, encode_transcript
 from config import Config
 
-# Initialize the app
-app = Dash(__name__, 
-           external_stylesheets=[dbc.themes.DARKLY, dbc.icons.BOOTSTRAP],
-           suppress_callback_exceptions=True,
-           meta_tags=[{'name': 'viewport', 
-                      'content': 'width=device-width, initial-scale=1.0'}])
-
-# Flask-Login setup
-login_manager = LoginManager()
-login_manager.init_app(app.server)
-login_manager.login_view = '/login'
-
-# MongoDB setup
-db_client = MongoClient(Config.MONGO_URI)
-db = db_client[Config.MONGO_DB_NAME]
-
-# Services initialization
-auth_service = AuthService(db)
-youtube_service = YouTubeService(Config.YOUTUBE_API_KEY)
-quiz_service = QuizService(Config.DEEPSEEK_API_KEY)
-
-# Logger setup
-logger = setup_logger()
+# Clients and services are created on first use in each process (see create_app)
+container = ServiceContainer()
+callbacks = CallbackRegistry()
+logger = logging.getLogger(LOGGER_NAME)
 
 # User class for Flask-Login
 class User(UserMixin):
@@ -46,21 +36,37 @@ class User(UserMixin):
         self.username = user_data['username']
         self.email = user_data['email']
 
-@login_manager.user_loader
+# Registered as the Flask-Login user loader in create_app
 def load_user(user_id):
-    user_data = db.users.find_one({'_id': user_id})
+    user_data = container.auth_service.get_user(user_id)
     if not user_data:
         return None
     return User(user_data)
 
+def client_ip():
+    """Best-effort client address, honouring a reverse proxy's X-Forwarded-For"""
+    forwarded = request.headers.get('X-Forwarded-For')
+    if forwarded:
+        return forwarded.split(',')[0].strip()
+    return request.remote_addr
+
+def session_id():
+    """ID of the browser session, used to scope server-side session data"""
+    if 'sid' not in session:
+        session['sid'] = secrets.token_urlsafe(16)
+    return session['sid']
+
 # App layout
-app.layout = html.Div([
+root_layout = html.Div([
     dcc.Location(id='url', refresh=False),
     dcc.Store(id='session-store', storage_type='session'),
     dcc.Store(id='transcript-store'),
     dcc.Store(id='quiz-data-store'),
     dcc.Store(id='user-answers-store'),
     dcc.Store(id='video-info-store'),
+    dcc.Store(id='quiz-job-store'),
+    dcc.Store(id='quiz-job-result'),
+    dcc.Interval(id='quiz-job-poll', interval=500, disabled=True),
     
     # Main content will be rendered here
     html.Div(id='page-content'),
@@ -70,6 +76,7 @@ app.layout = html.Div([
         dbc.ModalHeader("Submit Feedback"),
         dbc.ModalBody([
             dbc.Textarea(id='feedback-text', placeholder="Your feedback...", rows=5),
+            html.Div(id='feedback-message'),
             dbc.Select(
                 id='feedback-type',
                 options=[
@@ -146,7 +153,8 @@ main_layout = html.Div([
         dbc.Row([
             dbc.Col(create_sidebar(), md=4, className='mb-4'),
             dbc.Col([
-                dbc.Spinner(html.Div(id='main-content'), 
+                html.Div(id='quiz-job-status'),
+                dbc.Spinner(html.Div(id='main-content')),
                 html.Div(id='debug-panel', className='mt-4')
             ], md=8)
         ])
@@ -154,7 +162,7 @@ main_layout = html.Div([
 ])
 
 # Update page content based on URL
-@app.callback(
+@callbacks.callback(
     Output('page-content', 'children'),
     [Input('url', 'pathname')]
 )
@@ -165,6 +173,22 @@ def display_page(pathname):
         return register_layout
     elif pathname == '/logout':
         return html.Div("Logging out...")
+    elif pathname == '/history':
+        if current_user.is_authenticated:
+            return create_history_layout()
+        return login_layout
+    elif pathname == '/profile':
+        if current_user.is_authenticated:
+            return create_profile_layout(current_user.username, container.stats_service.get_stats(current_user.id))
+        return login_layout
+    elif pathname == '/leaderboard':
+        if current_user.is_authenticated:
+            return create_leaderboard_layout(
+                container.leaderboard_service.get_board(GLOBAL_BOARD),
+                user_id=current_user.id,
+                rank=container.leaderboard_service.get_rank(GLOBAL_BOARD, current_user.id)
+            )
+        return login_layout
     else:
         if current_user.is_authenticated:
             return main_layout
@@ -172,7 +196,7 @@ def display_page(pathname):
             return login_layout
 
 # Authentication callbacks
-@app.callback(
+@callbacks.callback(
     Output('url', 'pathname'),
     Output('login-message', 'children'),
     Input('login-button', 'n_clicks'),
@@ -186,13 +210,15 @@ def login(n_clicks, username, password):
     if not username or not password:
         return no_update, dbc.Alert("Please enter both username and password", color="danger")
     
-    result = auth_service.login_user(username, password)
+    result = container.auth_service.login_user(username, password, ip=client_ip())
     if result['success']:
+        container.auth_service.cache_user(result['user_data'])
+        login_user(User(result['user_data']))
         return '/', dbc.Alert("Login successful!", color="success")
     else:
         return no_update, dbc.Alert(result['message'], color="danger")
 
-@app.callback(
+@callbacks.callback(
     Output('url', 'pathname', allow_duplicate=True),
     Output('register-message', 'children'),
     Input('register-button', 'n_clicks'),
@@ -212,45 +238,41 @@ def register(n_clicks, username, email, password, confirm_password):
     if password != confirm_password:
         return no_update, dbc.Alert("Passwords don't match", color="danger")
     
-    result = auth_service.register_user(username, email, password)
+    result = container.auth_service.register_user(username, email, password, ip=client_ip())
     if result['success']:
         return '/login', dbc.Alert("Registration successful! Please login.", color="success")
     else:
         return no_update, dbc.Alert(result['message'], color="danger")
 
-@app.callback(
+callbacks.clientside_callback(
+    ClientsideFunction(namespace='quiz', function_name='go_to_register'),
     Output('url', 'pathname', allow_duplicate=True),
     Input('go-to-register', 'n_clicks'),
     prevent_initial_call=True
 )
-def go_to_register(n_clicks):
-    if n_clicks:
-        return '/register'
-    return no_update
 
-@app.callback(
+callbacks.clientside_callback(
+    ClientsideFunction(namespace='quiz', function_name='go_to_login'),
     Output('url', 'pathname', allow_duplicate=True),
     Input('go-to-login', 'n_clicks'),
     prevent_initial_call=True
 )
-def go_to_login(n_clicks):
-    if n_clicks:
-        return '/login'
-    return no_update
 
-@app.callback(
+@callbacks.callback(
     Output('url', 'pathname', allow_duplicate=True),
     Input('logout-button', 'n_clicks'),
     prevent_initial_call=True
 )
 def logout(n_clicks):
     if n_clicks:
+        if current_user.is_authenticated:
+            container.auth_service.invalidate_user(current_user.id)
         logout_user()
         return '/login'
     return no_update
 
 # YouTube search and video processing
-@app.callback(
+@callbacks.callback(
     Output('video-results', 'children'),
     Input('search-button', 'n_clicks'),
     State('search-query', 'value'),
@@ -261,11 +283,14 @@ def search_videos(n_clicks, query):
         return dbc.Alert("Please enter a search term", color="warning")
     
     try:
-        results = youtube_service.search_videos(query)
+        results = container.youtube_service.search_videos(query)
         if not results:
             return dbc.Alert("No videos found", color="warning")
         
         cards = []
+        if container.quota_manager.mode() != 'normal':
+            cards.append(dbc.Alert("YouTube search is limited today, so these results may be a little out of date.",
+                                   color="info"))
         for video in results:
             card = dbc.Card([
                 dbc.CardImg(src=video['thumbnail'], top=True),
@@ -279,11 +304,14 @@ def search_videos(n_clicks, query):
             cards.append(card)
         
         return cards
+    except QuotaExceededError as e:
+        logger.warning("Search refused by the quota manager: %s", e)
+        return dbc.Alert(str(e), color="warning")
     except Exception as e:
-        logger.error(f"Error searching videos: {str(e)}")
+        logger.error("Error searching videos: %s", e)
         return dbc.Alert(f"Error searching videos: {str(e)}", color="danger")
 
-@app.callback(
+@callbacks.callback(
     Output('transcript-store', 'data'),
     Output('video-info-store', 'data'),
     Output('main-content', 'children'),
@@ -295,21 +323,28 @@ def select_video(n_clicks):
     if not ctx.triggered:
         return no_update, no_update, no_update
     
-    video_id = ctx.triggered[0]['prop_id'].split('"index":')[1].split('}')[0].strip('"')
+    video_id = ctx.triggered_id['index']
     
     try:
         # Get video info
-        video_info = youtube_service.get_video_info(video_id)
+        video_info = container.youtube_service.get_video_info(video_id)
+        
+        # Keep titles for the history page; a failure here must not block the quiz
+        try:
+            container.history_service.record_video(video_info)
+        except Exception as e:
+            logger.warning("Could not record video metadata: %s", e)
         
         # Get transcript
-        transcript = youtube_service.get_transcript(video_id)
+        transcript = container.youtube_service.get_transcript(video_id)
         
-        # Store transcript and video info
-        transcript_data = {
+        # Keep the transcript server-side; the browser only holds a handle
+        handle = container.session_store.put(session_id(), 'transcript', {
             'video_id': video_id,
-            'transcript': transcript,
+            'transcript': encode_transcript(transcript),
             'timestamp': datetime.now().isoformat()
-        }
+        })
+        transcript_data = {'handle': handle, 'video_id': video_id}
         
         video_data = {
             'video_id': video_id,
@@ -333,60 +368,163 @@ def select_video(n_clicks):
         
         return transcript_data, video_data, transcript_preview
     except Exception as e:
-        logger.error(f"Error processing video: {str(e)}")
+        logger.error("Error processing video: %s", e)
         return no_update, no_update, dbc.Alert(f"Error processing video: {str(e)}", color="danger")
 
 # Quiz generation
-@app.callback(
-    Output('quiz-data-store', 'data'),
-    Output('main-content', 'children', allow_duplicate=True),
+def build_quiz_data(quiz, video_id):
+    return {
+        'quiz_id': str(datetime.now().timestamp()),
+        'questions': quiz['questions'],
+        'video_id': video_id,
+        'timestamp': datetime.now().isoformat()
+    }
+
+def run_quiz_job(job, transcript_data, question_type, question_count, cache_mode):
+    """Background job body for quiz generation"""
+    quiz = container.quiz_service.generate_quiz(
+        transcript=transcript_data['transcript'],
+        question_type=question_type,
+        num_questions=question_count,
+        video_id=transcript_data['video_id'],
+        progress=job.update,
+        cache_mode=cache_mode,
+        on_question=job.add_partial
+    )
+    if not quiz['success']:
+        raise Exception(quiz['error'])
+    
+    if quiz.get('preprocessing'):
+        stats = quiz['preprocessing']
+        logger.info("Quiz prompt for %s: %d tokens (%d saved from %d)", transcript_data['video_id'],
+                    stats['prompt_tokens'], stats['tokens_saved'], stats['raw_tokens'])
+    
+    return build_quiz_data(quiz, transcript_data['video_id'])
+
+@callbacks.callback(
+    Output('quiz-job-store', 'data'),
+    Output('quiz-job-poll', 'disabled'),
+    Output('quiz-job-status', 'children'),
+    Output('quiz-job-result', 'data', allow_duplicate=True),
     Input('generate-quiz', 'n_clicks'),
     State('transcript-store', 'data'),
     State('question-type', 'value'),
     State('question-count', 'value'),
+    State('quiz-variant', 'value'),
     prevent_initial_call=True
 )
-def generate_quiz(n_clicks, transcript_data, question_type, question_count):
+def generate_quiz(n_clicks, transcript_ref, question_type, question_count, cache_mode):
     if n_clicks is None:
-        return no_update, no_update
+        return no_update, no_update, no_update, no_update
+    
+    transcript_data = container.session_store.get((transcript_ref or {}).get('handle'), session_id())
+    if transcript_data is None:
+        return no_update, no_update, dbc.Alert(
+            "This transcript has expired. Please select the video again.", color="warning"), no_update
     
+    transcript_data = {**transcript_data, 'transcript': decode_transcript(transcript_data['transcript'])}
+    
+    cache_mode = cache_mode or 'reuse'
     try:
-        quiz = quiz_service.generate_quiz(
-            transcript=transcript_data['transcript'],
-            question_type=question_type,
-            num_questions=question_count,
-            video_id=transcript_data['video_id']
-        )
-        
-        # Store quiz data
-        quiz_data = {
-            'quiz_id': str(datetime.now().timestamp()),
-            'questions': quiz['questions'],
-            'video_id': transcript_data['video_id'],
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        # Create quiz interface
-        quiz_ui = create_quiz_interface(quiz['questions'])
+        # Stored quizzes are served straight away without a background job
+        if cache_mode != 'new':
+            cached = container.quiz_service.find_cached_quiz(
+                transcript_data['transcript'],
+                question_type=question_type,
+                num_questions=question_count,
+                video_id=transcript_data['video_id'],
+                random_variant=cache_mode == 'random'
+            )
+            if cached is not None:
+                quiz_data = build_quiz_data(cached, transcript_data['video_id'])
+                return None, True, [], {'handle': container.session_store.put(session_id(), 'quiz', quiz_data)}
         
-        return quiz_data, quiz_ui
+        job_id = container.job_manager.submit(run_quiz_job, transcript_data, question_type, question_count, cache_mode)
+    except QueueFullError:
+        return no_update, no_update, dbc.Alert(
+            "The quiz generator is busy right now. Please try again in a moment.", color="warning"), no_update
     except Exception as e:
-        logger.error(f"Error generating quiz: {str(e)}")
-        return no_update, dbc.Alert(f"Error generating quiz: {str(e)}", color="danger")
+        logger.error("Error generating quiz: %s", e)
+        return no_update, no_update, dbc.Alert(f"Error generating quiz: {str(e)}", color="danger"), no_update
+    
+    return {'job_id': job_id}, False, create_quiz_progress(0, 'Waiting for a free worker...'), no_update
+
+@callbacks.callback(
+    Output('quiz-job-status', 'children', allow_duplicate=True),
+    Output('quiz-job-poll', 'disabled', allow_duplicate=True),
+    Output('quiz-job-result', 'data'),
+    Input('quiz-job-poll', 'n_intervals'),
+    State('quiz-job-store', 'data'),
+    prevent_initial_call=True
+)
+def poll_quiz_job(n_intervals, job_data):
+    if not job_data:
+        return no_update, True, no_update
+    
+    job = container.job_manager.get(job_data['job_id'])
+    if job is None:
+        return dbc.Alert("Quiz generation expired. Please try again.", color="warning"), True, no_update
+    
+    if job['status'] in ('queued', 'running'):
+        return create_quiz_progress(job['progress'], job['message'], job['partial']), False, no_update
+    if job['status'] == 'done':
+        return [], True, {'handle': container.session_store.put(session_id(), 'quiz', job['result'])}
+    if job['status'] == 'cancelled':
+        return dbc.Alert("Quiz generation cancelled.", color="secondary"), True, no_update
+    
+    logger.error("Error generating quiz: %s", job['error'])
+    return dbc.Alert(f"Error generating quiz: {job['error']}", color="danger"), True, no_update
+
+@callbacks.callback(
+    Output('quiz-data-store', 'data'),
+    Output('main-content', 'children', allow_duplicate=True),
+    Input('quiz-job-result', 'data'),
+    prevent_initial_call=True
+)
+def show_quiz(quiz_ref):
+    quiz_data = container.session_store.get((quiz_ref or {}).get('handle'), session_id())
+    if quiz_data is None:
+        return no_update, no_update
+    
+    return quiz_ref, create_quiz_interface(quiz_data['questions'])
+
+@callbacks.callback(
+    Output('quiz-job-status', 'children', allow_duplicate=True),
+    Input('cancel-quiz-job', 'n_clicks'),
+    State('quiz-job-store', 'data'),
+    prevent_initial_call=True
+)
+def cancel_quiz_job(n_clicks, job_data):
+    if not n_clicks or not job_data:
+        return no_update
+    
+    container.job_manager.cancel(job_data['job_id'])
+    job = container.job_manager.get(job_data['job_id'])
+    if job is None:
+        return create_quiz_progress(0, 'Cancelling...')
+    return create_quiz_progress(job['progress'], 'Cancelling...', job['partial'])
 
 # Quiz interaction
-@app.callback(
+@callbacks.callback(
     Output('quiz-results', 'children'),
     Output('user-answers-store', 'data'),
+    Output('submit-quiz', 'disabled'),
     Input('submit-quiz', 'n_clicks'),
     State('quiz-data-store', 'data'),
     State({'type': 'question-answer', 'index': ALL}, 'value'),
     State({'type': 'question-answer', 'index': ALL}, 'id'),
+    State('video-info-store', 'data'),
     prevent_initial_call=True
 )
-def submit_quiz(n_clicks, quiz_data, answers, answer_ids):
+def submit_quiz(n_clicks, quiz_ref, answers, answer_ids, video_info):
     if n_clicks is None:
-        return no_update, no_update
+        return no_update, no_update, no_update
+    
+    quiz_data = container.session_store.get((quiz_ref or {}).get('handle'), session_id())
+    if quiz_data is None:
+        return dbc.Alert("This quiz has expired. Please generate it again.", color="warning"), no_update, no_update
+    if not quiz_data['questions']:
+        return dbc.Alert("This quiz has no questions. Please generate it again.", color="warning"), no_update, no_update
     
     try:
         # Map answers to questions
@@ -399,7 +537,7 @@ def submit_quiz(n_clicks, quiz_data, answers, answer_ids):
         score = 0
         results = []
         for idx, question in enumerate(quiz_data['questions']):
-            is_correct = user_answers.get(idx) == question['correct_answer']
+            is_correct = answers_match(user_answers.get(idx), question['correct_answer'])
             if is_correct:
                 score += 1
             
@@ -413,94 +551,240 @@ def submit_quiz(n_clicks, quiz_data, answers, answer_ids):
         
         # Save quiz results to database
         if current_user.is_authenticated:
-            db.quiz_results.insert_one({
-                'user_id': current_user.id,
-                'quiz_id': quiz_data['quiz_id'],
-                'video_id': quiz_data['video_id'],
-                'score': score,
-                'total': len(quiz_data['questions']),
-                'timestamp': datetime.now().isoformat(),
-                'user_answers': user_answers
-            })
+            total = len(quiz_data['questions'])
+            timestamp = datetime.now().isoformat()
+            try:
+                container.db.quiz_results.insert_one({
+                    'user_id': current_user.id,
+                    'quiz_id': quiz_data['quiz_id'],
+                    'video_id': quiz_data['video_id'],
+                    'score': score,
+                    'total': total,
+                    'score_pct': score_percent(score, total),
+                    'timestamp': timestamp,
+                    # BSON documents need string keys
+                    'user_answers': {str(idx): answer for idx, answer in user_answers.items()}
+                })
+                first_submission = True
+            except DuplicateKeyError:
+                # Only the first submission of a quiz counts towards stats and leaderboards
+                first_submission = False
+            
+            if first_submission:
+                title = (video_info or {}).get('title') if (video_info or {}).get('video_id') == quiz_data['video_id'] else None
+                try:
+                    container.stats_service.record_result(current_user.id, quiz_data['video_id'], score, total,
+                                                          timestamp, title=title)
+                except Exception as e:
+                    logger.error("Error updating user stats: %s", e)
+                
+                try:
+                    container.leaderboard_service.record_result(current_user.id, current_user.username,
+                                                                quiz_data['video_id'], score,
+                                                                score_percent(score, total), timestamp)
+                except Exception as e:
+                    logger.error("Error updating leaderboards: %s", e)
+        
+        # Top scores for this video
+        leaderboard = None
+        if current_user.is_authenticated:
+            board = video_board(quiz_data['video_id'])
+            leaderboard = html.Div([
+                html.H5("Leaderboard for this video", className="mt-4"),
+                create_leaderboard_table(
+                    container.leaderboard_service.get_board(board),
+                    "Best score",
+                    value_format="{:.0f}%",
+                    user_id=current_user.id,
+                    rank=container.leaderboard_service.get_rank(board, current_user.id)
+                )
+            ])
         
         # Create results display
         results_display = html.Div([
             html.H4(f"Quiz Results: {score}/{len(quiz_data['questions'])}"),
             dbc.Accordion(results),
             dbc.Alert(f"You scored {score} out of {len(quiz_data['questions'])}", 
-                      color="success" if score/len(quiz_data['questions']) >= 0.7 else "warning")
+                      color="success" if score/len(quiz_data['questions']) >= 0.7 else "warning"),
+            leaderboard
         ])
         
-        return results_display, user_answers
+        return results_display, user_answers, True
     except Exception as e:
-        logger.error(f"Error submitting quiz: {str(e)}")
-        return dbc.Alert(f"Error submitting quiz: {str(e)}", color="danger"), no_update
+        logger.error("Error submitting quiz: %s", e)
+        return dbc.Alert(f"Error submitting quiz: {str(e)}", color="danger"), no_update, no_update
+
+# Quiz history
+@callbacks.callback(
+    Output('history-content', 'children'),
+    Output('history-cursor', 'data'),
+    Output('history-older', 'disabled'),
+    Input('history-older', 'n_clicks'),
+    Input('history-newest', 'n_clicks'),
+    State('history-cursor', 'data')
+)
+def show_history(older_clicks, newest_clicks, cursor):
+    if not current_user.is_authenticated:
+        return dbc.Alert("Please log in to see your history.", color="warning"), None, True
+    
+    ctx = callback_context
+    triggered = ctx.triggered[0]['prop_id'] if ctx.triggered else ''
+    before = (cursor or {}).get('next') if triggered.startswith('history-older') else None
+    
+    try:
+        page = container.history_service.get_page(current_user.id, before=before)
+    except Exception as e:
+        logger.error("Error loading history: %s", e)
+        return dbc.Alert(f"Error loading history: {str(e)}", color="danger"), no_update, no_update
+    
+    return create_history_table(page['items']), {'next': page['next_cursor']}, page['next_cursor'] is None
 
 # Feedback system
-@app.callback(
+# Opening and closing the modal happens in the browser (assets/clientside.js)
+callbacks.clientside_callback(
+    ClientsideFunction(namespace='quiz', function_name='toggle_feedback'),
     Output('feedback-modal', 'is_open'),
-    Output('feedback-message', 'children'),
     Input('open-feedback', 'n_clicks'),
-    Input('submit-feedback', 'n_clicks'),
     Input('close-feedback', 'n_clicks'),
     State('feedback-modal', 'is_open'),
+    prevent_initial_call=True
+)
+
+@callbacks.callback(
+    Output('feedback-modal', 'is_open', allow_duplicate=True),
+    Output('feedback-message', 'children'),
+    Input('submit-feedback', 'n_clicks'),
+    State('feedback-modal', 'is_open'),
     State('feedback-text', 'value'),
     State('feedback-type', 'value'),
     prevent_initial_call=True
 )
-def toggle_feedback(open_clicks, submit_clicks, close_clicks, is_open, feedback_text, feedback_type):
-    ctx = callback_context
-    if not ctx.triggered:
+def submit_feedback(submit_clicks, is_open, feedback_text, feedback_type):
+    if not submit_clicks:
         return no_update, no_update
     
-    trigger_id = ctx.triggered[0]['prop_id'].split('.')[0]
+    if not feedback_text:
+        return is_open, dbc.Alert("Please enter feedback text", color="danger")
     
-    if trigger_id == 'open-feedback':
-        return not is_open, no_update
-    elif trigger_id == 'close-feedback':
-        return False, no_update
-    elif trigger_id == 'submit-feedback':
-        if not feedback_text:
-            return is_open, dbc.Alert("Please enter feedback text", color="danger")
+    try:
+        feedback_data = {
+            'user_id': current_user.id if current_user.is_authenticated else None,
+            'type': feedback_type,
+            'text': feedback_text,
+            'timestamp': datetime.now().isoformat(),
+            'status': 'new'
+        }
         
-        try:
-            feedback_data = {
-                'user_id': current_user.id if current_user.is_authenticated else None,
-                'type': feedback_type,
-                'text': feedback_text,
-                'timestamp': datetime.now().isoformat(),
-                'status': 'new'
-            }
-            
-            db.feedback.insert_one(feedback_data)
-            return False, dbc.Alert("Thank you for your feedback!", color="success")
-        except Exception as e:
-            logger.error(f"Error submitting feedback: {str(e)}")
-            return is_open, dbc.Alert(f"Error submitting feedback: {str(e)}", color="danger")
-    
-    return no_update, no_update
+        container.db.feedback.insert_one(feedback_data)
+        return False, dbc.Alert("Thank you for your feedback!", color="success")
+    except Exception as e:
+        logger.error("Error submitting feedback: %s", e)
+        return is_open, dbc.Alert(f"Error submitting feedback: {str(e)}", color="danger")
 
 # Debug panel
-@app.callback(
+callbacks.clientside_callback(
+    ClientsideFunction(namespace='quiz', function_name='toggle_debug'),
     Output('debug-panel', 'children'),
     Input('debug-toggle', 'n_clicks'),
     State('debug-panel', 'children'),
     prevent_initial_call=True
 )
-def toggle_debug(n_clicks, current_children):
-    if n_clicks is None:
-        return no_update
+
+def register_callbacks(app):
+    """Attach every callback in this module to app"""
+    callbacks.register(app)
     
-    if current_children is None or current_children == []:
-        return dbc.Card([
-            dbc.CardHeader("Debug Information"),
-            dbc.CardBody([
-                html.Pre(id='debug-output')
-            ])
-        ])
-    else:
-        return []
+    # Tag log records with the callback name and time every server-side
+    # callback; keep this after the callbacks are registered
+    bind_callback_names(app)
+    instrument_callbacks(app, container.metrics)
+
+# Component counters are read when /metrics is scraped
+def _without(stats, *keys):
+    return {(name,): value for name, value in stats.items() if name not in keys}
+
+def _register_gauges(metrics):
+    # peek() so that a scrape reports nothing for a service this worker has
+    # not used yet, rather than connecting just to report zeros
+    def stats_of(name, read):
+        def fn():
+            service = container.peek(name)
+            return read(service) if service is not None else {}
+        return fn
+    
+    metrics.gauge('transcript_cache_events_total', 'Transcript cache lookups and evictions',
+                  stats_of('transcript_cache', lambda c: _without(c.stats(), 'size', 'max_entries')),
+                  ('event',), type='counter')
+    metrics.gauge('transcript_cache_entries', 'Transcripts held in the local cache',
+                  stats_of('transcript_cache', lambda c: c.stats()['size']))
+    metrics.gauge('api_cache_events_total', 'YouTube API cache lookups and writes',
+                  stats_of('api_cache', lambda c: _without(c.stats())), ('event',), type='counter')
+    metrics.gauge('user_cache_lookups_total', 'Session user cache lookups',
+                  stats_of('auth_service', lambda s: {('hit',): s.user_cache.hits, ('miss',): s.user_cache.misses}),
+                  ('result',), type='counter')
+    metrics.gauge('activity_log_events_total', 'Activity log entries by outcome',
+                  stats_of('activity_log', lambda a: _without(a.metrics(), 'queue_depth', 'queue_capacity')),
+                  ('event',), type='counter')
+    metrics.gauge('activity_log_queue_depth', 'Activity log entries waiting to be written',
+                  stats_of('activity_log', lambda a: a.metrics()['queue_depth']))
+    metrics.gauge('quiz_jobs', 'Quiz generation jobs by status',
+                  stats_of('job_manager', lambda j: _without(j.stats())), ('status',))
+    metrics.gauge('http_client_circuit_open', 'Workers refusing outbound calls to a host',
+                  stats_of('http_client', lambda h: {(host,): int(state == 'open')
+                                                     for host, state in h.stats()['breakers'].items()}),
+                  ('host',))
+    metrics.gauge('youtube_quota_units_used', 'YouTube Data API units spent today, across all workers',
+                  stats_of('quota_manager', lambda q: {(endpoint,): entry['units']
+                                                       for endpoint, entry in q.usage().items()}),
+                  ('endpoint',), shared=True)
+    metrics.gauge('youtube_quota_calls_denied', 'YouTube Data API calls refused today to stay within quota',
+                  stats_of('quota_manager', lambda q: {(endpoint,): entry['denied']
+                                                       for endpoint, entry in q.usage().items()}),
+                  ('endpoint',), shared=True)
+    metrics.gauge('youtube_quota_limit_units', 'YouTube Data API daily quota',
+                  stats_of('quota_manager', lambda q: q.daily_limit), shared=True)
+    metrics.gauge('log_records_dropped_total', 'Log records dropped because the log queue was full',
+                  lambda: sum(getattr(handler, 'dropped', 0) for handler in logger.handlers), type='counter')
+
+def create_app():
+    """Build the Dash app.
+
+    Cheap enough to run before a server forks its workers: no client or
+    service is created here, each worker builds its own on first use.
+    """
+    app = Dash(__name__, 
+               external_stylesheets=[dbc.themes.DARKLY, dbc.icons.BOOTSTRAP],
+               suppress_callback_exceptions=True,
+               meta_tags=[{'name': 'viewport', 
+                          'content': 'width=device-width, initial-scale=1.0'}])
+    
+    app.server.config['SECRET_KEY'] = Config.SECRET_KEY
+    
+    # Flask-Login setup
+    login_manager = LoginManager()
+    login_manager.init_app(app.server)
+    login_manager.login_view = '/login'
+    login_manager.user_loader(load_user)
+    
+    app.layout = root_layout
+    
+    setup_logger()
+    register_callbacks(app)
+    _register_gauges(container.metrics)
+    
+    @app.server.before_request
+    def bind_request_context():
+        # Read the user ID flask-login keeps in the session; no database lookup
+        request_id_var.set(request.headers.get('X-Request-ID') or secrets.token_hex(8))
+        user_id_var.set(session.get('_user_id'))
+        container.metrics.ensure_writer()
+    
+    @app.server.route('/metrics')
+    def metrics_endpoint():
+        return Response(container.metrics.render(), mimetype='text/plain; version=0.0.4')
+    
+    return app
 
 # Run the app
 if __name__ == '__main__':
-    app.run_server(debug=True, host='0.0.0.0', port=8050)
+    create_app().run_server(debug=True, host='0.0.0.0', port=8050)
@@ -0,0 +1,72 @@
+// UI-only callbacks that run in the browser instead of round-tripping to Dash.
+// Each mirrors the Python callback it replaced in app.py.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    quiz: {
+        go_to_register: function(n_clicks) {
+            if (n_clicks) {
+                return '/register';
+            }
+            return window.dash_clientside.no_update;
+        },
+
+        go_to_login: function(n_clicks) {
+            if (n_clicks) {
+                return '/login';
+            }
+            return window.dash_clientside.no_update;
+        },
+
+        toggle_feedback: function(open_clicks, close_clicks, is_open) {
+            const triggered = window.dash_clientside.callback_context.triggered;
+            if (!triggered.length) {
+                return window.dash_clientside.no_update;
+            }
+
+            const trigger_id = triggered[0].prop_id.split('.')[0];
+            if (trigger_id === 'open-feedback') {
+                return !is_open;
+            }
+            if (trigger_id === 'close-feedback') {
+                return false;
+            }
+            return window.dash_clientside.no_update;
+        },
+
+        toggle_debug: function(n_clicks, current_children) {
+            if (n_clicks === null || n_clicks === undefined) {
+                return window.dash_clientside.no_update;
+            }
+
+            if (current_children === null || current_children === undefined ||
+                    (Array.isArray(current_children) && current_children.length === 0)) {
+                return {
+                    namespace: 'dash_bootstrap_components',
+                    type: 'Card',
+                    props: {
+                        children: [
+                            {
+                                namespace: 'dash_bootstrap_components',
+                                type: 'CardHeader',
+                                props: {children: 'Debug Information'}
+                            },
+                            {
+                                namespace: 'dash_bootstrap_components',
+                                type: 'CardBody',
+                                props: {
+                                    children: [
+                                        {
+                                            namespace: 'dash_html_components',
+                                            type: 'Pre',
+                                            props: {id: 'debug-output'}
+                                        }
+                                    ]
+                                }
+                            }
+                        ]
+                    }
+                };
+            }
+            return [];
+        }
+    }
+});
@@ -0,0 +1,284 @@
+"""Offline micro-benchmarks for the services and Dash callbacks.
+
+Everything external is replaced locally: a stub HTTP server plays the
+YouTube Data API and DeepSeek, mongomock plays MongoDB and transcripts are
+generated instead of fetched. Results are written as JSON so runs on
+different commits can be compared:
+
+    python -m benchmarks.run --output baseline.json
+    python -m benchmarks.run --compare baseline.json
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from unittest import mock
+
+from benchmarks.stubs import TRANSCRIPT_SIZES, StubServer, make_transcript, patched_transcript_api
+
+QUESTION_COUNT = 10
+PASSWORD = 'correct horse battery staple'
+
+
+def configure_environment(workdir):
+    """Settings must be in place before config.py is imported"""
+    os.environ.update({
+        'MONGO_URI': 'mongodb://localhost:27017/',
+        'MONGO_DB_NAME': 'benchmarks',
+        'SECRET_KEY': 'benchmark',
+        'API_CACHE_PATH': os.path.join(workdir, 'api_cache.db'),
+        'YOUTUBE_API_KEY': 'benchmark',
+        'DEEPSEEK_API_KEY': 'benchmark',
+        'QUIZ_USE_MOCK': 'True',
+        'LOGIN_ATTEMPTS_PER_USER': str(10 ** 9),
+        'LOGIN_ATTEMPTS_PER_IP': str(10 ** 9),
+        'YOUTUBE_DAILY_QUOTA': str(10 ** 9),
+        'YOUTUBE_QUOTA_BURST': str(10 ** 9),
+    })
+
+
+def expect_success(result):
+    if isinstance(result, dict) and result.get('success') is False:
+        raise RuntimeError(result.get('error') or result.get('message'))
+    return result
+
+
+class Suite:
+    """Times named functions and collects summary statistics"""
+
+    def __init__(self, repeat, warmup, only=None):
+        self.repeat = repeat
+        self.warmup = warmup
+        self.only = only
+        self.results = {}
+
+    def bench(self, name, fn, repeat=None):
+        if self.only and self.only not in name:
+            return
+        for _ in range(self.warmup):
+            fn()
+
+        samples = []
+        for _ in range(repeat or self.repeat):
+            started = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - started)
+
+        self.results[name] = summarize(samples)
+        print(f"{name:<48} median {self.results[name]['median'] * 1000:9.2f} ms "
+              f"(min {self.results[name]['min'] * 1000:.2f}, n={len(samples)})", flush=True)
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'runs': len(samples),
+        'min': ordered[0],
+        'median': statistics.median(ordered),
+        'mean': statistics.fmean(ordered),
+        'p95': ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        'max': ordered[-1],
+    }
+
+
+def bench_services(suite, stub_url, workdir):
+    import mongomock
+    from services.api_cache import ApiCache
+    from services.auth_service import AuthService
+    from services.password_hasher import PasswordHasher
+    from services.quiz_cache import QuizCache
+    from services.quiz_service import PROMPT_VERSION, QuizService
+    from services.transcript_cache import TranscriptCache
+    from services.youtube_service import YouTubeService
+    from utils.http_client import HttpClient
+
+    db = mongomock.MongoClient().services
+    http = HttpClient()
+    counter = itertools.count()
+
+    youtube = YouTubeService(
+        'benchmark',
+        transcript_cache=TranscriptCache(db.transcript_cache),
+        api_cache=ApiCache(os.path.join(workdir, 'services_api_cache.db')),
+        http=http
+    )
+    youtube.base_url = f'{stub_url}/youtube/v3'
+
+    suite.bench('youtube.search_videos.cold', lambda: youtube.search_videos(f'query {next(counter)}'))
+    suite.bench('youtube.search_videos.warm', lambda: youtube.search_videos('warm query'))
+    suite.bench('youtube.get_video_info.cold', lambda: youtube.get_video_info(f'10min-{next(counter):06d}'))
+    suite.bench('youtube.get_video_info.warm', lambda: youtube.get_video_info('10min-warm'))
+
+    for label, segments in TRANSCRIPT_SIZES:
+        transcript = make_transcript(segments)
+
+        local = QuizService('benchmark', use_mock=True)
+        suite.bench(f'quiz.generate_quiz.local.{label}', lambda service=local, transcript=transcript: expect_success(
+            service.generate_quiz(transcript, num_questions=QUESTION_COUNT, cache_mode='new')))
+
+        llm = QuizService('benchmark', http=http, use_mock=False)
+        llm.base_url = f'{stub_url}/v1'
+        suite.bench(f'quiz.generate_quiz.llm_stub.{label}', lambda service=llm, transcript=transcript: expect_success(
+            service.generate_quiz(transcript, num_questions=QUESTION_COUNT, cache_mode='new')))
+
+        cached = QuizService('benchmark', use_mock=True, cache=QuizCache(db.quiz_cache, PROMPT_VERSION))
+        expect_success(cached.generate_quiz(transcript, num_questions=QUESTION_COUNT, cache_mode='new'))
+        suite.bench(f'quiz.generate_quiz.cached.{label}', lambda service=cached, transcript=transcript: expect_success(
+            service.generate_quiz(transcript, num_questions=QUESTION_COUNT, cache_mode='reuse')))
+
+    auth = AuthService(db, hasher=PasswordHasher(), attempts_per_user=10 ** 9, attempts_per_ip=10 ** 9)
+    expect_success(auth.register_user('benchmark', 'benchmark@example.invalid', PASSWORD))
+    suite.bench('auth.login_user', lambda: expect_success(auth.login_user('benchmark', PASSWORD, ip='127.0.0.1')))
+
+
+def bench_callbacks(suite, stub_url):
+    import mongomock
+    from dash._callback_context import context_value
+    from dash._utils import AttributeDict, stringify_id
+    from flask_login import login_user
+
+    import app as app_module
+    dash_app = app_module.create_app()
+    container = app_module.container
+    with mock.patch('pymongo.MongoClient', mongomock.MongoClient):
+        # Clients are created on first use; create the database one under the patch
+        container.db
+
+    logging.getLogger('youtube_quiz_app').setLevel(logging.WARNING)
+    container.youtube_service.base_url = f'{stub_url}/youtube/v3'
+    container.quiz_service.base_url = f'{stub_url}/v1'
+    counter = itertools.count()
+
+    def trigger(component_id, prop='n_clicks'):
+        context_value.set(AttributeDict(triggered_inputs=[{'prop_id': f'{stringify_id(component_id)}.{prop}',
+                                                           'value': 1}]))
+
+    def select_video(label):
+        video_id = f'{label}-{next(counter):06d}'
+        trigger({'type': 'select-video', 'index': video_id})
+        transcript_ref, video_info, content = app_module.select_video([1])
+        if not isinstance(transcript_ref, dict):
+            raise RuntimeError(f'select_video failed: {content}')
+        return transcript_ref, video_info
+
+    def generate_quiz(transcript_ref):
+        trigger('generate-quiz')
+        job, _, status, result = app_module.generate_quiz(1, transcript_ref, 'multiple_choice', QUESTION_COUNT, 'new')
+        polls = itertools.count(1)
+        while not isinstance(result, dict):
+            if not isinstance(job, dict):
+                raise RuntimeError(f'generate_quiz failed: {status}')
+            time.sleep(0.001)
+            trigger('quiz-job-poll', 'n_intervals')
+            status, _, result = app_module.poll_quiz_job(next(polls), job)
+        trigger('quiz-job-result', 'data')
+        quiz_ref, _ = app_module.show_quiz(result)
+        return quiz_ref
+
+    with dash_app.server.test_request_context('/'), patched_transcript_api():
+        expect_success(container.auth_service.register_user('benchmark', 'benchmark@example.invalid', PASSWORD))
+        user = container.db.users.find_one({'username': 'benchmark'})
+        login_user(app_module.User(user))
+
+        for label, _ in TRANSCRIPT_SIZES:
+            suite.bench(f'callbacks.select_video.{label}', lambda label=label: select_video(label))
+
+            transcript_ref, video_info = select_video(label)
+            suite.bench(f'callbacks.generate_quiz.{label}',
+                        lambda transcript_ref=transcript_ref: generate_quiz(transcript_ref))
+
+        quiz_ref = generate_quiz(transcript_ref)
+        quiz = container.session_store.get(quiz_ref['handle'], app_module.session_id())
+        answers = [question['options'][0] if question['options'] else '' for question in quiz['questions']]
+        answer_ids = [{'type': 'question-answer', 'index': i} for i in range(len(answers))]
+
+        def submit_quiz():
+            trigger('submit-quiz')
+            results, user_answers, _ = app_module.submit_quiz(1, quiz_ref, answers, answer_ids, video_info)
+            if not isinstance(user_answers, dict):
+                raise RuntimeError(f'submit_quiz failed: {results}')
+
+        suite.bench('callbacks.submit_quiz', submit_quiz)
+
+
+def compare(results, baseline, threshold):
+    """Print median changes against a baseline; returns the names that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<48} {'baseline':>11} {'current':>11} {'change':>8}")
+    for name, current in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            print(f"{name:<48} {'-':>11} {current['median'] * 1000:9.2f}ms {'new':>8}")
+            continue
+        ratio = current['median'] / previous['median'] if previous['median'] else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<48} {previous['median'] * 1000:9.2f}ms {current['median'] * 1000:9.2f}ms "
+              f"{(ratio - 1) * 100:+7.1f}%{flag}")
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite")
+    parser.add_argument('--output', help="Write results to this JSON file")
+    parser.add_argument('--compare', help="Baseline JSON file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Relative median slowdown that counts as a regression (default 0.2)")
+    parser.add_argument('--repeat', type=int, default=20, help="Timed runs per benchmark")
+    parser.add_argument('--warmup', type=int, default=2, help="Untimed runs per benchmark")
+    parser.add_argument('--only', help="Only run benchmarks whose name contains this text")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='quiz-bench-')
+    configure_environment(workdir)
+    suite = Suite(args.repeat, args.warmup, args.only)
+
+    with StubServer() as stub:
+        bench_services(suite, stub.url, workdir)
+        bench_callbacks(suite, stub.url)
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'warmup': args.warmup,
+        },
+        'results': suite.results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(suite.results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""Local stand-ins for the external services the app talks to"""
+import hashlib
+import json
+import re
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+# Transcript sizes benchmarked, as (label, number of ~3 second segments)
+TRANSCRIPT_SIZES = [('10min', 200), ('1h', 1200), ('3h', 3600)]
+
+WORDS = """
+algorithm amplitude circuit classical coherence computation correction data decoherence energy
+entanglement error experiment field gate hamiltonian information interference measurement model
+momentum network noise observable particle phase photon probability qubit register result signal
+state superposition system theory value vector wavefunction
+""".split()
+FILLER = "the a is we so and of it this that then with for on".split()
+
+
+def make_transcript(segments, seed=0):
+    """Deterministic transcript of the given number of segments"""
+    transcript = []
+    for i in range(segments):
+        n = 6 + (i * 7 + seed) % 7
+        words = [WORDS[(i * 13 + j * 5 + seed) % len(WORDS)] if (i + j) % 3 else FILLER[(i + j) % len(FILLER)]
+                 for j in range(n)]
+        text = ' '.join(words)
+        if i % 3 == 0:
+            text = text.capitalize()
+        if i % 3 == 2:
+            text += '.'
+        transcript.append({'text': text, 'start': i * 3.0, 'duration': 3.0})
+    return transcript
+
+
+def transcript_size(video_id):
+    """Benchmark video IDs start with their size label, e.g. '1h-000042'"""
+    label = video_id.split('-', 1)[0]
+    return dict(TRANSCRIPT_SIZES).get(label, TRANSCRIPT_SIZES[0][1])
+
+
+@contextmanager
+def patched_transcript_api():
+    """Serve generated transcripts instead of fetching them from YouTube"""
+    def get_transcript(video_id, languages=('en',), proxies=None, cookies=None, preserve_formatting=False):
+        return make_transcript(transcript_size(video_id))
+
+    with mock.patch('youtube_transcript_api.YouTubeTranscriptApi.get_transcript', side_effect=get_transcript):
+        yield
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Send headers and body together; otherwise delayed ACKs add ~40 ms per request
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body, content_type='application/json'):
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', '"' + hashlib.md5(data).hexdigest() + '"')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path.endswith('/search'):
+            count = int(query.get('maxResults', ['10'])[0])
+            seed = hashlib.md5(query.get('q', [''])[0].encode('utf-8')).hexdigest()[:6]
+            self._send(json.dumps({'items': [_search_item(f'10min-{seed}{i:04d}') for i in range(count)]}))
+        elif url.path.endswith('/videos'):
+            ids = query.get('id', [''])[0].split(',')
+            self._send(json.dumps({'items': [_video_item(video_id) for video_id in ids if video_id]}))
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if not self.path.endswith('/completions'):
+            self.send_error(404)
+            return
+        self._send(_completion_stream(json.loads(body)), content_type='text/event-stream')
+
+
+def _search_item(video_id):
+    return {
+        'id': {'videoId': video_id},
+        'snippet': {
+            'title': f'Benchmark video {video_id}',
+            'thumbnails': {'medium': {'url': f'https://example.invalid/{video_id}/mq.jpg'}},
+            'channelTitle': 'Benchmarks',
+            'publishedAt': '2024-01-01T00:00:00Z',
+        },
+    }
+
+
+def _video_item(video_id):
+    return {
+        'id': video_id,
+        'snippet': {
+            'title': f'Benchmark video {video_id}',
+            'description': 'Generated for benchmarks',
+            'thumbnails': {'high': {'url': f'https://example.invalid/{video_id}/hq.jpg'}},
+            'channelTitle': 'Benchmarks',
+            'publishedAt': '2024-01-01T00:00:00Z',
+        },
+        'contentDetails': {'duration': 'PT1H2M3S'},
+    }
+
+
+def _completion_stream(payload):
+    """A DeepSeek-style SSE completion holding the requested number of questions"""
+    match = re.search(r'Generate (\d+)', payload.get('prompt', ''))
+    count = int(match.group(1)) if match else 5
+    seed = hashlib.md5(payload.get('prompt', '').encode('utf-8')).hexdigest()[:8]
+    document = json.dumps({'questions': [{
+        'question': f'Question {seed}-{i} about the transcript?',
+        'options': ['First', 'Second', 'Third', 'Fourth'],
+        'correct_answer': 'First',
+        'explanation': 'Generated by the benchmark stub.',
+    } for i in range(count)]})
+
+    # Small deltas, like a real token stream
+    events = [json.dumps({'choices': [{'text': document[i:i + 16]}]}) for i in range(0, len(document), 16)]
+    return ''.join(f'data: {event}\n\n' for event in events) + 'data: [DONE]\n\n'
+
+
+class StubServer:
+    """Threaded HTTP server standing in for the YouTube Data API and DeepSeek"""
+
+    def __init__(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
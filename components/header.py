@@ -17,6 +17,7 @@ def create_header():
                 dbc.Nav([
                     dbc.NavItem(dbc.NavLink("Home", href="/")),
                     dbc.NavItem(dbc.NavLink("History", href="/history")),
+                    dbc.NavItem(dbc.NavLink("Leaderboard", href="/leaderboard")),
                     dbc.NavItem(dbc.NavLink("Profile", href="/profile")),
                     dbc.NavItem(dbc.NavLink("Logout", href="/logout", id="logout-button")),
                 ], className="ms-auto", navbar=True),
@@ -0,0 +1,39 @@
+import dash_bootstrap_components as dbc
+from dash import html, dcc
+from utils.helpers import format_timestamp
+
+def create_history_layout():
+    return dbc.Container([
+        dcc.Store(id='history-cursor'),
+        html.H3("Quiz History", className="mb-4"),
+        html.Div(id='history-content'),
+        dbc.ButtonGroup([
+            dbc.Button("Back to newest", id='history-newest', color='secondary', outline=True),
+            dbc.Button("Older", id='history-older', color='primary'),
+        ], className='mt-3 mb-4')
+    ])
+
+def create_history_table(items):
+    if not items:
+        return dbc.Alert("No quiz results yet. Take a quiz to see it here.", color="info")
+
+    rows = []
+    for item in items:
+        total = item.get('total') or 0
+        percent = f"{100 * item.get('score', 0) / total:.0f}%" if total else "-"
+        rows.append(html.Tr([
+            html.Td(format_timestamp(item['timestamp'])),
+            html.Td(item.get('title') or item.get('video_id')),
+            html.Td(f"{item.get('score', 0)}/{total}"),
+            html.Td(percent),
+        ]))
+
+    return dbc.Table([
+        html.Thead(html.Tr([
+            html.Th("Date"),
+            html.Th("Video"),
+            html.Th("Score"),
+            html.Th("%"),
+        ])),
+        html.Tbody(rows)
+    ], striped=True, hover=True, responsive=True)
@@ -0,0 +1,35 @@
+import dash_bootstrap_components as dbc
+from dash import html
+
+def create_leaderboard_table(entries, value_label, value_format="{:.0f}", user_id=None, rank=None):
+    if not entries:
+        return dbc.Alert("No scores yet.", color="info")
+
+    rows = [
+        html.Tr([
+            html.Td(position),
+            html.Td(entry.get('username') or "Anonymous"),
+            html.Td(value_format.format(entry['value'])),
+        ], className="table-primary" if entry['user_id'] == user_id else None)
+        for position, entry in enumerate(entries, start=1)
+    ]
+
+    # Users outside the top K still see where they stand
+    if rank and rank['rank'] > len(entries):
+        rows.append(html.Tr([
+            html.Td(rank['rank']),
+            html.Td("You"),
+            html.Td(value_format.format(rank['value'])),
+        ], className="table-primary"))
+
+    return dbc.Table([
+        html.Thead(html.Tr([html.Th("#"), html.Th("Player"), html.Th(value_label)])),
+        html.Tbody(rows)
+    ], striped=True, hover=True, size="sm")
+
+def create_leaderboard_layout(entries, user_id=None, rank=None):
+    return dbc.Container([
+        html.H3("Leaderboard", className="mb-1"),
+        html.P("Total correct answers across all quizzes", className="text-muted mb-4"),
+        create_leaderboard_table(entries, "Points", user_id=user_id, rank=rank)
+    ])
@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+import dash_bootstrap_components as dbc
+from dash import html
+from utils.helpers import format_timestamp
+
+def _stat_card(label, value):
+    return dbc.Col(dbc.Card(dbc.CardBody([
+        html.H3(value, className="mb-0"),
+        html.Small(label, className="text-muted")
+    ])), md=3, className='mb-3')
+
+def create_profile_layout(username, stats):
+    if not stats:
+        return dbc.Container([
+            html.H3(username, className="mb-4"),
+            dbc.Alert("No quiz results yet. Take a quiz to start building your stats.", color="info")
+        ])
+
+    average = 100 * stats.get('correct', 0) / stats['questions'] if stats.get('questions') else 0
+    # A streak only counts as current if the last quiz was today or yesterday
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    streak = stats.get('streak', 0) if (stats.get('last_day') or '') >= yesterday else 0
+
+    videos = sorted(stats.get('videos', {}).items(), key=lambda item: item[1].get('best_pct', 0), reverse=True)
+    video_rows = [
+        html.Tr([
+            html.Td(html.A(video.get('title') or video_id, href=f"https://www.youtube.com/watch?v={video_id}",
+                           target="_blank")),
+            html.Td(video.get('attempts', 0)),
+            html.Td(f"{video.get('best_pct', 0):.0f}%"),
+        ])
+        for video_id, video in videos[:20]
+    ]
+
+    return dbc.Container([
+        html.H3(username, className="mb-1"),
+        html.P(f"Taking quizzes since {format_timestamp(stats['first_at'])}", className="text-muted mb-4")
+        if stats.get('first_at') else None,
+        dbc.Row([
+            _stat_card("Quizzes taken", stats.get('quizzes', 0)),
+            _stat_card("Average score", f"{average:.0f}%"),
+            _stat_card("Best score", f"{stats.get('best_pct', 0):.0f}%"),
+            _stat_card("Day streak (best)", f"{streak} ({stats.get('best_streak', 0)})"),
+        ]),
+        html.H5("Best scores by video", className="mt-3"),
+        dbc.Table([
+            html.Thead(html.Tr([html.Th("Video"), html.Th("Attempts"), html.Th("Best")])),
+            html.Tbody(video_rows)
+        ], striped=True, hover=True, responsive=True)
+    ])
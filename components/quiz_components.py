@@ -26,6 +26,12 @@ def create_quiz_interface(questions):
                         value=None,
                         id={'type': 'question-answer', 'index': i},
                         className='mb-3'
+                    ) if question['options'] else dbc.Input(
+                        type='text',
+                        placeholder='Type your answer',
+                        value=None,
+                        id={'type': 'question-answer', 'index': i},
+                        className='mb-3'
                     )
                 ])
             ], className='mb-4')
@@ -42,3 +48,38 @@ def create_quiz_interface(questions):
         ),
         html.Div(id='quiz-results')
     ])
+
+def create_quiz_progress(progress, message, questions=None):
+    # Questions that have already streamed in are shown read-only, in the
+    # order the finished quiz will have: by where they are in the video
+    ordered = sorted(questions or [], key=lambda question: question.get('segment_start', 0))
+    previews = [
+        dbc.Card([
+            dbc.CardHeader(f"Question {i+1}"),
+            dbc.CardBody([
+                html.H5(question['question'], className="card-title"),
+                html.Ul([html.Li(option) for option in question.get('options', [])])
+            ])
+        ], className='mb-4')
+        for i, question in enumerate(ordered)
+    ]
+    
+    return html.Div([dbc.Card([
+        dbc.CardBody([
+            html.P(message, className="mb-2"),
+            dbc.Progress(
+                value=int(progress * 100),
+                label=f"{int(progress * 100)}%",
+                striped=True,
+                animated=True,
+                className='mb-3'
+            ),
+            dbc.Button(
+                "Cancel",
+                id='cancel-quiz-job',
+                color='secondary',
+                outline=True,
+                size='sm'
+            )
+        ])
+    ], className='mb-4'), *previews])
@@ -40,6 +40,16 @@ def create_sidebar():
                 value=5,
                 className='mb-3'
             ),
+            dbc.Select(
+                id='quiz-variant',
+                options=[
+                    {'label': 'Reuse a saved quiz if available', 'value': 'reuse'},
+                    {'label': 'Random saved variant', 'value': 'random'},
+                    {'label': 'Generate a new quiz', 'value': 'new'},
+                ],
+                value='reuse',
+                className='mb-3'
+            ),
             
             html.Hr(),
             
@@ -11,11 +11,84 @@ class Config:
     # YouTube API
     YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY')
     
+    # Password hashing
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+    # gunicorn's own variable for the number of web workers (-w); each one gets its own hashing pool
+    WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+    # Split the cores between the web workers' pools so together they stay within the machine
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS',
+                                          str(max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY))))
+    LOGIN_ATTEMPTS_PER_USER = int(os.getenv('LOGIN_ATTEMPTS_PER_USER', '10'))
+    LOGIN_ATTEMPTS_PER_IP = int(os.getenv('LOGIN_ATTEMPTS_PER_IP', '30'))
+    # SQLite file the login attempt counts are kept in, shared by all workers
+    RATE_LIMIT_PATH = os.getenv('RATE_LIMIT_PATH', 'cache/rate_limits.sqlite3')
+    
+    # Flask-Login user cache
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '1024'))
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '300'))
+    
+    # Write-behind activity logging
+    ACTIVITY_LOG_QUEUE_SIZE = int(os.getenv('ACTIVITY_LOG_QUEUE_SIZE', '10000'))
+    ACTIVITY_LOG_BATCH_SIZE = int(os.getenv('ACTIVITY_LOG_BATCH_SIZE', '500'))
+    ACTIVITY_LOG_FLUSH_INTERVAL = float(os.getenv('ACTIVITY_LOG_FLUSH_INTERVAL', '1.0'))
+    
+    # Transcript cache
+    TRANSCRIPT_CACHE_SIZE = int(os.getenv('TRANSCRIPT_CACHE_SIZE', '256'))
+    TRANSCRIPT_CACHE_TTL = int(os.getenv('TRANSCRIPT_CACHE_TTL', str(7 * 24 * 3600)))
+    TRANSCRIPT_NEGATIVE_TTL = int(os.getenv('TRANSCRIPT_NEGATIVE_TTL', str(6 * 3600)))
+    
+    # Shared YouTube Data API cache
+    API_CACHE_PATH = os.getenv('API_CACHE_PATH', 'cache/youtube_api.sqlite3')
+    SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', '900'))
+    VIDEO_CACHE_TTL = int(os.getenv('VIDEO_CACHE_TTL', str(24 * 3600)))
+    
+    # YouTube Data API quota, in units per Pacific Time day
+    YOUTUBE_DAILY_QUOTA = int(os.getenv('YOUTUBE_DAILY_QUOTA', '10000'))
+    # Past this fraction of the daily quota, searches are answered from the cache only
+    YOUTUBE_QUOTA_DEGRADE_AT = float(os.getenv('YOUTUBE_QUOTA_DEGRADE_AT', '0.8'))
+    # Most units that can be spent at once; the bucket refills at the daily rate
+    YOUTUBE_QUOTA_BURST = int(os.getenv('YOUTUBE_QUOTA_BURST', '2000'))
+    
     # DeepSeek API
     DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
+    DEEPSEEK_TIMEOUT = float(os.getenv('DEEPSEEK_TIMEOUT', '60'))
+    DEEPSEEK_MODEL = os.getenv('DEEPSEEK_MODEL', 'quiz-generator')
+    QUIZ_USE_MOCK = os.getenv('QUIZ_USE_MOCK', 'True').lower() == 'true'
+    # Sections still missing questions after this many seconds use the local generator
+    QUIZ_LLM_DEADLINE = float(os.getenv('QUIZ_LLM_DEADLINE', '45'))
+    QUIZ_CHUNK_TOKENS = int(os.getenv('QUIZ_CHUNK_TOKENS', '3000'))
+    QUIZ_MAX_PARALLEL_CHUNKS = int(os.getenv('QUIZ_MAX_PARALLEL_CHUNKS', '8'))
+    QUIZ_TOKEN_BUDGET = int(os.getenv('QUIZ_TOKEN_BUDGET', '12000'))
+    QUIZ_CACHE_MAX_VARIANTS = int(os.getenv('QUIZ_CACHE_MAX_VARIANTS', '5'))
+    
+    # Server-side session data (transcripts and quizzes)
+    SESSION_DATA_TTL = int(os.getenv('SESSION_DATA_TTL', str(6 * 3600)))
+    SESSION_DATA_CACHE_SIZE = int(os.getenv('SESSION_DATA_CACHE_SIZE', '256'))
+    
+    # Quiz history
+    HISTORY_PAGE_SIZE = int(os.getenv('HISTORY_PAGE_SIZE', '20'))
+    LEADERBOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', '10'))
+    
+    # Background quiz generation
+    QUIZ_WORKERS = int(os.getenv('QUIZ_WORKERS', '2'))
+    QUIZ_QUEUE_SIZE = int(os.getenv('QUIZ_QUEUE_SIZE', '8'))
+    
+    # Outbound HTTP client
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+    HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '2'))
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
     
     # Flask secret key
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
     
     # Debug mode
     DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
+    
+    # Logging
+    LOG_DIR = os.getenv('LOG_DIR', 'logs')
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+    
+    # Metrics; with several web workers, an empty directory they all share
+    METRICS_DIR = os.getenv('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
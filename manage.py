@@ -0,0 +1,117 @@
+import argparse
+import time
+from pymongo import MongoClient
+from services.container import ServiceContainer
+from services.database import ensure_indexes, remove_duplicate_results
+from services.leaderboard_service import LeaderboardService
+from services.pregeneration_service import Checkpoint, Pregenerator
+from services.stats_service import StatsService
+from utils.rate_limiter import SlidingWindowLimiter
+from config import Config
+
+
+def get_db():
+    client = MongoClient(Config.MONGO_URI)
+    return client[Config.MONGO_DB_NAME]
+
+
+def backfill_stats(args):
+    """Remove repeated quiz submissions and rebuild user_stats from quiz_results"""
+    started = time.perf_counter()
+    db = get_db()
+    removed = remove_duplicate_results(db, batch_size=args.batch_size)
+    if removed:
+        print(f"Removed {removed} repeated quiz submissions; run rebuild-leaderboards to recount them")
+    ensure_indexes(db)
+    written = StatsService(db).backfill(batch_size=args.batch_size)
+    print(f"Rebuilt stats for {written} users in {time.perf_counter() - started:.1f}s")
+
+
+def rebuild_leaderboards(args):
+    """Recompute all leaderboards from quiz_results"""
+    started = time.perf_counter()
+    boards = LeaderboardService(get_db(), size=Config.LEADERBOARD_SIZE).rebuild(batch_size=args.batch_size)
+    print(f"Rebuilt {boards} leaderboards in {time.perf_counter() - started:.1f}s")
+
+
+def pregenerate(args):
+    """Fetch metadata and transcripts and generate quizzes ahead of time"""
+    container = ServiceContainer()
+    youtube_service = container.youtube_service
+    if args.transcript_rate:
+        # One fetch per 1/rate seconds keeps them evenly spaced
+        youtube_service.transcript_limiter = SlidingWindowLimiter(1, window=1.0 / args.transcript_rate)
+
+    pregenerator = Pregenerator(
+        youtube_service,
+        container.quiz_service,
+        container.history_service,
+        checkpoint=Checkpoint(args.checkpoint),
+        workers=args.workers,
+        quiz_specs=[(question_type, args.num_questions) for question_type in args.question_type]
+    )
+    video_ids = pregenerator.resolve(args.video, args.playlist, args.channel, max_per_source=args.limit)
+    print(f"Pre-generating quizzes for {len(video_ids)} videos")
+
+    report = pregenerator.run(video_ids)
+    print(f"Done {report['done']}, failed {report['failed']}, skipped {report['skipped']} "
+          f"(already in {args.checkpoint}) of {report['videos']} videos")
+    print(f"Quizzes: {report['quizzes_generated']} generated, {report['quizzes_cached']} already cached, "
+          f"{report['questions']} questions")
+    print(f"Took {report['seconds']:.1f}s ({report['metadata_seconds']:.1f}s metadata), "
+          f"{report['videos_per_minute']:.1f} videos/min")
+    if report['quota_exhausted']:
+        print("Stopped early: the YouTube API quota ran out. Run the same command again to continue.")
+
+
+def quota_report(args):
+    """Show YouTube Data API quota usage per endpoint"""
+    quota = ServiceContainer().quota_manager
+    for day, usage in quota.history(days=args.days).items():
+        total = sum(entry['units'] for entry in usage.values())
+        print(f"{day}: {total} of {quota.daily_limit} units")
+        for endpoint, entry in sorted(usage.items()):
+            print(f"  {endpoint:<24} {entry['units']:>7} units {entry['calls']:>6} calls {entry['denied']:>6} denied")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="YouTube Quiz Generator maintenance commands")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    backfill = subparsers.add_parser('backfill-stats', help=backfill_stats.__doc__)
+    backfill.add_argument('--batch-size', type=int, default=500, help="Documents per bulk write")
+    backfill.set_defaults(func=backfill_stats)
+
+    leaderboards = subparsers.add_parser('rebuild-leaderboards', help=rebuild_leaderboards.__doc__)
+    leaderboards.add_argument('--batch-size', type=int, default=500, help="Documents per bulk write")
+    leaderboards.set_defaults(func=rebuild_leaderboards)
+
+    pregen = subparsers.add_parser('pregenerate', help=pregenerate.__doc__)
+    pregen.add_argument('--video', action='append', default=[], help="Video ID (repeatable)")
+    pregen.add_argument('--playlist', action='append', default=[], help="Playlist ID (repeatable)")
+    pregen.add_argument('--channel', action='append', default=[], help="Channel ID, for its uploads (repeatable)")
+    pregen.add_argument('--limit', type=int, help="Most videos to take from each playlist or channel")
+    pregen.add_argument('--question-type', action='append',
+                        choices=['multiple_choice', 'true_false', 'short_answer'],
+                        help="Quiz type to generate (repeatable, default multiple_choice)")
+    pregen.add_argument('--num-questions', type=int, default=5, help="Questions per quiz")
+    pregen.add_argument('--workers', type=int, default=4, help="Videos processed in parallel")
+    pregen.add_argument('--transcript-rate', type=float, default=2.0, help="Most transcript fetches per second")
+    pregen.add_argument('--checkpoint', default='pregenerate.checkpoint.json',
+                        help="Progress file; finished videos in it are skipped on the next run")
+    pregen.set_defaults(func=pregenerate)
+
+    quota = subparsers.add_parser('quota', help=quota_report.__doc__)
+    quota.add_argument('--days', type=int, default=7, help="Days of history to show")
+    quota.set_defaults(func=quota_report)
+
+    args = parser.parse_args(argv)
+    if args.command == 'pregenerate':
+        if not (args.video or args.playlist or args.channel):
+            parser.error("pregenerate needs at least one --video, --playlist or --channel")
+        args.question_type = args.question_type or ['multiple_choice']
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from pymongo.errors import BulkWriteError, PyMongoError
+
+
+class ActivityLogWriter:
+    """Write-behind buffer for activity log entries.
+
+    ``log`` only puts the entry on a bounded in-memory queue. A background
+    thread flushes the queue with unordered ``insert_many`` calls whenever
+    ``batch_size`` entries are waiting or ``flush_interval`` seconds have
+    passed. When the queue is full new entries are dropped and counted.
+    """
+
+    def __init__(self, collection, max_queue=10000, batch_size=500, flush_interval=1.0):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats = {'enqueued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+        atexit.register(self.close)
+
+    def log(self, entry):
+        """Queue an entry for writing; never blocks"""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('enqueued')
+        return True
+
+    def metrics(self):
+        """Return queue depth and write/drop counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['queue_capacity'] = self._queue.maxsize
+        return stats
+
+    def close(self, timeout=5):
+        """Stop the flusher and write whatever is still queued"""
+        self._stop.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        while True:
+            batch = self._take_batch(block=False)
+            if not batch:
+                break
+            self._write(batch)
+
+    def _ensure_thread(self):
+        # The flusher thread does not survive a fork, so start one per process
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='activity-log-writer', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._take_batch(block=True)
+            if batch:
+                self._write(batch)
+
+    def _take_batch(self, block):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                if block:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        try:
+            self.collection.insert_many(batch, ordered=False)
+            written = len(batch)
+        except BulkWriteError as e:
+            written = e.details.get('nInserted', 0)
+        except PyMongoError:
+            written = 0
+
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['written'] += written
+            self._stats['failed'] += len(batch) - written
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+from utils.sqlite import SQLiteConnections
+
+
+class ApiCache:
+    """SQLite-backed response cache shared by all worker processes.
+
+    Expired entries are kept around (up to ``max_stale`` seconds) together
+    with their ETag so callers can revalidate them with a conditional request
+    instead of downloading and parsing the full response again.
+    """
+
+    def __init__(self, path, max_stale=7 * 24 * 3600):
+        self.path = path
+        self.max_stale = max_stale
+        self._connections = SQLiteConnections(path)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'revalidated': 0, 'writes': 0}
+
+        conn = self._connections.get()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS api_cache ('
+            ' key TEXT PRIMARY KEY,'
+            ' value TEXT NOT NULL,'
+            ' etag TEXT,'
+            ' expires_at REAL NOT NULL)'
+        )
+        conn.execute('DELETE FROM api_cache WHERE expires_at < ?', (time.time() - self.max_stale,))
+        conn.commit()
+
+    def get(self, key):
+        """Return {'value', 'etag', 'fresh'} for a key, or None on a miss"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """Look up several keys in one query"""
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        placeholders = ','.join('?' * len(keys))
+        rows = self._connections.get().execute(
+            f'SELECT key, value, etag, expires_at FROM api_cache WHERE key IN ({placeholders})',
+            keys
+        ).fetchall()
+
+        now = time.time()
+        entries = {}
+        for key, value, etag, expires_at in rows:
+            if expires_at + self.max_stale < now:
+                continue
+            entries[key] = {
+                'value': json.loads(value),
+                'etag': etag,
+                'fresh': expires_at > now,
+            }
+
+        with self._lock:
+            for entry in entries.values():
+                self._stats['hits' if entry['fresh'] else 'stale_hits'] += 1
+            self._stats['misses'] += len(keys) - len(entries)
+        return entries
+
+    def set(self, key, value, ttl, etag=None):
+        """Store a value for ``ttl`` seconds"""
+        self.set_many({key: value}, ttl, etags={key: etag})
+
+    def set_many(self, values, ttl, etags=None):
+        """Store several values in one transaction"""
+        if not values:
+            return
+        etags = etags or {}
+        expires_at = time.time() + ttl
+        conn = self._connections.get()
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO api_cache (key, value, etag, expires_at) VALUES (?, ?, ?, ?)',
+                [(key, json.dumps(value), etags.get(key), expires_at) for key, value in values.items()]
+            )
+        with self._lock:
+            self._stats['writes'] += len(values)
+
+    def touch(self, key, ttl):
+        """Extend a stale entry after the API confirmed it is unchanged"""
+        conn = self._connections.get()
+        with conn:
+            conn.execute('UPDATE api_cache SET expires_at = ? WHERE key = ?', (time.time() + ttl, key))
+        with self._lock:
+            self._stats['revalidated'] += 1
+
+    def stats(self):
+        """Return hit/miss/revalidation counters for this process"""
+        with self._lock:
+            return dict(self._stats)
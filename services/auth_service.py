@@ -1,24 +1,77 @@
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import DuplicateKeyError
+from services.activity_logger import ActivityLogWriter
+from services.password_hasher import HasherBusyError, PasswordHasher
+from utils.rate_limiter import SlidingWindowLimiter, SQLiteSlidingWindowLimiter
+from utils.ttl_cache import TTLCache
+
+# Fields the app needs for the logged-in user; never load password_hash per request
+USER_PROJECTION = {'username': 1, 'email': 1}
 
 class AuthService:
-    def __init__(self, db):
+    def __init__(self, db, activity_log=None, user_cache_size=1024, user_cache_ttl=300,
+                 hasher=None, attempts_per_user=10, attempts_per_ip=30, attempt_window=60, limiter_path=None):
         self.db = db
+        self.activity_log = activity_log or ActivityLogWriter(db.activity_logs)
+        self.user_cache = TTLCache(maxsize=user_cache_size, ttl=user_cache_ttl)
+        self.hasher = hasher or PasswordHasher()
+        if limiter_path:
+            # Shared by all workers, so the limits hold however many there are
+            self.user_limiter = SQLiteSlidingWindowLimiter(limiter_path, attempts_per_user, attempt_window,
+                                                           name='login_user')
+            self.ip_limiter = SQLiteSlidingWindowLimiter(limiter_path, attempts_per_ip, attempt_window,
+                                                         name='login_ip')
+        else:
+            self.user_limiter = SlidingWindowLimiter(attempts_per_user, attempt_window)
+            self.ip_limiter = SlidingWindowLimiter(attempts_per_ip, attempt_window)
+    
+    def _throttled(self, username, ip):
+        # Check both limiters so each attempt is counted against both keys
+        user_ok = self.user_limiter.hit(username) if username else True
+        ip_ok = self.ip_limiter.hit(ip) if ip else True
+        return not (user_ok and ip_ok)
+    
+    def get_user(self, user_id):
+        """Load the session user's fields, served from a TTL cache"""
+        user = self.user_cache.get(user_id)
+        if user is not None:
+            return user
+        
+        try:
+            object_id = ObjectId(user_id)
+        except (InvalidId, TypeError):
+            return None
+        
+        user = self.db.users.find_one({'_id': object_id}, USER_PROJECTION)
+        if user is not None:
+            self.user_cache.set(user_id, user)
+        return user
+    
+    def cache_user(self, user):
+        """Seed the cache with a user document that was just loaded"""
+        self.user_cache.set(str(user['_id']), {field: user[field] for field in ('_id', *USER_PROJECTION)})
+    
+    def invalidate_user(self, user_id):
+        """Forget a cached user; call on logout and after profile changes"""
+        self.user_cache.pop(user_id)
     
-    def register_user(self, username, email, password):
+    def register_user(self, username, email, password, ip=None):
         """Register a new user"""
-        # Check if username or email already exists
-        if self.db.users.find_one({'username': username}):
-            return {'success': False, 'message': 'Username already exists'}
+        if ip and not self.ip_limiter.hit(ip):
+            return {'success': False, 'message': 'Too many attempts. Please wait a minute and try again.'}
         
-        if self.db.users.find_one({'email': email}):
-            return {'success': False, 'message': 'Email already exists'}
+        try:
+            password_hash = self.hasher.hash(password)
+        except HasherBusyError:
+            return {'success': False, 'message': 'The server is busy. Please try again in a moment.'}
         
-        # Create new user
+        # Create new user; the unique indexes on username and email reject duplicates
         user_data = {
             'username': username,
             'email': email,
-            'password_hash': generate_password_hash(password),
+            'password_hash': password_hash,
             'created_at': datetime.now(),
             'last_login': None,
             'is_active': True
@@ -28,38 +81,54 @@ class AuthService:
             result = self.db.users.insert_one(user_data)
             
             # Log the registration
-            self.db.activity_logs.insert_one({
+            self.activity_log.log({
                 'user_id': result.inserted_id,
                 'action': 'register',
                 'timestamp': datetime.now(),
-                'details': {'ip': '127.0.0.1'}  # In production, get real IP
+                'details': {'ip': ip}
             })
             
             return {'success': True, 'message': 'Registration successful'}
+        except DuplicateKeyError as e:
+            key_pattern = (e.details or {}).get('keyPattern', {})
+            if 'email' in key_pattern or 'email_unique' in str(e):
+                return {'success': False, 'message': 'Email already exists'}
+            return {'success': False, 'message': 'Username already exists'}
         except Exception as e:
             return {'success': False, 'message': str(e)}
     
-    def login_user(self, username, password):
+    def login_user(self, username, password, ip=None):
         """Authenticate a user"""
+        if self._throttled(username, ip):
+            return {'success': False, 'message': 'Too many login attempts. Please wait a minute and try again.'}
+        
         user = self.db.users.find_one({'username': username})
         if not user:
             return {'success': False, 'message': 'Invalid username or password'}
         
-        if not check_password_hash(user['password_hash'], password):
-            return {'success': False, 'message': 'Invalid username or password'}
+        try:
+            if not self.hasher.verify(user['password_hash'], password):
+                return {'success': False, 'message': 'Invalid username or password'}
+            
+            # Upgrade hashes made with older parameters while we have the password
+            updates = {'last_login': datetime.now()}
+            if self.hasher.needs_rehash(user['password_hash']):
+                updates['password_hash'] = self.hasher.hash(password)
+        except HasherBusyError:
+            return {'success': False, 'message': 'The server is busy. Please try again in a moment.'}
         
         # Update last login
         self.db.users.update_one(
             {'_id': user['_id']},
-            {'$set': {'last_login': datetime.now()}}
+            {'$set': updates}
         )
         
         # Log the login
-        self.db.activity_logs.insert_one({
+        self.activity_log.log({
             'user_id': user['_id'],
             'action': 'login',
             'timestamp': datetime.now(),
-            'details': {'ip': '127.0.0.1'}  # In production, get real IP
+            'details': {'ip': ip}
         })
         
         return {'success': True, 'message': 'Login successful', 'user_data': user}
@@ -72,4 +141,4 @@ class AuthService:
             'timestamp': datetime.now(),
             'details': details or {}
         }
-        self.db.activity_logs.insert_one(log_entry)
+        self.activity_log.log(log_entry)
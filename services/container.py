@@ -0,0 +1,256 @@
+import logging
+import os
+import threading
+from config import Config
+from utils.metrics import MetricsRegistry
+
+logger = logging.getLogger('youtube_quiz_app')
+
+
+class ServiceContainer:
+    """Builds the app's clients and services on first use, once per process.
+
+    Nothing connects at import time or in ``create_app``. The first access in
+    a process builds the client or service, plus anything it depends on. A
+    forked child (e.g. a gunicorn worker started with --preload) builds its
+    own the first time it needs them, so no MongoClient, connection pool or
+    background thread is shared with the parent.
+
+    The metrics registry is the exception. It is plain memory, and callbacks
+    are instrumented against it once when the app is created. Its snapshot
+    writer, if any, is started per process by ``MetricsRegistry.ensure_writer``.
+
+    Service modules are imported inside the factories too, so heavy
+    dependencies load on first use, not when a worker boots.
+    """
+
+    def __init__(self, config=Config, metrics=None):
+        self.config = config
+        self.metrics = metrics or MetricsRegistry(config.METRICS_DIR, flush_interval=config.METRICS_FLUSH_INTERVAL)
+        self._instances = {}
+        self._pid = None
+        self._lock = threading.RLock()
+
+    def peek(self, name):
+        """Return a service if this process has already built it, else None"""
+        if self._pid != os.getpid():
+            return None
+        return self._instances.get(name)
+
+    def _get(self, name, factory):
+        instance = self._instances.get(name) if self._pid == os.getpid() else None
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # Anything inherited from the parent process is unusable here
+                self._instances = {}
+                self._pid = os.getpid()
+            instance = self._instances.get(name)
+            if instance is None:
+                instance = factory()
+                self._instances[name] = instance
+            return instance
+
+    @property
+    def db_client(self):
+        return self._get('db_client', self._create_db_client)
+
+    @property
+    def db(self):
+        return self._get('db', self._create_db)
+
+    @property
+    def http_client(self):
+        return self._get('http_client', self._create_http_client)
+
+    @property
+    def activity_log(self):
+        return self._get('activity_log', self._create_activity_log)
+
+    @property
+    def auth_service(self):
+        return self._get('auth_service', self._create_auth_service)
+
+    @property
+    def transcript_cache(self):
+        return self._get('transcript_cache', self._create_transcript_cache)
+
+    @property
+    def api_cache(self):
+        return self._get('api_cache', self._create_api_cache)
+
+    @property
+    def quota_manager(self):
+        return self._get('quota_manager', self._create_quota_manager)
+
+    @property
+    def youtube_service(self):
+        return self._get('youtube_service', self._create_youtube_service)
+
+    @property
+    def quiz_cache(self):
+        return self._get('quiz_cache', self._create_quiz_cache)
+
+    @property
+    def quiz_service(self):
+        return self._get('quiz_service', self._create_quiz_service)
+
+    @property
+    def session_store(self):
+        return self._get('session_store', self._create_session_store)
+
+    @property
+    def job_manager(self):
+        return self._get('job_manager', self._create_job_manager)
+
+    @property
+    def history_service(self):
+        return self._get('history_service', self._create_history_service)
+
+    @property
+    def stats_service(self):
+        return self._get('stats_service', self._create_stats_service)
+
+    @property
+    def leaderboard_service(self):
+        return self._get('leaderboard_service', self._create_leaderboard_service)
+
+    def _create_db_client(self):
+        from pymongo import MongoClient
+        from utils.metrics import MongoCommandListener
+        return MongoClient(self.config.MONGO_URI, event_listeners=[MongoCommandListener(self.metrics)])
+
+    def _create_db(self):
+        from services.database import ensure_indexes
+        db = self.db_client[self.config.MONGO_DB_NAME]
+        try:
+            ensure_indexes(db)
+        except Exception as e:
+            logger.error("Error creating database indexes: %s", e)
+        return db
+
+    def _create_http_client(self):
+        from utils.http_client import HttpClient
+        return HttpClient(
+            connect_timeout=self.config.HTTP_CONNECT_TIMEOUT,
+            read_timeout=self.config.HTTP_READ_TIMEOUT,
+            max_retries=self.config.HTTP_MAX_RETRIES,
+            pool_size=self.config.HTTP_POOL_SIZE,
+            metrics=self.metrics
+        )
+
+    def _create_activity_log(self):
+        from services.activity_logger import ActivityLogWriter
+        return ActivityLogWriter(
+            self.db.activity_logs,
+            max_queue=self.config.ACTIVITY_LOG_QUEUE_SIZE,
+            batch_size=self.config.ACTIVITY_LOG_BATCH_SIZE,
+            flush_interval=self.config.ACTIVITY_LOG_FLUSH_INTERVAL
+        )
+
+    def _create_auth_service(self):
+        from services.auth_service import AuthService
+        from services.password_hasher import PasswordHasher
+        return AuthService(
+            self.db,
+            activity_log=self.activity_log,
+            user_cache_size=self.config.USER_CACHE_SIZE,
+            user_cache_ttl=self.config.USER_CACHE_TTL,
+            hasher=PasswordHasher(
+                method=self.config.PASSWORD_HASH_METHOD,
+                max_workers=self.config.PASSWORD_HASH_WORKERS
+            ),
+            attempts_per_user=self.config.LOGIN_ATTEMPTS_PER_USER,
+            attempts_per_ip=self.config.LOGIN_ATTEMPTS_PER_IP,
+            limiter_path=self.config.RATE_LIMIT_PATH
+        )
+
+    def _create_transcript_cache(self):
+        from services.transcript_cache import TranscriptCache
+        return TranscriptCache(
+            self.db.transcript_cache,
+            max_entries=self.config.TRANSCRIPT_CACHE_SIZE,
+            ttl=self.config.TRANSCRIPT_CACHE_TTL,
+            negative_ttl=self.config.TRANSCRIPT_NEGATIVE_TTL
+        )
+
+    def _create_api_cache(self):
+        from services.api_cache import ApiCache
+        return ApiCache(self.config.API_CACHE_PATH)
+
+    def _create_quota_manager(self):
+        from services.quota_manager import QuotaManager
+        return QuotaManager(
+            self.config.API_CACHE_PATH,
+            daily_limit=self.config.YOUTUBE_DAILY_QUOTA,
+            degrade_at=self.config.YOUTUBE_QUOTA_DEGRADE_AT,
+            burst=self.config.YOUTUBE_QUOTA_BURST
+        )
+
+    def _create_youtube_service(self):
+        from services.youtube_service import YouTubeService
+        return YouTubeService(
+            self.config.YOUTUBE_API_KEY,
+            transcript_cache=self.transcript_cache,
+            api_cache=self.api_cache,
+            search_ttl=self.config.SEARCH_CACHE_TTL,
+            video_ttl=self.config.VIDEO_CACHE_TTL,
+            http=self.http_client,
+            quota=self.quota_manager
+        )
+
+    def _create_quiz_cache(self):
+        from services.quiz_cache import QuizCache
+        from services.quiz_service import PROMPT_VERSION
+        quiz_cache = QuizCache(self.db.quiz_cache, PROMPT_VERSION, max_variants=self.config.QUIZ_CACHE_MAX_VARIANTS)
+
+        # Quizzes generated from an older prompt template are no longer valid
+        purged = quiz_cache.purge_stale_versions()
+        if purged:
+            logger.info("Purged %d cached quizzes from older prompt versions", purged)
+        return quiz_cache
+
+    def _create_quiz_service(self):
+        from services.quiz_service import QuizService
+        return QuizService(
+            self.config.DEEPSEEK_API_KEY,
+            http=self.http_client,
+            use_mock=self.config.QUIZ_USE_MOCK,
+            timeout=self.config.DEEPSEEK_TIMEOUT,
+            chunk_tokens=self.config.QUIZ_CHUNK_TOKENS,
+            max_parallel_chunks=self.config.QUIZ_MAX_PARALLEL_CHUNKS,
+            cache=self.quiz_cache,
+            token_budget=self.config.QUIZ_TOKEN_BUDGET,
+            llm_deadline=self.config.QUIZ_LLM_DEADLINE,
+            model=self.config.DEEPSEEK_MODEL
+        )
+
+    def _create_session_store(self):
+        from services.session_store import SessionStore
+        return SessionStore(
+            self.db.session_data,
+            ttl=self.config.SESSION_DATA_TTL,
+            local_cache_size=self.config.SESSION_DATA_CACHE_SIZE
+        )
+
+    def _create_job_manager(self):
+        from services.job_service import JobManager
+        return JobManager(
+            max_workers=self.config.QUIZ_WORKERS,
+            max_pending=self.config.QUIZ_QUEUE_SIZE,
+            collection=self.db.quiz_jobs
+        )
+
+    def _create_history_service(self):
+        from services.history_service import HistoryService
+        return HistoryService(self.db, page_size=self.config.HISTORY_PAGE_SIZE)
+
+    def _create_stats_service(self):
+        from services.stats_service import StatsService
+        return StatsService(self.db)
+
+    def _create_leaderboard_service(self):
+        from services.leaderboard_service import LeaderboardService
+        return LeaderboardService(self.db, size=self.config.LEADERBOARD_SIZE)
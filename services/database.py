@@ -1,6 +1,62 @@
-from pymongo import MongoClient
+from datetime import datetime
+from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
 from config import Config
 
+
+def ensure_indexes(db):
+    """Create the indexes the app's queries rely on.
+    
+    create_index is a no-op when the index already exists, so this is safe
+    to run on every start.
+    """
+    db.users.create_index('username', unique=True, name='username_unique')
+    db.users.create_index('email', unique=True, name='email_unique')
+    db.quiz_results.create_index(
+        [('user_id', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)],
+        name='user_id_timestamp_id'
+    )
+    # Superseded by user_id_timestamp_id, which serves the same queries
+    if 'user_id_timestamp' in db.quiz_results.index_information():
+        db.quiz_results.drop_index('user_id_timestamp')
+    # No query uses it: leaderboards are precomputed, and their rebuild scans everything anyway
+    if 'video_id_score_pct_timestamp' in db.quiz_results.index_information():
+        db.quiz_results.drop_index('video_id_score_pct_timestamp')
+    db.activity_logs.create_index('timestamp', name='timestamp')
+    # A quiz is recorded once per user, however often it is submitted. Kept
+    # last because it cannot be built while older duplicate results exist.
+    try:
+        db.quiz_results.create_index(
+            [('user_id', ASCENDING), ('quiz_id', ASCENDING)],
+            unique=True,
+            name='user_id_quiz_id_unique'
+        )
+    except DuplicateKeyError:
+        raise RuntimeError("quiz_results holds repeated submissions of the same quiz, so they are not "
+                           "deduplicated and stats are double counted. Run `python manage.py backfill-stats` "
+                           "to remove them, then `python manage.py rebuild-leaderboards`.")
+
+
+def remove_duplicate_results(db, batch_size=500):
+    """Keep only the earliest result per (user_id, quiz_id); returns the number removed"""
+    duplicates = db.quiz_results.aggregate([
+        {'$sort': {'timestamp': 1, '_id': 1}},
+        {'$group': {'_id': {'user_id': '$user_id', 'quiz_id': '$quiz_id'}, 'ids': {'$push': '$_id'}}},
+        {'$match': {'ids.1': {'$exists': True}}},
+    ], allowDiskUse=True)
+
+    removed = 0
+    batch = []
+    for group in duplicates:
+        batch.extend(group['ids'][1:])
+        if len(batch) >= batch_size:
+            removed += db.quiz_results.delete_many({'_id': {'$in': batch}}).deleted_count
+            batch = []
+    if batch:
+        removed += db.quiz_results.delete_many({'_id': {'$in': batch}}).deleted_count
+    return removed
+
+
 class Database:
     def __init__(self):
         self.client = MongoClient(Config.MONGO_URI)
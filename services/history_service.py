@@ -0,0 +1,90 @@
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+
+# Fields of quiz_results a history row needs; answers and questions stay on the server
+HISTORY_PROJECTION = {'quiz_id': 1, 'video_id': 1, 'score': 1, 'total': 1, 'timestamp': 1}
+
+
+class HistoryService:
+    """Reads a user's quiz history one page at a time.
+
+    Pages are keyset-paginated on the ``(user_id, timestamp, _id)`` index:
+    the cursor is the timestamp and _id of the last row shown and the next
+    page is the ``page_size`` newest results after it in that order. The
+    _id breaks ties, so results saved in the same instant are neither
+    skipped nor repeated. Each page costs the same however long the history
+    is, and only one page is ever loaded.
+    """
+
+    def __init__(self, db, page_size=20):
+        self.db = db
+        self.page_size = page_size
+
+    def record_video(self, video_info):
+        """Upsert the metadata shown next to results for this video"""
+        self.db.videos.update_one({'_id': video_info['id']}, self._video_update(video_info), upsert=True)
+
+    def record_videos(self, videos):
+        """Upsert metadata for many videos in one bulk write"""
+        requests = [UpdateOne({'_id': info['id']}, self._video_update(info), upsert=True) for info in videos]
+        if requests:
+            self.db.videos.bulk_write(requests, ordered=False)
+
+    @staticmethod
+    def _video_update(video_info):
+        return {'$set': {
+            'title': video_info['title'],
+            'thumbnail': video_info.get('thumbnail'),
+            'channel': video_info.get('channel'),
+            'duration': video_info.get('duration'),
+            'updated_at': datetime.utcnow(),
+        }}
+
+    def get_page(self, user_id, before=None, page_size=None):
+        """Return {'items': [...], 'next_cursor': ...} for results older than ``before``
+
+        ``before`` is a ``next_cursor`` from an earlier page. Cursors are
+        JSON-safe dicts so they can be kept in a dcc.Store; ``next_cursor``
+        is None on the last page.
+        """
+        page_size = page_size or self.page_size
+        match = {'user_id': user_id}
+        if before is not None:
+            last_id = ObjectId(before['id'])
+            match['$or'] = [
+                {'timestamp': {'$lt': before['timestamp']}},
+                {'timestamp': before['timestamp'], '_id': {'$lt': last_id}},
+            ]
+
+        pipeline = [
+            {'$match': match},
+            {'$sort': {'timestamp': -1, '_id': -1}},
+            # One extra row tells us whether there is an older page
+            {'$limit': page_size + 1},
+            {'$project': HISTORY_PROJECTION},
+            # Only the rows of this page are joined, each by _id
+            {'$lookup': {
+                'from': 'videos',
+                'localField': 'video_id',
+                'foreignField': '_id',
+                'as': 'video'
+            }},
+            {'$project': {
+                'quiz_id': 1,
+                'video_id': 1,
+                'score': 1,
+                'total': 1,
+                'timestamp': 1,
+                'title': {'$arrayElemAt': ['$video.title', 0]},
+            }},
+        ]
+        items = list(self.db.quiz_results.aggregate(pipeline))
+
+        next_cursor = None
+        if len(items) > page_size:
+            items = items[:page_size]
+            next_cursor = {'timestamp': items[-1]['timestamp'], 'id': str(items[-1]['_id'])}
+        for item in items:
+            del item['_id']
+        return {'items': items, 'next_cursor': next_cursor}
@@ -0,0 +1,247 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pymongo.errors import PyMongoError
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once it has been cancelled"""
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity"""
+
+
+class Job:
+    """State of a single background job"""
+
+    def __init__(self, publish=None):
+        self.id = uuid.uuid4().hex
+        self.status = 'queued'
+        self.progress = 0.0
+        self.message = 'Waiting for a free worker...'
+        self.result = None
+        self.error = None
+        self.partial = []
+        self.created_at = time.time()
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+        # Called with the changed fields so other processes can see them
+        self._publish = publish
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def update(self, progress=None, message=None):
+        """Report progress from inside the job; aborts it if cancelled"""
+        if self.cancelled:
+            raise JobCancelled()
+        if progress is not None:
+            self.progress = max(0.0, min(1.0, progress))
+        if message is not None:
+            self.message = message
+        if self._publish:
+            self._publish(self, {'progress': self.progress, 'message': self.message})
+
+    def add_partial(self, item):
+        """Publish an intermediate result before the job finishes"""
+        if self.cancelled:
+            raise JobCancelled()
+        self.partial.append(item)
+        if self._publish:
+            self._publish(self, {'progress': self.progress, 'message': self.message}, partial=item)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'partial': list(self.partial),
+        }
+
+
+class JobManager:
+    """Runs jobs on a local thread pool with a bounded queue.
+
+    ``submit`` raises QueueFullError instead of queueing without limit, so a
+    burst of requests gets an immediate "busy" answer rather than timing out.
+
+    A job runs in the process that submitted it. With a ``collection``, its
+    state is also mirrored to MongoDB, so ``get`` and ``cancel`` work from
+    any web worker. A cancel from another worker is picked up at the job's
+    next progress update.
+    """
+
+    def __init__(self, max_workers=2, max_pending=8, retention=600, collection=None, max_runtime=3600):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention = retention
+        self.collection = collection
+        self.max_runtime = max_runtime
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._executor = None
+        self._pid = None
+        self._indexes_created = False
+
+    @property
+    def executor(self):
+        # Worker threads do not survive a fork, so build the pool per process
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+            self._pid = os.getpid()
+        return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue ``fn(job, *args, **kwargs)`` and return the job ID"""
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError('Too many jobs are already queued')
+
+        self._prune()
+        job = Job(publish=self._publish if self.collection is not None else None)
+        try:
+            if self.collection is not None:
+                self._ensure_indexes()
+                self.collection.insert_one({
+                    '_id': job.id,
+                    **self._fields(job),
+                    'partial': [],
+                    'cancel_requested': False,
+                    'expires_at': datetime.utcnow() + timedelta(seconds=self.max_runtime + self.retention),
+                })
+            with self._lock:
+                self._jobs[job.id] = job
+            self.executor.submit(self._run, job, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            self._slots.release()
+            raise
+        return job.id
+
+    def get(self, job_id):
+        """Return a snapshot of a job, or None if unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self.collection is None or not job_id:
+            return None
+
+        doc = self.collection.find_one({'_id': job_id})
+        if doc is None:
+            return None
+        return {
+            'id': doc['_id'],
+            'status': doc['status'],
+            'progress': doc['progress'],
+            'message': doc['message'],
+            'result': doc.get('result'),
+            'error': doc.get('error'),
+            'partial': doc.get('partial', []),
+        }
+
+    def cancel(self, job_id):
+        """Ask a job to stop; queued jobs never start"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            if self.collection is None or not job_id:
+                return False
+            # Running in another worker, which sees the flag at its next update
+            result = self.collection.update_one(
+                {'_id': job_id, 'status': {'$in': ['queued', 'running']}},
+                {'$set': {'cancel_requested': True, 'message': 'Cancelling...'}}
+            )
+            return result.modified_count > 0
+        if job.status in ('done', 'failed', 'cancelled'):
+            return False
+        job._cancel_event.set()
+        job.message = 'Cancelling...'
+        if self.collection is not None:
+            self._publish(job, {'message': job.message})
+        return True
+
+    def stats(self):
+        """Return job counts by status"""
+        counts = {}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def _run(self, job, fn, args, kwargs):
+        try:
+            if job.cancelled:
+                raise JobCancelled()
+            job.status = 'running'
+            job.message = 'Starting...'
+            if self.collection is not None:
+                self._publish(job, self._fields(job))
+            result = fn(job, *args, **kwargs)
+            if job.cancelled:
+                raise JobCancelled()
+            job.result = result
+            job.progress = 1.0
+            job.status = 'done'
+        except JobCancelled:
+            job.status = 'cancelled'
+            job.message = 'Cancelled'
+        except Exception as e:
+            # A cancelled job may surface as whatever error the work raised
+            if job.cancelled:
+                job.status = 'cancelled'
+                job.message = 'Cancelled'
+            else:
+                job.status = 'failed'
+                job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            if self.collection is not None:
+                self._publish(job, {
+                    **self._fields(job),
+                    'result': job.result,
+                    'error': job.error,
+                    'expires_at': datetime.utcnow() + timedelta(seconds=self.retention),
+                })
+            self._slots.release()
+
+    @staticmethod
+    def _fields(job):
+        return {'status': job.status, 'progress': job.progress, 'message': job.message}
+
+    def _publish(self, job, fields, partial=None):
+        """Mirror job state to MongoDB and pick up cancels sent from other workers"""
+        update = {'$set': fields}
+        if partial is not None:
+            update['$push'] = {'partial': partial}
+        try:
+            doc = self.collection.find_one_and_update(
+                {'_id': job.id}, update, projection={'cancel_requested': 1})
+        except PyMongoError:
+            # The job itself is fine; other workers just see older progress
+            return
+        if doc and doc.get('cancel_requested'):
+            job._cancel_event.set()
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def _ensure_indexes(self):
+        if self._indexes_created:
+            return
+        self.collection.create_index('expires_at', expireAfterSeconds=0)
+        self._indexes_created = True
@@ -0,0 +1,210 @@
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING, ReplaceOne, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+GLOBAL_BOARD = 'global'
+
+
+def _entry_order(entry):
+    # Best value first, earlier achievers win ties
+    return -entry['value'], entry['timestamp']
+
+
+def video_board(video_id):
+    return f'video:{video_id}'
+
+
+class LeaderboardService:
+    """Precomputed top-K leaderboards.
+
+    Every board is one document in ``leaderboards`` holding its top ``size``
+    entries, sorted, so reading a board is a single O(K) ``find_one``. A
+    board is rewritten whole with a compare-and-set on its ``version``, so
+    readers never see it half-updated and concurrent writers retry. Per-video boards rank
+    each user's best score percentage on that video; the global board ranks
+    total correct answers.
+
+    ``leaderboard_entries`` holds every user's value on every board. Only a
+    value that improves is pushed to the board document. A user's rank is
+    their position on the board document if they are in the top K, else
+    the number of entries above theirs, counted on the (board, value) index.
+    """
+
+    def __init__(self, db, size=10):
+        self.db = db
+        self.boards = db.leaderboards
+        self.entries = db.leaderboard_entries
+        self.size = size
+        self._indexes_created = False
+
+    def record_result(self, user_id, username, video_id, score, score_pct, timestamp):
+        """Update the video's board and the global board with one quiz result"""
+        self._ensure_indexes()
+        entry = {'user_id': user_id, 'username': username, 'timestamp': timestamp}
+
+        # Per-video: only a new personal best changes anything
+        board = video_board(video_id)
+        try:
+            result = self.entries.update_one(
+                {'board': board, 'user_id': user_id, 'value': {'$lt': score_pct}},
+                {'$set': dict(entry, value=score_pct)},
+                upsert=True
+            )
+            improved = result.matched_count or result.upserted_id is not None
+        except DuplicateKeyError:
+            # The user already has an equal or better score on this video
+            improved = False
+        if improved:
+            self._push(board, dict(entry, value=score_pct))
+
+        # Global: points only ever grow
+        doc = self.entries.find_one_and_update(
+            {'board': GLOBAL_BOARD, 'user_id': user_id},
+            {'$inc': {'value': score}, '$set': entry},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self._push(GLOBAL_BOARD, dict(entry, value=doc['value']))
+
+    def get_board(self, board):
+        """Return the top entries of a board, best first"""
+        doc = self.boards.find_one({'_id': board}, {'entries': 1})
+        return doc['entries'] if doc else []
+
+    def get_rank(self, board, user_id):
+        """Return {'rank', 'value'} for a user on a board, or None if they have no entry"""
+        # Most lookups are for users on the board document, which is one small read
+        for position, entry in enumerate(self.get_board(board), start=1):
+            if entry['user_id'] == user_id:
+                return {'rank': position, 'value': entry['value']}
+        mine = self.entries.find_one({'board': board, 'user_id': user_id}, {'value': 1})
+        if mine is None:
+            return None
+        # Counted on the (board, value) index: O(rank) index keys, no documents
+        better = self.entries.count_documents({'board': board, 'value': {'$gt': mine['value']}})
+        return {'rank': better + 1, 'value': mine['value']}
+
+    def rebuild(self, batch_size=500):
+        """Recompute all entries and boards from quiz_results; returns the number of boards
+
+        Everything is built in side collections that are renamed over the
+        live ones at the end, so the leaderboards stay readable meanwhile.
+        """
+        self._ensure_indexes()
+        new_entries = self.db[f'{self.entries.name}_rebuild']
+        new_boards = self.db[f'{self.boards.name}_rebuild']
+        # Left over from an interrupted rebuild
+        new_entries.drop()
+        new_boards.drop()
+        self._create_entry_indexes(new_entries)
+
+        score_pct = {'$ifNull': ['$score_pct', {'$multiply': [100, {'$divide': ['$score', '$total']}]}]}
+        video_bests = self.db.quiz_results.aggregate([
+            {'$match': {'user_id': {'$ne': None}, 'total': {'$gt': 0}}},
+            {'$project': {'video_id': 1, 'user_id': 1, 'timestamp': 1, 'score_pct': score_pct}},
+            {'$sort': {'video_id': 1, 'score_pct': -1, 'timestamp': 1}},
+            {'$group': {
+                '_id': {'video_id': '$video_id', 'user_id': '$user_id'},
+                'value': {'$first': '$score_pct'},
+                'timestamp': {'$first': '$timestamp'},
+            }},
+        ], allowDiskUse=True)
+        totals = self.db.quiz_results.aggregate([
+            {'$match': {'user_id': {'$ne': None}}},
+            {'$group': {'_id': '$user_id', 'value': {'$sum': '$score'}, 'timestamp': {'$max': '$timestamp'}}},
+        ], allowDiskUse=True)
+
+        boards = set()
+        batch = []
+        for doc in video_bests:
+            board = video_board(doc['_id']['video_id'])
+            boards.add(board)
+            batch.append({'board': board, 'user_id': doc['_id']['user_id'],
+                          'value': round(doc['value'], 1), 'timestamp': doc['timestamp']})
+            if len(batch) >= batch_size:
+                self._write_entries(new_entries, batch)
+                batch = []
+        for doc in totals:
+            boards.add(GLOBAL_BOARD)
+            batch.append({'board': GLOBAL_BOARD, 'user_id': doc['_id'], 'value': doc['value'],
+                          'timestamp': doc['timestamp']})
+            if len(batch) >= batch_size:
+                self._write_entries(new_entries, batch)
+                batch = []
+        if batch:
+            self._write_entries(new_entries, batch)
+
+        # Each board's top K comes straight off the (board, value) index
+        projection = {'_id': 0, 'user_id': 1, 'username': 1, 'value': 1, 'timestamp': 1}
+        for board in boards:
+            top = list(new_entries.find({'board': board}, projection)
+                       .sort([('value', DESCENDING), ('timestamp', ASCENDING)])
+                       .limit(self.size))
+            new_boards.insert_one({'_id': board, 'entries': top})
+
+        if not boards:
+            self.entries.delete_many({})
+            self.boards.delete_many({})
+            return 0
+        new_entries.rename(self.entries.name, dropTarget=True)
+        new_boards.rename(self.boards.name, dropTarget=True)
+        return len(boards)
+
+    def _push(self, board, entry):
+        """Put entry on the board in place of the user's old entry, if it is better"""
+        while True:
+            doc = self.boards.find_one({'_id': board})
+            if doc is None:
+                try:
+                    self.boards.insert_one({'_id': board, 'entries': [entry], 'version': 1})
+                    return
+                except DuplicateKeyError:
+                    continue
+
+            mine = next((old for old in doc['entries'] if old['user_id'] == entry['user_id']), None)
+            if mine is not None and mine['value'] >= entry['value']:
+                # A concurrent write already put an equal or better value there
+                return
+            entries = [old for old in doc['entries'] if old['user_id'] != entry['user_id']] + [entry]
+            entries.sort(key=_entry_order)
+            entries = entries[:self.size]
+            if mine is None and entry not in entries:
+                return
+
+            # Old boards have no version; a None filter matches the missing field
+            version = doc.get('version')
+            result = self.boards.update_one(
+                {'_id': board, 'version': version},
+                {'$set': {'entries': entries, 'version': (version or 0) + 1}}
+            )
+            if result.matched_count:
+                return
+
+    def _write_entries(self, collection, entries):
+        """Attach usernames (one query per batch) and insert entries"""
+        object_ids = []
+        for entry in entries:
+            try:
+                object_ids.append(ObjectId(entry['user_id']))
+            except (InvalidId, TypeError):
+                pass
+        usernames = {str(user['_id']): user['username']
+                     for user in self.db.users.find({'_id': {'$in': object_ids}}, {'username': 1})}
+
+        requests = []
+        for entry in entries:
+            entry['username'] = usernames.get(entry['user_id'])
+            requests.append(ReplaceOne({'board': entry['board'], 'user_id': entry['user_id']}, entry, upsert=True))
+        collection.bulk_write(requests, ordered=False)
+
+    def _ensure_indexes(self):
+        if self._indexes_created:
+            return
+        self._create_entry_indexes(self.entries)
+        self._indexes_created = True
+
+    @staticmethod
+    def _create_entry_indexes(collection):
+        collection.create_index([('board', ASCENDING), ('user_id', ASCENDING)], unique=True)
+        collection.create_index([('board', ASCENDING), ('value', DESCENDING), ('timestamp', ASCENDING)])
@@ -0,0 +1,196 @@
+import bisect
+import random
+import re
+import numpy as np
+from utils.transcript_preprocessing import STOPWORDS, WORD_PATTERN, clean_segments, split_sentences
+
+# Sentences outside this range make poor questions
+MIN_SENTENCE_WORDS = 6
+MAX_SENTENCE_WORDS = 45
+MIN_TERM_LENGTH = 4
+
+# Distractors are drawn from this many of the most salient terms
+DISTRACTOR_POOL = 40
+
+
+class LocalQuizGenerator:
+    """Builds quiz questions straight from a transcript, without an LLM.
+
+    Sentences and terms are ranked with TF-IDF (each sentence is a document),
+    computed on sparse (sentence, term) pairs with NumPy so a two-hour
+    transcript takes milliseconds. The best sentence in each stretch of the
+    video becomes a question about its most salient term, and the other
+    salient terms serve as distractors.
+    """
+
+    def __init__(self, seed=None):
+        self.seed = seed
+
+    def generate(self, transcript, question_type="multiple_choice", num_questions=5):
+        """Return up to num_questions question dicts"""
+        sentences, starts = self._sentences(transcript)
+        if not sentences or num_questions <= 0:
+            return []
+
+        rng = random.Random(self.seed if self.seed is not None else ' '.join(sentences[:3]))
+        vocabulary, sentence_scores, term_salience, pair_sentences, pair_terms = self._rank(sentences)
+        if not vocabulary:
+            return []
+
+        chosen = self._pick_sentences(sentences, sentence_scores, pair_sentences, num_questions)
+        pool = [vocabulary[i] for i in np.argsort(-term_salience)[:DISTRACTOR_POOL]]
+
+        questions = []
+        for index in chosen:
+            # The sentence's most salient term is what the question asks about
+            lo, hi = np.searchsorted(pair_sentences, [index, index + 1])
+            terms = pair_terms[lo:hi]
+            if len(terms) == 0:
+                continue
+            answer = vocabulary[terms[np.argmax(term_salience[terms])]]
+            distractors = self._distractors(answer, pool, rng)
+            question = self._build_question(sentences[index], answer, distractors, question_type, rng)
+            if question:
+                question['segment_start'] = starts[index]
+                questions.append(question)
+        return questions
+
+    def _sentences(self, transcript):
+        """Split the cleaned transcript into sentences with their start times"""
+        segments = clean_segments(transcript)
+        offsets = []
+        pieces = []
+        position = 0
+        for segment in segments:
+            offsets.append(position)
+            pieces.append(segment['text'])
+            position += len(segment['text']) + 1
+        text = ' '.join(pieces)
+
+        sentences = []
+        starts = []
+        cursor = 0
+        for sentence in split_sentences(text):
+            found = text.find(sentence, cursor)
+            if found < 0:
+                found = cursor
+            cursor = found + len(sentence)
+            segment_index = max(0, bisect.bisect_right(offsets, found) - 1)
+            sentences.append(sentence)
+            starts.append(segments[segment_index]['start'])
+        return sentences, starts
+
+    def _rank(self, sentences):
+        """TF-IDF over (sentence, term) pairs; returns per-sentence and per-term scores"""
+        term_ids = {}
+        vocabulary = []
+        sentence_index = []
+        term_index = []
+        lengths = np.zeros(len(sentences))
+
+        for i, sentence in enumerate(sentences):
+            words = WORD_PATTERN.findall(sentence.lower())
+            lengths[i] = len(words)
+            for word in words:
+                if len(word) < MIN_TERM_LENGTH or word in STOPWORDS or word.isdigit():
+                    continue
+                term = term_ids.get(word)
+                if term is None:
+                    term = len(vocabulary)
+                    term_ids[word] = term
+                    vocabulary.append(word)
+                sentence_index.append(i)
+                term_index.append(term)
+
+        if not vocabulary:
+            return [], None, None, None, None
+
+        num_sentences = len(sentences)
+        num_terms = len(vocabulary)
+        keys = np.asarray(sentence_index, dtype=np.int64) * num_terms + np.asarray(term_index, dtype=np.int64)
+        pairs, counts = np.unique(keys, return_counts=True)
+        pair_sentences = pairs // num_terms
+        pair_terms = pairs % num_terms
+
+        document_frequency = np.bincount(pair_terms, minlength=num_terms)
+        idf = np.log((1 + num_sentences) / (1 + document_frequency)) + 1
+        weights = counts * idf[pair_terms]
+
+        sentence_scores = np.bincount(pair_sentences, weights=weights, minlength=num_sentences)
+        sentence_scores /= np.sqrt(np.maximum(lengths, 1))
+        # Salience rewards terms that recur across the video, not one-off words
+        term_salience = np.bincount(pair_terms, weights=weights, minlength=num_terms) * np.log1p(document_frequency)
+        return vocabulary, sentence_scores, term_salience, pair_sentences, pair_terms
+
+    def _pick_sentences(self, sentences, scores, pair_sentences, num_questions):
+        """Best usable sentence from each of num_questions equal stretches of the video"""
+        word_counts = np.array([len(sentence.split()) for sentence in sentences])
+        has_terms = np.zeros(len(sentences), dtype=bool)
+        has_terms[pair_sentences] = True
+        usable = has_terms & (word_counts >= MIN_SENTENCE_WORDS) & (word_counts <= MAX_SENTENCE_WORDS)
+        if not usable.any():
+            usable = has_terms
+
+        masked = np.where(usable, scores, -np.inf)
+        buckets = np.array_split(np.arange(len(sentences)), num_questions)
+
+        chosen = []
+        for bucket in buckets:
+            if len(bucket) and np.isfinite(masked[bucket]).any():
+                chosen.append(int(bucket[np.argmax(masked[bucket])]))
+
+        # Short transcripts: top up with the best remaining sentences
+        if len(chosen) < num_questions:
+            taken = set(chosen)
+            for index in np.argsort(-masked):
+                if len(chosen) >= num_questions or not np.isfinite(masked[index]):
+                    break
+                if int(index) not in taken:
+                    chosen.append(int(index))
+                    taken.add(int(index))
+            chosen.sort()
+        return chosen
+
+    def _distractors(self, answer, pool, rng, count=3):
+        candidates = [term for term in pool if term != answer and answer not in term and term not in answer]
+        # Terms of similar length look more plausible next to the answer
+        candidates.sort(key=lambda term: (abs(len(term) - len(answer)), rng.random()))
+        return candidates[:count]
+
+    def _build_question(self, sentence, answer, distractors, question_type, rng):
+        pattern = re.compile(rf"\b{re.escape(answer)}\b", re.IGNORECASE)
+        if not pattern.search(sentence):
+            return None
+        explanation = f'The video says: "{sentence}"'
+
+        if question_type == 'true_false':
+            if distractors and rng.random() < 0.5:
+                statement = pattern.sub(distractors[0], sentence)
+                correct = 'False'
+            else:
+                statement = sentence
+                correct = 'True'
+            return {
+                'question': f'True or false: "{statement}"',
+                'options': ['True', 'False'],
+                'correct_answer': correct,
+                'explanation': explanation
+            }
+
+        cloze = pattern.sub('_____', sentence)
+        if question_type == 'short_answer':
+            return {
+                'question': f"Fill in the blank: {cloze}",
+                'options': [],
+                'correct_answer': answer,
+                'explanation': explanation
+            }
+
+        options = [answer, *distractors]
+        rng.shuffle(options)
+        return {
+            'question': f"Fill in the blank: {cloze}",
+            'options': options,
+            'correct_answer': answer,
+            'explanation': explanation
+        }
@@ -0,0 +1,85 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+def _generate(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _check(pwhash, password):
+    return check_password_hash(pwhash, password)
+
+
+def hash_params(method):
+    """The parameter prefix werkzeug writes for a method, e.g. 'scrypt' -> 'scrypt:32768:8:1'"""
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        defaults = ['32768', '8', '1']
+    elif name == 'pbkdf2':
+        defaults = ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        return method
+    return ':'.join([name] + args + defaults[len(args):])
+
+
+class HasherBusyError(Exception):
+    """Raised when every hashing slot stays taken for too long"""
+
+
+class PasswordHasher:
+    """Runs werkzeug's password KDFs in a dedicated process pool.
+
+    Hashing is deliberately slow and holds the GIL, so doing it on a request
+    thread stalls every other callback in the worker. ``max_concurrent``
+    caps how many hashes may be queued or running at once.
+    """
+
+    def __init__(self, method='scrypt', max_workers=None, max_concurrent=None, wait_timeout=5):
+        self.method = method
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.wait_timeout = wait_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent or self.max_workers * 4)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._current_params = hash_params(method)
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # spawn: forking a threaded web worker can deadlock the child
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def hash(self, password):
+        """Hash a password with the configured method"""
+        return self._run(_generate, password, self.method)
+
+    def verify(self, pwhash, password):
+        """Check a password against a stored hash"""
+        return self._run(_check, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """Whether a stored hash was made with other parameters than ours"""
+        return pwhash.split('$', 1)[0] != self._current_params
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            raise HasherBusyError('Password hashing is overloaded')
+        try:
+            return self.executor.submit(fn, *args).result()
+        except BrokenProcessPool:
+            with self._lock:
+                self._executor = None
+            return fn(*args)
+        finally:
+            self._slots.release()
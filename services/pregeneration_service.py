@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from services.quota_manager import QuotaExceededError
+from services.youtube_service import MAX_IDS_PER_REQUEST
+
+
+class Checkpoint:
+    """Quizzes a pre-generation run has finished, saved after every video.
+
+    Entries are keyed by video, question type and number of questions, so
+    running again with other quiz settings does not skip videos that only
+    have quizzes for the old ones. The file is rewritten through a temporary
+    file and ``os.replace`` so an interrupted run never leaves it
+    half-written. Failed videos are kept for the report but are tried again
+    on the next run.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.done = set()
+        self.failed = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            self.done = set(data.get('done', []))
+            self.failed = data.get('failed', {})
+
+    @staticmethod
+    def _key(video_id, question_type, num_questions):
+        return f"{video_id}:{question_type}:{num_questions}"
+
+    def is_done(self, video_id, quiz_specs):
+        return all(self._key(video_id, *spec) in self.done for spec in quiz_specs)
+
+    def mark_done(self, video_id, quiz_specs):
+        with self._lock:
+            self.done.update(self._key(video_id, *spec) for spec in quiz_specs)
+            self.failed.pop(video_id, None)
+            self._save()
+
+    def mark_failed(self, video_id, error):
+        with self._lock:
+            self.failed[video_id] = error
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'done': sorted(self.done), 'failed': self.failed}, f)
+        os.replace(tmp_path, self.path)
+
+
+class Pregenerator:
+    """Fills the caches the web app reads before anyone asks for a quiz.
+
+    Metadata is fetched MAX_IDS_PER_REQUEST videos per API call and written
+    to the API cache and the ``videos`` collection. Each video's transcript
+    and quizzes are then produced on a thread pool. Quizzes go through
+    ``QuizService.generate_quiz``, which stores them in the quiz cache under
+    the same key the app's ``generate_quiz`` callback looks up.
+
+    Pass a YouTubeService built with a ``transcript_limiter`` (a
+    SlidingWindowLimiter) to limit transcript fetches; cached transcripts
+    are not rate limited.
+    """
+
+    def __init__(self, youtube_service, quiz_service, history_service, checkpoint=None,
+                 workers=4, quiz_specs=(('multiple_choice', 5),), log=print):
+        self.youtube_service = youtube_service
+        self.quiz_service = quiz_service
+        self.history_service = history_service
+        self.checkpoint = checkpoint or Checkpoint()
+        self.workers = workers
+        self.quiz_specs = list(quiz_specs)
+        self.log = log
+        self.quota_exhausted = False
+        self._lock = threading.Lock()
+
+    def resolve(self, video_ids=(), playlist_ids=(), channel_ids=(), max_per_source=None):
+        """Expand playlists and channels into one ordered list of unique video IDs
+
+        If the quota runs out, the videos resolved so far are returned and
+        the next ``run`` reports ``quota_exhausted``.
+        """
+        resolved = list(video_ids)
+        sources = [(self.youtube_service.get_playlist_video_ids, playlist_id) for playlist_id in playlist_ids]
+        sources += [(self.youtube_service.get_channel_video_ids, channel_id) for channel_id in channel_ids]
+        for get_video_ids, source_id in sources:
+            try:
+                resolved.extend(get_video_ids(source_id, max_results=max_per_source))
+            except QuotaExceededError as e:
+                self.log(f"Stopped listing playlists and channels at {source_id}: {e}")
+                self.quota_exhausted = True
+                break
+        return list(dict.fromkeys(resolved))
+
+    def run(self, video_ids):
+        """Pre-generate everything for video_ids and return a throughput report"""
+        started = time.perf_counter()
+        report = {
+            'videos': len(video_ids),
+            'skipped': 0,
+            'done': 0,
+            'failed': 0,
+            'quizzes_generated': 0,
+            'quizzes_cached': 0,
+            'questions': 0,
+            'quota_exhausted': self.quota_exhausted,
+        }
+
+        pending = [video_id for video_id in video_ids if not self.checkpoint.is_done(video_id, self.quiz_specs)]
+        report['skipped'] = len(video_ids) - len(pending)
+
+        available = []
+        metadata_started = time.perf_counter()
+        for start in range(0, len(pending), MAX_IDS_PER_REQUEST):
+            batch = pending[start:start + MAX_IDS_PER_REQUEST]
+            try:
+                videos = self.youtube_service.get_videos_info(batch)
+            except QuotaExceededError as e:
+                # The rest stay out of the checkpoint and are picked up by the next run
+                self.log(f"Stopped fetching metadata after {start} videos: {e}")
+                report['quota_exhausted'] = True
+                break
+            self.history_service.record_videos(videos.values())
+            for video_id in batch:
+                if video_id in videos:
+                    available.append(video_id)
+                else:
+                    self.checkpoint.mark_failed(video_id, "Video not found")
+                    report['failed'] += 1
+        report['metadata_seconds'] = time.perf_counter() - metadata_started
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self._process, video_id, report): video_id for video_id in available}
+            for count, future in enumerate(as_completed(futures), 1):
+                video_id = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    self.checkpoint.mark_failed(video_id, str(e))
+                    report['failed'] += 1
+                    self.log(f"[{count}/{len(available)}] {video_id}: failed: {e}")
+                else:
+                    self.checkpoint.mark_done(video_id, self.quiz_specs)
+                    report['done'] += 1
+                    self.log(f"[{count}/{len(available)}] {video_id}: done")
+
+        report['seconds'] = time.perf_counter() - started
+        report['videos_per_minute'] = report['done'] * 60 / report['seconds'] if report['seconds'] else 0.0
+        return report
+
+    def _process(self, video_id, report):
+        transcript = self.youtube_service.get_transcript(video_id)
+
+        for question_type, num_questions in self.quiz_specs:
+            quiz = self.quiz_service.generate_quiz(
+                transcript=transcript,
+                question_type=question_type,
+                num_questions=num_questions,
+                video_id=video_id
+            )
+            if not quiz['success']:
+                raise Exception(quiz['error'])
+            # Not cached, so the next run asks the model again
+            fallback = (quiz.get('preprocessing') or {}).get('fallback_questions')
+            if fallback:
+                raise Exception(f"{fallback} {question_type} questions came from the local fallback generator")
+
+            with self._lock:
+                report['quizzes_cached' if quiz.get('cached') else 'quizzes_generated'] += 1
+                report['questions'] += len(quiz['questions'])
@@ -0,0 +1,81 @@
+import hashlib
+import json
+from datetime import datetime
+from pymongo import DESCENDING
+from pymongo.errors import PyMongoError
+
+
+class QuizCache:
+    """Content-addressed store of generated question sets in MongoDB.
+
+    Keys hash the transcript text, the prompt version and the generation
+    parameters, so a changed transcript or prompt never matches an old entry.
+    Several variants can be stored per key.
+    """
+
+    def __init__(self, collection, prompt_version, max_variants=5):
+        self.collection = collection
+        self.prompt_version = prompt_version
+        self.max_variants = max_variants
+        self._indexes_created = False
+
+    def make_key(self, transcript, **params):
+        """Hash a transcript and generation parameters into a cache key"""
+        digest = hashlib.sha256()
+        digest.update(self.prompt_version.encode('utf-8'))
+        digest.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+        for segment in transcript:
+            digest.update(b'\x1f')
+            digest.update(segment['text'].encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key, random_variant=False):
+        """Return a stored question set for a key, or None"""
+        try:
+            if random_variant:
+                docs = list(self.collection.aggregate([
+                    {'$match': {'key': key}},
+                    {'$sample': {'size': 1}},
+                ]))
+                doc = docs[0] if docs else None
+            else:
+                doc = self.collection.find_one({'key': key}, sort=[('created_at', DESCENDING)])
+        except PyMongoError:
+            return None
+        return doc['questions'] if doc else None
+
+    def add(self, key, questions, video_id=None, params=None):
+        """Store a new variant, dropping the oldest beyond max_variants"""
+        try:
+            self._ensure_indexes()
+            self.collection.insert_one({
+                'key': key,
+                'prompt_version': self.prompt_version,
+                'video_id': video_id,
+                'params': params or {},
+                'questions': questions,
+                'created_at': datetime.now(),
+            })
+
+            stale = self.collection.find(
+                {'key': key}, {'_id': 1}
+            ).sort('created_at', DESCENDING).skip(self.max_variants)
+            stale_ids = [doc['_id'] for doc in stale]
+            if stale_ids:
+                self.collection.delete_many({'_id': {'$in': stale_ids}})
+        except PyMongoError:
+            pass
+
+    def purge_stale_versions(self):
+        """Delete every entry generated with a different prompt version"""
+        try:
+            return self.collection.delete_many({'prompt_version': {'$ne': self.prompt_version}}).deleted_count
+        except PyMongoError:
+            return 0
+
+    def _ensure_indexes(self):
+        if self._indexes_created:
+            return
+        self.collection.create_index([('key', 1), ('created_at', DESCENDING)])
+        self.collection.create_index('prompt_version')
+        self._indexes_created = True
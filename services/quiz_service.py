@@ -1,57 +1,135 @@
-import requests
+import hashlib
 import json
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from services.local_quiz_generator import LocalQuizGenerator
+from utils.chunking import allocate_questions, chunk_transcript, estimate_tokens
+from utils.http_client import HttpClient
+from utils.json_stream import JsonArrayItemParser
+from utils.transcript_preprocessing import clean_segments, select_key_sentences
+
+PROMPT_TEMPLATE = """
+Generate {num_questions} {question_type} questions based on the following section of a video transcript.
+For each question, provide:
+- The question text
+- 4 possible answers (for multiple choice)
+- The correct answer
+- A brief explanation of why this is the correct answer
+
+The questions should test understanding of key concepts in the transcript.
+The difficulty should vary from easy to moderate.
+
+Respond with JSON only, in the form:
+{{"questions": [{{"question": "...", "options": ["..."], "correct_answer": "...", "explanation": "..."}}]}}
+
+Transcript:
+{transcript_text}
+"""
+
+# Bump when the generation logic changes in a way the template text doesn't show
+PROMPT_TEMPLATE_REVISION = 4
+PROMPT_VERSION = f"{PROMPT_TEMPLATE_REVISION}-{hashlib.sha256(PROMPT_TEMPLATE.encode('utf-8')).hexdigest()[:12]}"
+
+# Rough output budget per generated question
+TOKENS_PER_QUESTION = 250
+
+# Never condense a chunk's prompt below this many transcript tokens
+MIN_CHUNK_PROMPT_TOKENS = 200
+
 
 class QuizService:
-    def __init__(self, api_key):
+    def __init__(self, api_key, http=None, use_mock=True, timeout=60,
+                 chunk_tokens=3000, max_parallel_chunks=8, cache=None, token_budget=None,
+                 local_generator=None, llm_deadline=None, model='quiz-generator'):
         self.api_key = api_key
         self.base_url = "https://api.deepseek.com/v1"  # Example API endpoint
+        self.http = http or HttpClient()
+        self.use_mock = use_mock
+        self.timeout = timeout
+        self.chunk_tokens = chunk_tokens
+        self.max_parallel_chunks = max_parallel_chunks
+        self.cache = cache
+        self.token_budget = token_budget
+        self.local_generator = local_generator or LocalQuizGenerator()
+        self.llm_deadline = llm_deadline
+        self.model = model
+    
+    def find_cached_quiz(self, transcript, question_type="multiple_choice", num_questions=5, video_id=None,
+                         random_variant=False):
+        """Return a stored quiz for these inputs, or None"""
+        if self.cache is None:
+            return None
+        
+        key = self._cache_key(transcript, question_type, num_questions)
+        questions = self.cache.get(key, random_variant=random_variant)
+        # Empty quizzes may have been stored by older versions
+        if not questions:
+            return None
+        
+        return {
+            'success': True,
+            'video_id': video_id,
+            'timestamp': datetime.now().isoformat(),
+            'questions': questions,
+            'cached': True
+        }
     
-    def generate_quiz(self, transcript, question_type="multiple_choice", num_questions=5, video_id=None):
-        """Generate quiz questions from transcript"""
+    def generate_quiz(self, transcript, question_type="multiple_choice", num_questions=5, video_id=None,
+                      progress=None, cache_mode='reuse', on_question=None):
+        """Generate quiz questions from transcript
+        
+        ``progress`` is an optional ``progress(fraction, message)`` callback and
+        ``on_question`` is called with each question as soon as it is ready.
+        
+        ``cache_mode`` is 'reuse' (latest stored quiz), 'random' (random stored
+        variant) or 'new' (always generate and store another variant).
+        """
         try:
-            # Prepare the transcript text
-            transcript_text = " ".join([t['text'] for t in transcript])
+            if cache_mode != 'new':
+                cached = self.find_cached_quiz(transcript, question_type, num_questions, video_id,
+                                               random_variant=cache_mode == 'random')
+                if cached is not None:
+                    return cached
             
-            # Call the DeepSeek API (example implementation)
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            }
+            questions = []
+            stats = {}
+            for question in self.stream_questions(transcript, question_type, num_questions, progress, stats):
+                questions.append(question)
+                if on_question:
+                    on_question(question)
             
-            payload = {
-                'model': 'quiz-generator',
-                'prompt': f"""
-                Generate {num_questions} {question_type} questions based on the following video transcript.
-                For each question, provide:
-                - The question text
-                - 4 possible answers (for multiple choice)
-                - The correct answer
-                - A brief explanation of why this is the correct answer
-                
-                The questions should test understanding of key concepts in the transcript.
-                The difficulty should vary from easy to moderate.
-                
-                Transcript:
-                {transcript_text}
-                """,
-                'max_tokens': 2000,
-                'temperature': 0.7
-            }
+            if not questions:
+                return {
+                    'success': False,
+                    'error': "This video's transcript has too little text to make a quiz from"
+                }
+            if len(questions) < num_questions:
+                stats['missing_questions'] = num_questions - len(questions)
             
-            # In a real implementation, this would call the actual API
-            # response = requests.post(f"{self.base_url}/completions", headers=headers, json=payload)
-            # response.raise_for_status()
-            # data = response.json()
+            # Questions arrive in the order chunks finish; the quiz follows the video
+            questions.sort(key=lambda question: question.get('segment_start', 0))
             
-            # For demo purposes, we'll use mock data
-            data = self._mock_quiz_generation(transcript_text, num_questions, question_type)
+            # A quiz patched up by the fallback is only good until the model recovers
+            if self.cache is not None and not stats.get('fallback_questions'):
+                self.cache.add(
+                    self._cache_key(transcript, question_type, num_questions),
+                    questions,
+                    video_id=video_id,
+                    params={'question_type': question_type, 'num_questions': num_questions,
+                            'engine': self.engine, 'model': None if self.use_mock else self.model}
+                )
             
             return {
                 'success': True,
                 'video_id': video_id,
                 'timestamp': datetime.now().isoformat(),
-                'questions': data['questions']
+                'questions': questions,
+                'cached': False,
+                'preprocessing': stats
             }
         except Exception as e:
             return {
@@ -59,40 +137,220 @@ class QuizService:
                 'error': str(e)
             }
     
-    def _mock_quiz_generation(self, transcript, num_questions, question_type):
-        """Mock quiz generation for demo purposes"""
-        # This would be replaced with actual API calls in production
-        sample_questions = [
-            {
-                'question': 'What was the main topic discussed in the video?',
-                'options': [
-                    'History of the internet',
-                    'Machine learning algorithms',
-                    'Quantum computing basics',
-                    'How to bake a cake'
-                ],
-                'correct_answer': 'Quantum computing basics',
-                'explanation': 'The transcript focused primarily on introducing quantum computing concepts.'
-            },
-            {
-                'question': 'What is a qubit in quantum computing?',
-                'options': [
-                    'A type of quantum bike',
-                    'The basic unit of quantum information',
-                    'A quantum measurement tool',
-                    'A quantum encryption method'
-                ],
-                'correct_answer': 'The basic unit of quantum information',
-                'explanation': 'The transcript explained that qubits are the fundamental units of quantum information, analogous to bits in classical computing.'
-            }
-        ]
+    def stream_questions(self, transcript, question_type="multiple_choice", num_questions=5, progress=None,
+                         stats=None):
+        """Yield quiz questions one by one as they are generated
+        
+        The transcript is cleaned of caption noise and rolling duplicates, then
+        split into time-aligned chunks whose responses are streamed from the
+        model in parallel (map). Each chunk's first ``quota`` unique questions
+        are yielded the moment they are parsed; any shortfall is filled from
+        the spare candidates once every chunk is done (reduce).
+        
+        Chunks whose request fails, or that are still short when
+        ``llm_deadline`` seconds have passed, are topped up by the local
+        extractive generator. A transcript too short for ``num_questions``
+        distinct questions gives a shorter quiz; questions are never repeated.
+        
+        If given, ``stats`` is filled with prompt token counts before and
+        after preprocessing, and ``fallback_questions``: how many questions
+        the local generator supplied in place of the model.
+        """
+        if progress:
+            progress(0.1, 'Preparing transcript...')
+        
+        work = self._prepare_chunks(transcript, num_questions, stats)
+        if not work:
+            return
         
-        # Repeat sample questions to reach the requested number
-        questions = []
-        for i in range(num_questions):
-            q_idx = i % len(sample_questions)
-            question = sample_questions[q_idx].copy()
-            question['question'] = f"{i+1}. {question['question']}"
-            questions.append(question)
+        if progress:
+            progress(0.2, 'Generating questions...')
         
-        return {'questions': questions}
+        remaining = {chunk['index']: quota for chunk, quota in work}
+        results = queue.Queue()
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=min(len(work), self.max_parallel_chunks))
+        try:
+            for chunk, quota in work:
+                executor.submit(self._produce_chunk_questions, chunk, quota, question_type, results, stop)
+            
+            seen = set()
+            leftovers = []
+            yielded = 0
+            finished = 0
+            deadline = time.monotonic() + self.llm_deadline if self.llm_deadline else None
+            while finished < len(work) and yielded < num_questions:
+                try:
+                    timeout = max(0.0, deadline - time.monotonic()) if deadline else None
+                    kind, chunk_index, payload = results.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if kind in ('done', 'error'):
+                    finished += 1
+                    if progress:
+                        progress(0.2 + 0.7 * finished / len(work),
+                                 f'Generated questions for {finished} of {len(work)} sections...')
+                    continue
+                
+                key = self._question_key(payload)
+                if remaining[chunk_index] > 0 and key not in seen:
+                    seen.add(key)
+                    remaining[chunk_index] -= 1
+                    yielded += 1
+                    yield payload
+                else:
+                    leftovers.append(payload)
+            
+            for question in leftovers:
+                if yielded >= num_questions:
+                    break
+                key = self._question_key(question)
+                if key not in seen:
+                    seen.add(key)
+                    yielded += 1
+                    yield question
+            
+            # Chunks the model failed on or was too slow for
+            fallback = 0
+            for chunk, quota in work:
+                if yielded >= num_questions or remaining[chunk['index']] <= 0:
+                    continue
+                for question in self._local_chunk_questions(chunk, quota + 1, question_type):
+                    key = self._question_key(question)
+                    if yielded >= num_questions or remaining[chunk['index']] <= 0:
+                        break
+                    if key not in seen:
+                        seen.add(key)
+                        remaining[chunk['index']] -= 1
+                        yielded += 1
+                        if not self.use_mock:
+                            fallback += 1
+                            if stats is not None:
+                                stats['fallback_questions'] = fallback
+                        yield question
+        finally:
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _prepare_chunks(self, transcript, num_questions, stats=None):
+        """Preprocess and chunk a transcript; returns (chunk, quota) pairs to generate"""
+        segments = clean_segments(transcript)
+        chunks = chunk_transcript(segments, self.chunk_tokens)
+        quotas = allocate_questions(chunks, num_questions)
+        work = [(chunk, quota) for chunk, quota in zip(chunks, quotas) if quota > 0]
+        
+        # Condense the chunks we will send so the prompts fit the token budget
+        if self.token_budget and work:
+            work_tokens = sum(chunk['tokens'] for chunk, quota in work)
+            for chunk, quota in work:
+                budget = max(MIN_CHUNK_PROMPT_TOKENS, self.token_budget * chunk['tokens'] // work_tokens)
+                chunk['text'] = select_key_sentences(chunk['text'], budget)
+        
+        if stats is not None:
+            raw_tokens = sum(estimate_tokens(segment['text']) + 1 for segment in transcript)
+            sent_tokens = sum(estimate_tokens(chunk['text']) for chunk, quota in work)
+            stats.update({
+                'raw_tokens': raw_tokens,
+                'cleaned_tokens': sum(chunk['tokens'] for chunk in chunks),
+                'prompt_tokens': sent_tokens,
+                'tokens_saved': max(0, raw_tokens - sent_tokens),
+            })
+        return work
+    
+    @property
+    def engine(self):
+        """Which generator produces this service's questions"""
+        return 'local' if self.use_mock else 'deepseek'
+    
+    def _cache_key(self, transcript, question_type, num_questions):
+        # Output from different engines or models is never interchangeable
+        return self.cache.make_key(
+            transcript,
+            question_type=question_type,
+            num_questions=num_questions,
+            chunk_tokens=self.chunk_tokens,
+            token_budget=self.token_budget,
+            engine=self.engine,
+            model=None if self.use_mock else self.model
+        )
+    
+    def _produce_chunk_questions(self, chunk, quota, question_type, results, stop):
+        """Worker: push one chunk's questions onto the results queue"""
+        try:
+            for question in self._stream_chunk_questions(chunk, quota, question_type):
+                if stop.is_set():
+                    return
+                question = dict(question)
+                question['segment_start'] = chunk['start']
+                results.put(('question', chunk['index'], question))
+        except Exception as e:
+            results.put(('error', chunk['index'], e))
+            return
+        results.put(('done', chunk['index'], None))
+    
+    def _stream_chunk_questions(self, chunk, quota, question_type):
+        """Yield candidate questions about one chunk as the model produces them"""
+        # One spare candidate per chunk gives the merge step room to drop duplicates
+        num_candidates = quota + 1
+        
+        if self.use_mock:
+            # No model configured: build the questions from the transcript itself
+            yield from self._local_chunk_questions(chunk, num_candidates, question_type)
+            return
+        
+        # Call the DeepSeek API (example implementation)
+        headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        }
+        
+        payload = {
+            'model': self.model,
+            'prompt': PROMPT_TEMPLATE.format(
+                num_questions=num_candidates,
+                question_type=question_type,
+                transcript_text=chunk['text']
+            ),
+            'max_tokens': TOKENS_PER_QUESTION * num_candidates,
+            'temperature': 0.7,
+            'stream': True
+        }
+        
+        response = self.http.post(
+            f"{self.base_url}/completions",
+            headers=headers,
+            json=payload,
+            timeout=(self.http.connect_timeout, self.timeout),
+            stream=True,
+            endpoint='deepseek.completions'
+        )
+        try:
+            response.raise_for_status()
+            parser = JsonArrayItemParser()
+            for text in self._iter_completion_text(response):
+                yield from parser.feed(text)
+        finally:
+            response.close()
+    
+    def _local_chunk_questions(self, chunk, num_questions, question_type):
+        """Questions about one chunk from the local extractive generator"""
+        segment = {'text': chunk['text'], 'start': chunk['start'], 'duration': chunk['end'] - chunk['start']}
+        return self.local_generator.generate([segment], question_type, num_questions)
+    
+    @staticmethod
+    def _iter_completion_text(response):
+        """Yield text deltas from a server-sent-events completion stream"""
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith('data:'):
+                continue
+            data = line[len('data:'):].strip()
+            if data == '[DONE]':
+                break
+            event = json.loads(data)
+            choice = (event.get('choices') or [{}])[0]
+            yield choice.get('text') or (choice.get('delta') or {}).get('content') or ''
+    
+    @staticmethod
+    def _question_key(question):
+        text = re.sub(r'^\d+\.\s*', '', question['question'])
+        return ' '.join(text.lower().split())
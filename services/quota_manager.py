@@ -0,0 +1,153 @@
+import time
+from datetime import datetime, timedelta, timezone
+from utils.sqlite import SQLiteConnections
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+except Exception:
+    # No tz database available; Pacific Standard Time is close enough
+    QUOTA_TIMEZONE = timezone(timedelta(hours=-8))
+
+# Data API units charged per request, by HttpClient endpoint name
+ENDPOINT_COSTS = {
+    'youtube.search': 100,
+    'youtube.videos': 1,
+    'youtube.playlistItems': 1,
+    'youtube.channels': 1,
+}
+
+# Endpoints refused once usage passes the degrade threshold
+DEGRADED_ENDPOINTS = ('youtube.search',)
+
+
+class QuotaExceededError(Exception):
+    """Raised when a Data API call would go over the quota budget"""
+
+
+class QuotaManager:
+    """Tracks YouTube Data API quota across all worker processes.
+
+    Usage lives in the SQLite file of the API cache, so every worker and the
+    ``manage.py`` commands spend from the same daily budget. A call is
+    allowed only if:
+
+    * today's usage plus its cost stays within ``daily_limit``. Past
+      ``degrade_at`` of the limit, the DEGRADED_ENDPOINTS (search) are
+      refused so that the cheap lookups keep working until the end of the
+      day. The day follows Pacific Time, like the quota itself.
+    * a token bucket of ``burst`` units has enough left. The bucket refills
+      at ``daily_limit`` per day, so a burst of traffic in the morning cannot
+      spend the whole day's quota.
+
+    Each check is a single short write transaction on the shared file.
+    """
+
+    def __init__(self, path, daily_limit=10000, degrade_at=0.8, burst=2000, costs=None, retention_days=90):
+        self.path = path
+        self.daily_limit = daily_limit
+        self.degrade_at = degrade_at
+        self.burst = burst
+        self.refill_rate = daily_limit / 86400.0
+        self.costs = dict(ENDPOINT_COSTS, **(costs or {}))
+        self._connections = SQLiteConnections(path)
+
+        conn = self._connections.get()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS api_quota_usage ('
+            ' day TEXT NOT NULL,'
+            ' endpoint TEXT NOT NULL,'
+            ' units INTEGER NOT NULL DEFAULT 0,'
+            ' calls INTEGER NOT NULL DEFAULT 0,'
+            ' denied INTEGER NOT NULL DEFAULT 0,'
+            ' PRIMARY KEY (day, endpoint))'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS api_quota_bucket ('
+            ' id INTEGER PRIMARY KEY CHECK (id = 0),'
+            ' tokens REAL NOT NULL,'
+            ' updated_at REAL NOT NULL)'
+        )
+        conn.execute('DELETE FROM api_quota_usage WHERE day < ?',
+                     (self._day(time.time() - retention_days * 86400),))
+        conn.commit()
+
+    @staticmethod
+    def _day(timestamp):
+        return datetime.fromtimestamp(timestamp, QUOTA_TIMEZONE).strftime('%Y-%m-%d')
+
+    def acquire(self, endpoint):
+        """Charge one call to endpoint, or raise QuotaExceededError"""
+        cost = self.costs.get(endpoint, 1)
+        now = time.time()
+        day = self._day(now)
+
+        conn = self._connections.get()
+        # IMMEDIATE takes the write lock up front so two workers can't both spend the last units
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            used = conn.execute('SELECT COALESCE(SUM(units), 0) FROM api_quota_usage WHERE day = ?',
+                                (day,)).fetchone()[0]
+            row = conn.execute('SELECT tokens, updated_at FROM api_quota_bucket WHERE id = 0').fetchone()
+            tokens = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.refill_rate)
+
+            limit = self.daily_limit
+            if endpoint in DEGRADED_ENDPOINTS:
+                limit *= self.degrade_at
+
+            if used + cost > limit:
+                error = ("YouTube search is limited for the rest of the day to stay within our API quota. "
+                         "Searches you or others have run recently still work.")
+                if endpoint not in DEGRADED_ENDPOINTS:
+                    error = "Today's YouTube API quota is used up. Please try again tomorrow."
+            elif tokens < cost:
+                error = "YouTube is getting a lot of requests from us right now. Please try again in a few minutes."
+            else:
+                error = None
+                tokens -= cost
+
+            conn.execute('INSERT OR REPLACE INTO api_quota_bucket (id, tokens, updated_at) VALUES (0, ?, ?)',
+                         (tokens, now))
+            conn.execute(
+                'INSERT INTO api_quota_usage (day, endpoint, units, calls, denied) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (day, endpoint) DO UPDATE SET units = units + excluded.units, '
+                'calls = calls + excluded.calls, denied = denied + excluded.denied',
+                (day, endpoint, 0 if error else cost, 0 if error else 1, 1 if error else 0)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        if error:
+            raise QuotaExceededError(error)
+
+    def usage(self, day=None):
+        """Return {endpoint: {'units', 'calls', 'denied'}} for a day (default today)"""
+        rows = self._connections.get().execute(
+            'SELECT endpoint, units, calls, denied FROM api_quota_usage WHERE day = ?',
+            (day or self._day(time.time()),)
+        ).fetchall()
+        return {endpoint: {'units': units, 'calls': calls, 'denied': denied}
+                for endpoint, units, calls, denied in rows}
+
+    def history(self, days=7):
+        """Return {day: usage} for the last ``days`` days, oldest first"""
+        since = self._day(time.time() - (days - 1) * 86400)
+        rows = self._connections.get().execute(
+            'SELECT day, endpoint, units, calls, denied FROM api_quota_usage WHERE day >= ? ORDER BY day',
+            (since,)
+        ).fetchall()
+        history = {}
+        for day, endpoint, units, calls, denied in rows:
+            history.setdefault(day, {})[endpoint] = {'units': units, 'calls': calls, 'denied': denied}
+        return history
+
+    def mode(self):
+        """'normal', 'degraded' (search refused) or 'exhausted' for today"""
+        used = sum(entry['units'] for entry in self.usage().values())
+        if used >= self.daily_limit:
+            return 'exhausted'
+        if used >= self.daily_limit * self.degrade_at:
+            return 'degraded'
+        return 'normal'
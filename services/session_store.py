@@ -0,0 +1,64 @@
+import secrets
+from datetime import datetime, timedelta
+from pymongo.errors import PyMongoError
+from utils.ttl_cache import TTLCache
+
+
+class SessionStore:
+    """Server-side storage for large per-session payloads.
+
+    Callbacks keep only the opaque handle returned by ``put`` in their
+    dcc.Store, so transcripts and quizzes (including correct answers) stay
+    on the server. Payloads live in MongoDB with a TTL and each session keeps
+    only the latest payload per name. Handles are never reused, so a small
+    per-process cache in front of MongoDB can't serve stale data.
+    """
+
+    def __init__(self, collection, ttl=6 * 3600, local_cache_size=256):
+        self.collection = collection
+        self.ttl = ttl
+        self._local = TTLCache(maxsize=local_cache_size, ttl=ttl)
+        self._indexes_created = False
+
+    def put(self, session_id, name, data):
+        """Store a payload and return its handle"""
+        handle = secrets.token_urlsafe(16)
+        self._ensure_indexes()
+        self.collection.insert_one({
+            '_id': handle,
+            'session_id': session_id,
+            'name': name,
+            'data': data,
+            'expires_at': datetime.utcnow() + timedelta(seconds=self.ttl),
+        })
+        self._local.set(handle, (session_id, data))
+
+        # Older payloads of the same kind are no longer reachable from the page
+        try:
+            self.collection.delete_many({'session_id': session_id, 'name': name, '_id': {'$ne': handle}})
+        except PyMongoError:
+            pass
+        return handle
+
+    def get(self, handle, session_id):
+        """Return the payload for a handle owned by session_id, or None"""
+        if not handle:
+            return None
+
+        cached = self._local.get(handle)
+        if cached is None:
+            doc = self.collection.find_one({'_id': handle, 'expires_at': {'$gt': datetime.utcnow()}})
+            if doc is None:
+                return None
+            cached = (doc['session_id'], doc['data'])
+            self._local.set(handle, cached)
+
+        owner, data = cached
+        return data if owner == session_id else None
+
+    def _ensure_indexes(self):
+        if self._indexes_created:
+            return
+        self.collection.create_index('expires_at', expireAfterSeconds=0)
+        self.collection.create_index([('session_id', 1), ('name', 1)])
+        self._indexes_created = True
@@ -0,0 +1,148 @@
+from datetime import date, timedelta
+from pymongo import ReplaceOne
+
+
+def score_percent(score, total):
+    return round(100.0 * score / total, 1) if total else 0.0
+
+
+class StatsService:
+    """Per-user quiz statistics kept in one ``user_stats`` document per user.
+
+    ``record_result`` folds each new result into the document with atomic
+    update operators, so the profile page is a single ``find_one`` instead
+    of a scan of ``quiz_results``. ``backfill`` rebuilds every document from
+    ``quiz_results`` for data written before the stats existed.
+
+    Days are the date part of the result's ISO timestamp, as stored by
+    ``submit_quiz``.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def record_result(self, user_id, video_id, score, total, timestamp, title=None):
+        """Fold one quiz result into the user's stats"""
+        percent = score_percent(score, total)
+        day = timestamp[:10]
+        video = f'videos.{video_id}'
+
+        update = {
+            '$inc': {
+                'quizzes': 1,
+                'questions': total,
+                'correct': score,
+                f'{video}.attempts': 1,
+            },
+            '$max': {
+                'best_pct': percent,
+                'last_at': timestamp,
+                f'{video}.best_pct': percent,
+            },
+            '$min': {'first_at': timestamp},
+        }
+        if title:
+            update['$set'] = {f'{video}.title': title}
+        self.db.user_stats.update_one({'_id': user_id}, update, upsert=True)
+
+        # The streak depends on the previous active day, so it is computed server-side
+        yesterday = (date.fromisoformat(day) - timedelta(days=1)).isoformat()
+        self.db.user_stats.update_one({'_id': user_id}, [
+            {'$set': {
+                'streak': {'$switch': {
+                    'branches': [
+                        {'case': {'$eq': ['$last_day', day]}, 'then': '$streak'},
+                        {'case': {'$eq': ['$last_day', yesterday]}, 'then': {'$add': ['$streak', 1]}},
+                    ],
+                    'default': 1
+                }},
+                'last_day': {'$max': [{'$ifNull': ['$last_day', day]}, day]},
+            }},
+            {'$set': {'best_streak': {'$max': [{'$ifNull': ['$best_streak', 0]}, '$streak']}}},
+        ])
+
+    def get_stats(self, user_id):
+        """Return the user's stats document, or None if they have no results"""
+        return self.db.user_stats.find_one({'_id': user_id})
+
+    def backfill(self, batch_size=500):
+        """Rebuild all user_stats documents from quiz_results; returns the number written"""
+        pipeline = [
+            {'$match': {'user_id': {'$ne': None}, 'total': {'$gt': 0}}},
+            {'$project': {
+                'user_id': 1,
+                'video_id': 1,
+                'score': 1,
+                'total': 1,
+                'timestamp': 1,
+                'pct': {'$multiply': [100, {'$divide': ['$score', '$total']}]},
+            }},
+            {'$group': {
+                '_id': {'user_id': '$user_id', 'video_id': '$video_id'},
+                'quizzes': {'$sum': 1},
+                'questions': {'$sum': '$total'},
+                'correct': {'$sum': '$score'},
+                'best_pct': {'$max': '$pct'},
+                'first_at': {'$min': '$timestamp'},
+                'last_at': {'$max': '$timestamp'},
+                'days': {'$addToSet': {'$substr': ['$timestamp', 0, 10]}},
+            }},
+            {'$group': {
+                '_id': '$_id.user_id',
+                'quizzes': {'$sum': '$quizzes'},
+                'questions': {'$sum': '$questions'},
+                'correct': {'$sum': '$correct'},
+                'best_pct': {'$max': '$best_pct'},
+                'first_at': {'$min': '$first_at'},
+                'last_at': {'$max': '$last_at'},
+                'days': {'$push': '$days'},
+                'videos': {'$push': {
+                    'k': '$_id.video_id',
+                    'v': {'attempts': '$quizzes', 'best_pct': '$best_pct'},
+                }},
+            }},
+        ]
+
+        written = 0
+        batch = []
+        for doc in self.db.quiz_results.aggregate(pipeline, allowDiskUse=True):
+            days = sorted({day for video_days in doc.pop('days') for day in video_days})
+            doc['streak'], doc['best_streak'] = self._streaks(days)
+            doc['last_day'] = days[-1] if days else None
+            doc['best_pct'] = round(doc['best_pct'], 1)
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                written += self._write_stats(batch)
+                batch = []
+
+        if batch:
+            written += self._write_stats(batch)
+        return written
+
+    def _write_stats(self, docs):
+        """Attach video titles (one query per batch) and replace the stats documents"""
+        video_ids = {video['k'] for doc in docs for video in doc['videos']}
+        titles = {meta['_id']: meta.get('title')
+                  for meta in self.db.videos.find({'_id': {'$in': list(video_ids)}}, {'title': 1})}
+
+        requests = []
+        for doc in docs:
+            doc['videos'] = {
+                video['k']: dict(video['v'], best_pct=round(video['v']['best_pct'], 1), title=titles.get(video['k']))
+                for video in doc['videos']
+            }
+            requests.append(ReplaceOne({'_id': doc['_id']}, doc, upsert=True))
+        self.db.user_stats.bulk_write(requests, ordered=False)
+        return len(requests)
+
+    @staticmethod
+    def _streaks(days):
+        """(streak ending on the last day, longest streak) for sorted ISO dates"""
+        streak = best = 0
+        previous = None
+        for day in days:
+            current = date.fromisoformat(day)
+            streak = streak + 1 if previous and current - previous == timedelta(days=1) else 1
+            best = max(best, streak)
+            previous = current
+        return streak, best
@@ -0,0 +1,144 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pymongo.errors import PyMongoError
+from utils.transcript_codec import decode_transcript, encode_transcript
+
+
+class TranscriptCache:
+    """Two-tier transcript cache: a bounded in-process LRU in front of MongoDB.
+
+    Entries are keyed by (video_id, language). Videos without a transcript are
+    stored as negative entries with a shorter TTL so we stop re-scraping them.
+    MongoDB holds transcripts in the compact encoding from utils.transcript_codec.
+    """
+
+    def __init__(self, collection, max_entries=256, ttl=7 * 24 * 3600, negative_ttl=6 * 3600):
+        self.collection = collection
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._indexes_created = False
+        self._stats = {
+            'hits': 0,
+            'mongo_hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'errors': 0,
+        }
+
+    @staticmethod
+    def _key(video_id, language):
+        return f"{video_id}:{language}"
+
+    def get(self, video_id, language='en'):
+        """Return the cached entry for a video, or None on a miss"""
+        key = self._key(video_id, language)
+        now = datetime.utcnow()
+
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                if entry['expires_at'] > now:
+                    self._local.move_to_end(key)
+                    self._stats['hits'] += 1
+                    if entry.get('unavailable'):
+                        self._stats['negative_hits'] += 1
+                    return entry
+                del self._local[key]
+
+        try:
+            doc = self.collection.find_one({'_id': key, 'expires_at': {'$gt': now}})
+        except PyMongoError:
+            doc = None
+            self._count('errors')
+
+        if doc is None:
+            self._count('misses')
+            return None
+
+        transcript = doc.get('transcript')
+        entry = {
+            'transcript': decode_transcript(transcript) if transcript is not None else None,
+            'unavailable': doc.get('unavailable', False),
+            'error': doc.get('error'),
+            'expires_at': doc['expires_at'],
+        }
+        self._count('mongo_hits')
+        if entry['unavailable']:
+            self._count('negative_hits')
+        self._put_local(key, entry)
+        return entry
+
+    def set(self, video_id, transcript, language='en'):
+        """Cache a successfully fetched transcript"""
+        self._store(video_id, language, {'transcript': transcript, 'unavailable': False, 'error': None}, self.ttl)
+
+    def set_unavailable(self, video_id, error, language='en'):
+        """Remember that a video has no transcript"""
+        self._store(video_id, language, {'transcript': None, 'unavailable': True, 'error': error}, self.negative_ttl)
+
+    def invalidate(self, video_id, language='en'):
+        """Drop a video from both cache tiers"""
+        key = self._key(video_id, language)
+        with self._lock:
+            self._local.pop(key, None)
+        try:
+            self.collection.delete_one({'_id': key})
+        except PyMongoError:
+            self._count('errors')
+
+    def stats(self):
+        """Return hit/miss/eviction counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._local)
+            stats['max_entries'] = self.max_entries
+        return stats
+
+    def _store(self, video_id, language, entry, ttl):
+        key = self._key(video_id, language)
+        now = datetime.utcnow()
+        entry['expires_at'] = now + timedelta(seconds=ttl)
+        self._put_local(key, entry)
+
+        doc = dict(entry)
+        if doc['transcript'] is not None:
+            doc['transcript'] = encode_transcript(doc['transcript'])
+
+        try:
+            self._ensure_indexes()
+            self.collection.replace_one(
+                {'_id': key},
+                {
+                    'video_id': video_id,
+                    'language': language,
+                    'created_at': now,
+                    **doc,
+                },
+                upsert=True
+            )
+        except PyMongoError:
+            self._count('errors')
+
+    def _put_local(self, key, entry):
+        with self._lock:
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def _ensure_indexes(self):
+        if self._indexes_created:
+            return
+        # MongoDB removes expired documents on its own once this index exists
+        self.collection.create_index('expires_at', expireAfterSeconds=0)
+        self._indexes_created = True
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
@@ -1,14 +1,33 @@
 import os
-from youtube_transcript_api import YouTubeTranscriptApi
+from youtube_transcript_api import (
+    YouTubeTranscriptApi,
+    NoTranscriptFound,
+    TranscriptsDisabled,
+    VideoUnavailable,
+)
 from urllib.parse import urlparse, parse_qs
 import isodate
-import requests
 from datetime import timedelta
+from services.quota_manager import QuotaExceededError
+from utils.http_client import HttpClient
+
+# The Data API accepts at most 50 IDs (or results) per request
+MAX_IDS_PER_REQUEST = 50
 
 class YouTubeService:
-    def __init__(self, api_key):
+    def __init__(self, api_key, transcript_cache=None, api_cache=None,
+                 search_ttl=900, video_ttl=24 * 3600, http=None, transcript_limiter=None, quota=None):
         self.api_key = api_key
         self.base_url = "https://www.googleapis.com/youtube/v3"
+        self.http = http or HttpClient()
+        self.transcript_cache = transcript_cache
+        self.api_cache = api_cache
+        self.search_ttl = search_ttl
+        self.video_ttl = video_ttl
+        # Optional object with a blocking wait(), called before each transcript fetch
+        self.transcript_limiter = transcript_limiter
+        # Optional QuotaManager charged before each Data API request
+        self.quota = quota
     
     def search_videos(self, query, max_results=10):
         """Search YouTube videos"""
@@ -21,53 +40,72 @@ class YouTubeService:
             'key': self.api_key
         }
         
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
+        def parse(data):
+            videos = []
+            for item in data.get('items', []):
+                video_id = item['id']['videoId']
+                videos.append({
+                    'id': video_id,
+                    'title': item['snippet']['title'],
+                    'thumbnail': item['snippet']['thumbnails']['medium']['url'],
+                    'channel': item['snippet']['channelTitle'],
+                    'published_at': item['snippet']['publishedAt']
+                })
+            
+            # Get durations for all videos in one batch
+            video_ids = [v['id'] for v in videos]
+            durations = self._get_video_durations(video_ids)
+            
+            for video in videos:
+                video['duration'] = durations.get(video['id'], 'N/A')
+            
+            return videos
         
-        videos = []
-        for item in data.get('items', []):
-            video_id = item['id']['videoId']
-            videos.append({
-                'id': video_id,
-                'title': item['snippet']['title'],
-                'thumbnail': item['snippet']['thumbnails']['medium']['url'],
-                'channel': item['snippet']['channelTitle'],
-                'published_at': item['snippet']['publishedAt']
-            })
-        
-        # Get durations for all videos in one batch
-        video_ids = [v['id'] for v in videos]
-        durations = self._get_video_durations(video_ids)
-        
-        for video in videos:
-            video['duration'] = durations.get(video['id'], 'N/A')
-        
-        return videos
+        cache_key = f"search:{max_results}:{' '.join(query.lower().split())}"
+        return self._cached_get(cache_key, url, params, self.search_ttl, parse, 'youtube.search')
     
     def _get_video_durations(self, video_ids):
         """Get durations for multiple videos"""
+        durations = {}
+        if self.api_cache is not None:
+            cached = self.api_cache.get_many([f"duration:{video_id}" for video_id in video_ids])
+            for key, entry in cached.items():
+                if entry['fresh']:
+                    durations[key.split(':', 1)[1]] = entry['value']
+        
+        # Only ask the API for the videos we don't already know about
+        missing = [video_id for video_id in video_ids if video_id not in durations]
+        if not missing:
+            return durations
+        
         url = f"{self.base_url}/videos"
         params = {
             'part': 'contentDetails',
-            'id': ','.join(video_ids),
+            'id': ','.join(missing),
             'key': self.api_key
         }
         
-        response = requests.get(url, params=params)
+        try:
+            self._charge('youtube.videos')
+            response = self._api_get(url, params=params, endpoint='youtube.videos')
+        except QuotaExceededError:
+            # Search results are still useful without every duration
+            return durations
+        
         response.raise_for_status()
         data = response.json()
         
-        durations = {}
+        fetched = {}
         for item in data.get('items', []):
-            video_id = item['id']
-            duration = isodate.parse_duration(item['contentDetails']['duration'])
-            # Format duration as HH:MM:SS
-            total_seconds = int(duration.total_seconds())
-            hours, remainder = divmod(total_seconds, 3600)
-            minutes, seconds = divmod(remainder, 60)
-            durations[video_id] = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+            fetched[item['id']] = self._format_duration(item['contentDetails']['duration'])
         
+        if self.api_cache is not None:
+            self.api_cache.set_many(
+                {f"duration:{video_id}": duration for video_id, duration in fetched.items()},
+                self.video_ttl
+            )
+        
+        durations.update(fetched)
         return durations
     
     def get_video_info(self, video_id):
@@ -79,36 +117,186 @@ class YouTubeService:
             'key': self.api_key
         }
         
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
+        def parse(data):
+            if not data.get('items'):
+                raise ValueError("Video not found")
+            return self._parse_video(data['items'][0])
         
-        if not data.get('items'):
-            raise ValueError("Video not found")
+        info = self._cached_get(f"video:{video_id}", url, params, self.video_ttl, parse, 'youtube.videos')
+        if self.api_cache is not None:
+            self.api_cache.set(f"duration:{video_id}", info['duration'], self.video_ttl)
+        return info
+    
+    def get_videos_info(self, video_ids):
+        """Get detailed info for many videos, MAX_IDS_PER_REQUEST per API call
         
-        item = data['items'][0]
-        duration = isodate.parse_duration(item['contentDetails']['duration'])
-        total_seconds = int(duration.total_seconds())
-        hours, remainder = divmod(total_seconds, 3600)
-        minutes, seconds = divmod(remainder, 60)
+        Returns a dict keyed by video ID. Videos the API does not know about
+        (deleted, private) are left out.
+        """
+        video_ids = list(dict.fromkeys(video_ids))
+        videos = {}
+        if self.api_cache is not None:
+            cached = self.api_cache.get_many([f"video:{video_id}" for video_id in video_ids])
+            for key, entry in cached.items():
+                if entry['fresh']:
+                    videos[key.split(':', 1)[1]] = entry['value']
+        
+        missing = [video_id for video_id in video_ids if video_id not in videos]
+        for start in range(0, len(missing), MAX_IDS_PER_REQUEST):
+            params = {
+                'part': 'snippet,contentDetails',
+                'id': ','.join(missing[start:start + MAX_IDS_PER_REQUEST]),
+                'key': self.api_key
+            }
+            self._charge('youtube.videos')
+            response = self._api_get(f"{self.base_url}/videos", params=params, endpoint='youtube.videos')
+            response.raise_for_status()
+            
+            fetched = {}
+            for item in response.json().get('items', []):
+                fetched[item['id']] = self._parse_video(item)
+            
+            if self.api_cache is not None:
+                self.api_cache.set_many({f"video:{video_id}": info for video_id, info in fetched.items()},
+                                        self.video_ttl)
+                self.api_cache.set_many({f"duration:{video_id}": info['duration']
+                                         for video_id, info in fetched.items()}, self.video_ttl)
+            videos.update(fetched)
+        
+        return {video_id: videos[video_id] for video_id in video_ids if video_id in videos}
+    
+    def get_playlist_video_ids(self, playlist_id, max_results=None):
+        """List the video IDs in a playlist, in playlist order"""
+        video_ids = []
+        params = {
+            'part': 'contentDetails',
+            'playlistId': playlist_id,
+            'maxResults': MAX_IDS_PER_REQUEST,
+            'key': self.api_key
+        }
+        while max_results is None or len(video_ids) < max_results:
+            self._charge('youtube.playlistItems')
+            response = self._api_get(f"{self.base_url}/playlistItems", params=params,
+                                    endpoint='youtube.playlistItems')
+            response.raise_for_status()
+            data = response.json()
+            
+            video_ids.extend(item['contentDetails']['videoId'] for item in data.get('items', []))
+            if not data.get('nextPageToken'):
+                break
+            params['pageToken'] = data['nextPageToken']
         
+        return video_ids[:max_results]
+    
+    def get_channel_video_ids(self, channel_id, max_results=None):
+        """List a channel's uploads, newest first"""
+        url = f"{self.base_url}/channels"
+        params = {
+            'part': 'contentDetails',
+            'id': channel_id,
+            'key': self.api_key
+        }
+        
+        def parse(data):
+            if not data.get('items'):
+                raise ValueError("Channel not found")
+            return data['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+        
+        # Every channel's uploads are also a playlist
+        uploads = self._cached_get(f"channel_uploads:{channel_id}", url, params, self.video_ttl, parse,
+                                   'youtube.channels')
+        return self.get_playlist_video_ids(uploads, max_results=max_results)
+    
+    def _parse_video(self, item):
         return {
-            'id': video_id,
+            'id': item['id'],
             'title': item['snippet']['title'],
             'description': item['snippet']['description'],
             'thumbnail': item['snippet']['thumbnails']['high']['url'],
             'channel': item['snippet']['channelTitle'],
-            'duration': f"{hours:02d}:{minutes:02d}:{seconds:02d}",
+            'duration': self._format_duration(item['contentDetails']['duration']),
             'published_at': item['snippet']['publishedAt']
         }
     
-    def get_transcript(self, video_id):
+    def _cached_get(self, cache_key, url, params, ttl, parse, endpoint):
+        """GET a Data API resource through the shared cache.
+        
+        Fresh entries are returned as-is. Stale entries are revalidated with
+        If-None-Match, so an unchanged resource costs a 304 and no parsing.
+        """
+        cached = self.api_cache.get(cache_key) if self.api_cache is not None else None
+        if cached is not None and cached['fresh']:
+            return cached['value']
+        
+        headers = {}
+        if cached is not None and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        
+        try:
+            self._charge(endpoint)
+            response = self._api_get(url, params=params, headers=headers, endpoint=endpoint)
+            if cached is not None and response.status_code == 304:
+                self.api_cache.touch(cache_key, ttl)
+                return cached['value']
+            
+            response.raise_for_status()
+            data = response.json()
+            # Parsing may spend quota too, e.g. on search result durations
+            value = parse(data)
+        except QuotaExceededError:
+            # Out of budget, now or on a retry: an out-of-date answer beats no answer
+            if cached is not None:
+                return cached['value']
+            raise
+        
+        if self.api_cache is not None:
+            etag = response.headers.get('ETag') or data.get('etag')
+            self.api_cache.set(cache_key, value, ttl, etag=etag)
+        return value
+    
+    def _charge(self, endpoint):
+        """Spend quota for one request; raises QuotaExceededError when over budget"""
+        if self.quota is not None:
+            self.quota.acquire(endpoint)
+    
+    def _api_get(self, url, endpoint, **kwargs):
+        """GET from the Data API; the caller charges the first attempt, retries are charged here"""
+        return self.http.get(url, endpoint=endpoint, before_retry=lambda: self._charge(endpoint), **kwargs)
+    
+    @staticmethod
+    def _format_duration(iso_duration):
+        """Format an ISO 8601 duration as HH:MM:SS"""
+        duration = isodate.parse_duration(iso_duration)
+        total_seconds = int(duration.total_seconds())
+        hours, remainder = divmod(total_seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    
+    def get_transcript(self, video_id, language='en'):
         """Get transcript for a video"""
+        if self.transcript_cache is not None:
+            cached = self.transcript_cache.get(video_id, language)
+            if cached is not None:
+                if cached['unavailable']:
+                    raise Exception(f"Could not retrieve transcript: {cached['error']}")
+                return cached['transcript']
+        
+        if self.transcript_limiter is not None:
+            self.transcript_limiter.wait()
+        
         try:
-            transcript = YouTubeTranscriptApi.get_transcript(video_id)
-            return transcript
+            transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=[language])
+        except (NoTranscriptFound, TranscriptsDisabled, VideoUnavailable) as e:
+            # These are permanent for the video, so remember them
+            if self.transcript_cache is not None:
+                self.transcript_cache.set_unavailable(video_id, str(e), language)
+            raise Exception(f"Could not retrieve transcript: {str(e)}")
         except Exception as e:
             raise Exception(f"Could not retrieve transcript: {str(e)}")
+        
+        if self.transcript_cache is not None:
+            self.transcript_cache.set(video_id, transcript, language)
+        return transcript
     
     def extract_video_id(self, url):
         """Extract video ID from various YouTube URL formats"""
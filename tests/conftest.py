@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+# Settings are read when config.py is imported, so set them before any test imports it
+_workdir = tempfile.mkdtemp(prefix='quiz-tests-')
+os.environ.update({
+    'MONGO_URI': 'mongodb://localhost:27017/?serverSelectionTimeoutMS=200',
+    'MONGO_DB_NAME': 'tests',
+    'SECRET_KEY': 'tests',
+    'API_CACHE_PATH': os.path.join(_workdir, 'api_cache.db'),
+    'LOG_DIR': os.path.join(_workdir, 'logs'),
+    'QUIZ_USE_MOCK': 'True',
+})
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,73 @@
+import app as app_module
+
+# Buttons that only open, close or navigate; handled in assets/clientside.js
+CLIENTSIDE_INPUTS = {'debug-toggle', 'go-to-register', 'go-to-login', 'open-feedback', 'close-feedback'}
+
+# A typical session, as the properties each user interaction changes in the browser
+SESSION = [
+    ('open the login page', [('go-to-login', 'n_clicks')]),
+    ('log in', [('login-button', 'n_clicks')]),
+    ('search', [('search-button', 'n_clicks')]),
+    ('pick a video', [('{"index":["ALL"],"type":"select-video"}', 'n_clicks')]),
+    ('start a quiz', [('generate-quiz', 'n_clicks')]),
+    ('progress update', [('quiz-job-poll', 'n_intervals')]),
+    ('answer a question', [('{"index":["ALL"],"type":"question-answer"}', 'value')]),
+    ('open and close the debug panel', [('debug-toggle', 'n_clicks')]),
+    ('open and close feedback', [('open-feedback', 'n_clicks'), ('close-feedback', 'n_clicks')]),
+    ('submit', [('submit-quiz', 'n_clicks')]),
+]
+
+# Server callbacks each interaction reaches, including callbacks chained through outputs
+EXPECTED_ROUND_TRIPS = {
+    'open the login page': ['display_page'],
+    'log in': ['login', 'display_page'],
+    'search': ['search_videos'],
+    'pick a video': ['select_video'],
+    # A cached quiz is handed straight to the result store
+    'start a quiz': ['generate_quiz', 'show_quiz'],
+    'progress update': ['poll_quiz_job', 'show_quiz'],
+    'answer a question': [],
+    'open and close the debug panel': [],
+    'open and close feedback': [],
+    'submit': ['submit_quiz'],
+}
+
+
+def parse_outputs(key):
+    """Callback map keys list the outputs as ``id.prop`` or ``..id.prop...id.prop..``"""
+    outputs = []
+    for output in key.strip('.').split('...') if key.startswith('..') else [key]:
+        component_id, prop = output.rsplit('.', 1)
+        outputs.append((component_id, prop.split('@')[0]))
+    return outputs
+
+
+def round_trips(dash_app, changed):
+    """Names of the server callbacks that run, in order, after the given properties change"""
+    callbacks = [(entry.get('callback'), [(item['id'], item['property']) for item in entry['inputs']],
+                  parse_outputs(key)) for key, entry in dash_app.callback_map.items()]
+    fired = []
+    pending = list(changed)
+    seen = set()
+    while pending:
+        prop = pending.pop(0)
+        for func, inputs, outputs in callbacks:
+            if prop in inputs and id(outputs) not in seen:
+                seen.add(id(outputs))
+                if func is not None:
+                    fired.append(func.__name__)
+                pending.extend(outputs)
+    return fired
+
+
+def test_typical_session_round_trips():
+    dash_app = app_module.create_app()
+    observed = {name: round_trips(dash_app, changed) for name, changed in SESSION}
+    assert observed == EXPECTED_ROUND_TRIPS
+
+
+def test_ui_only_buttons_never_reach_the_server():
+    dash_app = app_module.create_app()
+    server_inputs = {item['id'] for entry in dash_app.callback_map.values() if entry.get('callback') is not None
+                     for item in entry['inputs']}
+    assert not server_inputs & CLIENTSIDE_INPUTS
@@ -0,0 +1,34 @@
+import os
+
+from benchmarks.run import compare, summarize
+from benchmarks.stubs import StubServer, make_transcript
+from services.api_cache import ApiCache
+from services.youtube_service import YouTubeService
+
+
+def test_summarize():
+    stats = summarize([0.3, 0.1, 0.2, 0.4])
+    assert (stats['runs'], stats['min'], stats['max']) == (4, 0.1, 0.4)
+    assert abs(stats['median'] - 0.25) < 1e-9
+
+
+def test_compare_flags_slowdowns_over_the_threshold():
+    baseline = {'results': {'fast': {'median': 1.0}, 'slow': {'median': 1.0}}}
+    results = {'fast': {'median': 1.1}, 'slow': {'median': 1.5}, 'new': {'median': 1.0}}
+    assert compare(results, baseline, threshold=0.2) == ['slow']
+
+
+def test_generated_transcripts_are_deterministic():
+    assert make_transcript(30) == make_transcript(30)
+    assert make_transcript(30) != make_transcript(30, seed=1)
+
+
+def test_stub_server_plays_the_youtube_api(tmp_path):
+    with StubServer() as stub:
+        youtube = YouTubeService('benchmark', api_cache=ApiCache(os.path.join(tmp_path, 'api_cache.db')))
+        youtube.base_url = f'{stub.url}/youtube/v3'
+        videos = youtube.search_videos('qubits')
+        info = youtube.get_video_info('10min-000001')
+
+    assert videos and all(video['id'] for video in videos)
+    assert info['id'] == '10min-000001'
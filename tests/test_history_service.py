@@ -0,0 +1,30 @@
+import mongomock
+
+from services.database import ensure_indexes
+from services.history_service import HistoryService
+
+
+def test_pages_do_not_skip_results_with_the_same_timestamp():
+    db = mongomock.MongoClient().db
+    ensure_indexes(db)
+    for i in range(7):
+        # Three results share each timestamp
+        db.quiz_results.insert_one({'user_id': 'u1', 'quiz_id': f'q{i}', 'video_id': 'v1', 'score': i, 'total': 10,
+                                    'timestamp': f'2026-01-0{1 + i // 3}T00:00:00'})
+    db.quiz_results.insert_one({'user_id': 'u2', 'quiz_id': 'other', 'video_id': 'v1', 'score': 1, 'total': 10,
+                                'timestamp': '2026-01-02T00:00:00'})
+    service = HistoryService(db, page_size=2)
+
+    seen = []
+    cursor = None
+    while True:
+        page = service.get_page('u1', before=cursor)
+        assert all('_id' not in item for item in page['items'])
+        seen.extend(item['quiz_id'] for item in page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    assert sorted(seen) == [f'q{i}' for i in range(7)]
+    timestamps = [db.quiz_results.find_one({'quiz_id': quiz_id})['timestamp'] for quiz_id in seen]
+    assert timestamps == sorted(timestamps, reverse=True)
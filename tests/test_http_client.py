@@ -0,0 +1,93 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from utils.http_client import CircuitBreaker, HttpClient
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    hits = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _slow(self):
+        type(self).hits += 1
+        time.sleep(0.3)
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_GET = _slow
+    do_POST = _slow
+
+
+@pytest.fixture
+def slow_server():
+    SlowHandler.hits = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def make_client():
+    client = HttpClient(read_timeout=0.05, max_retries=2, failure_threshold=100)
+    client._backoff = lambda attempt, retry_after=None: None
+    return client
+
+
+def test_get_is_retried_after_a_read_timeout(slow_server):
+    with pytest.raises(requests.Timeout):
+        make_client().get(slow_server + '/x')
+    assert SlowHandler.hits == 3
+
+
+def test_post_is_not_resent_after_a_read_timeout(slow_server):
+    with pytest.raises(requests.Timeout):
+        make_client().post(slow_server + '/completions', json={})
+    time.sleep(0.05)
+    assert SlowHandler.hits == 1
+
+
+def test_post_is_retried_when_the_connection_is_refused():
+    client = make_client()
+    attempts = []
+    original = client.session.request
+
+    def counting(*args, **kwargs):
+        attempts.append(1)
+        return original(*args, **kwargs)
+
+    client.session.request = counting
+    # Port 9 on localhost is closed, so the connection is refused before anything is sent
+    with pytest.raises(requests.ConnectionError):
+        client.post('http://127.0.0.1:9/completions', json={})
+    assert len(attempts) == 3
+
+
+def test_half_open_breaker_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import mongomock
+
+from services.job_service import JobManager
+
+
+def wait_for(manager, job_id, statuses, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job and job['status'] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f'job never reached {statuses}: {manager.get(job_id)}')
+
+
+def make_workers():
+    # Two managers on one collection stand in for two web worker processes
+    collection = mongomock.MongoClient().db.quiz_jobs
+    return JobManager(collection=collection), JobManager(collection=collection)
+
+
+def test_another_worker_sees_progress_and_result():
+    owner, other = make_workers()
+    release = threading.Event()
+
+    def work(job):
+        job.update(0.5, 'Halfway')
+        job.add_partial({'question': 'Q1'})
+        release.wait(5)
+        return {'questions': ['Q1']}
+
+    job_id = owner.submit(work)
+    job = wait_for(other, job_id, ('running',))
+    deadline = time.time() + 5
+    while not job['partial'] and time.time() < deadline:
+        job = other.get(job_id)
+    assert job['message'] == 'Halfway'
+    assert job['partial'] == [{'question': 'Q1'}]
+
+    release.set()
+    job = wait_for(other, job_id, ('done',))
+    assert job['result'] == {'questions': ['Q1']}
+
+
+def test_cancel_from_another_worker_stops_the_job():
+    owner, other = make_workers()
+    started = threading.Event()
+
+    def work(job):
+        started.set()
+        while True:
+            job.update(message='Working')
+            time.sleep(0.01)
+
+    job_id = owner.submit(work)
+    started.wait(5)
+    assert other.cancel(job_id)
+    assert wait_for(other, job_id, ('cancelled',))['status'] == 'cancelled'
+
+
+def test_unknown_job_is_none():
+    owner, _ = make_workers()
+    assert owner.get('missing') is None
+    assert JobManager().get('missing') is None
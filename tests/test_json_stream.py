@@ -0,0 +1,34 @@
+import json
+
+from utils.json_stream import JsonArrayItemParser
+
+QUESTIONS = [
+    {'question': 'What is {x}?', 'options': ['a [b]', 'c "d"'], 'correct_answer': 'a [b]',
+     'explanation': 'Braces \\ and "quotes" in strings are not structure'},
+    {'question': 'Nested?', 'options': [], 'correct_answer': '', 'explanation': '', 'meta': {'tags': [{'k': 1}]}},
+]
+
+
+def test_items_are_returned_as_soon_as_they_close():
+    text = json.dumps({'questions': QUESTIONS})
+    first_end = text.index('}, {"question": "Nested') + 1
+
+    parser = JsonArrayItemParser()
+    assert parser.feed(text[:first_end - 1]) == []
+    assert parser.feed(text[first_end - 1:first_end]) == [QUESTIONS[0]]
+    assert parser.feed(text[first_end:]) == [QUESTIONS[1]]
+
+
+def test_any_chunking_gives_the_same_items():
+    text = json.dumps({'questions': QUESTIONS}, indent=2)
+    for size in (1, 3, 7, len(text)):
+        parser = JsonArrayItemParser()
+        items = []
+        for i in range(0, len(text), size):
+            items.extend(parser.feed(text[i:i + size]))
+        assert items == QUESTIONS
+
+
+def test_truncated_output_keeps_the_complete_items():
+    text = json.dumps({'questions': QUESTIONS})
+    assert JsonArrayItemParser().feed(text[:-20]) == [QUESTIONS[0]]
@@ -0,0 +1,77 @@
+import threading
+
+import mongomock
+
+from services.leaderboard_service import GLOBAL_BOARD, LeaderboardService, video_board
+
+
+def make_service(size=2):
+    return LeaderboardService(mongomock.MongoClient().db, size=size)
+
+
+def test_only_personal_bests_reach_the_video_board():
+    service = make_service()
+    service.record_result('u1', 'alice', 'v1', 4, 80.0, '2026-01-01T10:00:00')
+    service.record_result('u1', 'alice', 'v1', 2, 40.0, '2026-01-01T11:00:00')
+
+    assert [(entry['user_id'], entry['value']) for entry in service.get_board(video_board('v1'))] == [('u1', 80.0)]
+    assert service.get_board(GLOBAL_BOARD)[0]['value'] == 6
+
+
+def test_rank_inside_and_outside_the_top_entries():
+    service = make_service(size=2)
+    # Built by rebuild(): mongomock's $push sorts on only one key of a compound $sort
+    for user_id, score in (('u1', 9), ('u2', 7), ('u3', 5)):
+        service.db.quiz_results.insert_one({'user_id': user_id, 'quiz_id': 'q1', 'video_id': 'v1', 'score': score,
+                                            'total': 10, 'score_pct': score * 10.0,
+                                            'timestamp': '2026-01-01T10:00:00'})
+    service.rebuild()
+    board = video_board('v1')
+
+    assert [entry['user_id'] for entry in service.get_board(board)] == ['u1', 'u2']
+    assert service.get_rank(board, 'u2') == {'rank': 2, 'value': 70.0}
+    assert service.get_rank(board, 'u3') == {'rank': 3, 'value': 50.0}
+    assert service.get_rank(board, 'nobody') is None
+
+
+def test_record_result_keeps_the_board_sorted_and_trimmed():
+    service = make_service(size=3)
+    results = [('u1', 60.0, '10:00'), ('u2', 80.0, '10:01'), ('u3', 80.0, '10:02'), ('u4', 40.0, '10:03'),
+               ('u1', 90.0, '10:04'), ('u4', 70.0, '10:05')]
+    for user_id, score_pct, time in results:
+        service.record_result(user_id, user_id, 'v1', 1, score_pct, f'2026-01-01T{time}:00')
+
+    board = service.get_board(video_board('v1'))
+    # Ties go to whoever got there first; u4's 70 does not make the top 3
+    assert [(entry['user_id'], entry['value']) for entry in board] == [('u1', 90.0), ('u2', 80.0), ('u3', 80.0)]
+    assert service.get_rank(video_board('v1'), 'u4') == {'rank': 4, 'value': 70.0}
+
+
+def test_concurrent_results_leave_one_row_per_user():
+    service = make_service(size=5)
+
+    def submit(user_id):
+        for i in range(20):
+            service.record_result(user_id, user_id, 'v1', 1, float(i), f'2026-01-01T10:00:{i:02d}')
+
+    threads = [threading.Thread(target=submit, args=(user_id,)) for user_id in ('u1', 'u1', 'u2')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    user_ids = [entry['user_id'] for entry in service.get_board(GLOBAL_BOARD)]
+    assert sorted(user_ids) == ['u1', 'u2']
+
+
+def test_rebuild_swaps_in_new_boards():
+    service = make_service()
+    service.record_result('ghost', 'ghost', 'v1', 5, 100.0, '2026-01-01T09:00:00')
+    service.db.quiz_results.insert_one({'user_id': 'u1', 'quiz_id': 'q1', 'video_id': 'v1', 'score': 3,
+                                        'total': 5, 'score_pct': 60.0, 'timestamp': '2026-01-01T10:00:00'})
+
+    assert service.rebuild() == 2
+    assert [entry['user_id'] for entry in service.get_board(video_board('v1'))] == ['u1']
+    assert service.get_rank(GLOBAL_BOARD, 'ghost') is None
+    assert not [name for name in service.db.list_collection_names() if name.endswith('_rebuild')]
+    assert len(service.entries.index_information()) == 3
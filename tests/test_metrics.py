@@ -0,0 +1,56 @@
+import os
+
+from utils.metrics import MetricsRegistry
+
+
+def make_registry(directory, store):
+    registry = MetricsRegistry(str(directory))
+    registry.counter('requests_total', 'Requests', ('path',))
+    registry.gauge('queue_depth', 'Queued items', lambda: 3)
+    registry.gauge('quota_used', 'Shared quota', lambda: store['quota'], shared=True)
+    return registry
+
+
+def sample_values(text):
+    return dict(line.rsplit(' ', 1) for line in text.splitlines() if not line.startswith('#'))
+
+
+def test_scrape_sums_the_snapshots_of_all_workers(tmp_path):
+    store = {'quota': 7}
+    registry = make_registry(tmp_path, store)
+    registry.get('requests_total').inc('/')
+
+    pid = os.fork()
+    if pid == 0:
+        # A worker that served two requests and then exited
+        registry.get('requests_total').inc('/', amount=2)
+        registry.get('requests_total').inc('/quiz')
+        registry._write_snapshot(registry._collect())
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    values = sample_values(registry.render())
+    assert values['requests_total{path="/"}'] == '4'
+    assert values['requests_total{path="/quiz"}'] == '1'
+    # Gauges of exited workers are dropped; shared ones are not summed
+    assert values['queue_depth'] == '3'
+    assert values['quota_used'] == '7'
+
+
+def test_without_a_directory_only_this_process_is_reported():
+    registry = MetricsRegistry()
+    registry.counter('requests_total', 'Requests').inc()
+    assert sample_values(registry.render()) == {'requests_total': '1'}
+
+
+def test_a_reused_pid_does_not_overwrite_earlier_totals(tmp_path):
+    store = {'quota': 0}
+    earlier = make_registry(tmp_path, store)
+    earlier.get('requests_total').inc('/', amount=5)
+    earlier._write_snapshot(earlier._collect())
+
+    # A later process that happens to get the same pid
+    later = make_registry(tmp_path, store)
+    later.get('requests_total').inc('/')
+    values = sample_values(later.render())
+    assert values['requests_total{path="/"}'] == '6'
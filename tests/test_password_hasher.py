@@ -0,0 +1,17 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from services.password_hasher import PasswordHasher, hash_params
+
+
+@pytest.mark.parametrize('method', ['scrypt', 'scrypt:16384:8:1', 'pbkdf2', 'pbkdf2:sha512', 'pbkdf2:sha256:1000'])
+def test_hash_params_match_what_werkzeug_writes(method):
+    assert hash_params(method) == generate_password_hash('', method=method).split('$', 1)[0]
+
+
+def test_needs_rehash_does_not_hash():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000')
+    hasher._run = None  # any hashing would fail
+
+    assert not hasher.needs_rehash(generate_password_hash('x', method='pbkdf2:sha256:1000'))
+    assert hasher.needs_rehash(generate_password_hash('x', method='pbkdf2:sha256:2000'))
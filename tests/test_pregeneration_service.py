@@ -0,0 +1,71 @@
+import json
+
+import mongomock
+
+from benchmarks.stubs import make_transcript
+from services.pregeneration_service import Checkpoint, Pregenerator
+from services.quiz_cache import QuizCache
+from services.quiz_service import PROMPT_VERSION, QuizService
+from services.quota_manager import QuotaExceededError
+from utils.http_client import HttpClient
+
+
+class FakeYouTube:
+    def get_videos_info(self, video_ids):
+        return {video_id: {'id': video_id, 'title': video_id} for video_id in video_ids}
+
+    def get_transcript(self, video_id):
+        return make_transcript(40)
+
+
+class FakeHistory:
+    def record_videos(self, videos):
+        pass
+
+
+def make_pregenerator(quiz_service, checkpoint, quiz_specs):
+    return Pregenerator(FakeYouTube(), quiz_service, FakeHistory(), checkpoint=checkpoint, workers=2,
+                        quiz_specs=quiz_specs, log=lambda message: None)
+
+
+def test_checkpoint_is_per_quiz_spec(tmp_path):
+    path = str(tmp_path / 'checkpoint.json')
+    quiz_service = QuizService('key', use_mock=True, cache=QuizCache(mongomock.MongoClient().db.quiz_cache,
+                                                                     PROMPT_VERSION))
+
+    first = make_pregenerator(quiz_service, Checkpoint(path), [('multiple_choice', 3)]).run(['a', 'b'])
+    assert (first['done'], first['skipped']) == (2, 0)
+
+    again = make_pregenerator(quiz_service, Checkpoint(path), [('multiple_choice', 3)]).run(['a', 'b'])
+    assert (again['done'], again['skipped']) == (0, 2)
+
+    other = make_pregenerator(quiz_service, Checkpoint(path), [('true_false', 3)]).run(['a', 'b'])
+    assert (other['done'], other['skipped']) == (2, 0)
+    with open(path) as f:
+        assert len(json.load(f)['done']) == 4
+
+
+def test_fallback_quizzes_are_retried(tmp_path):
+    quiz_service = QuizService('key', use_mock=False, http=HttpClient(max_retries=0))
+    # Nothing listens on port 9, so every question comes from the local fallback
+    quiz_service.base_url = 'http://127.0.0.1:9/v1'
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint.json'))
+
+    report = make_pregenerator(quiz_service, checkpoint, [('multiple_choice', 3)]).run(['a'])
+    assert (report['done'], report['failed']) == (0, 1)
+    assert 'fallback' in checkpoint.failed['a']
+    assert not checkpoint.is_done('a', [('multiple_choice', 3)])
+
+
+def test_resolve_stops_when_the_quota_runs_out():
+    class QuotaLimitedYouTube(FakeYouTube):
+        def get_playlist_video_ids(self, playlist_id, max_results=None):
+            return [f'{playlist_id}-1', f'{playlist_id}-2']
+
+        def get_channel_video_ids(self, channel_id, max_results=None):
+            raise QuotaExceededError("Today's YouTube API quota is used up.")
+
+    pregenerator = Pregenerator(QuotaLimitedYouTube(), None, FakeHistory(), log=lambda message: None)
+    video_ids = pregenerator.resolve(['v'], ['pl'], ['ch'])
+    assert video_ids == ['v', 'pl-1', 'pl-2']
+    assert pregenerator.run([])['quota_exhausted']
@@ -0,0 +1,86 @@
+import mongomock
+
+from benchmarks.stubs import make_transcript
+from components.quiz_components import create_quiz_progress
+from services.quiz_cache import QuizCache
+from services.quiz_service import PROMPT_VERSION, QuizService
+from utils.http_client import HttpClient
+
+
+def make_cache():
+    return QuizCache(mongomock.MongoClient().db.quiz_cache, PROMPT_VERSION)
+
+
+def test_cache_key_depends_on_engine_and_model():
+    transcript = make_transcript(50)
+    cache = make_cache()
+    local = QuizService('key', use_mock=True, cache=cache)
+    deepseek = QuizService('key', use_mock=False, cache=cache)
+    other_model = QuizService('key', use_mock=False, cache=cache, model='another-model')
+
+    keys = {service._cache_key(transcript, 'multiple_choice', 5) for service in (local, deepseek, other_model)}
+    assert len(keys) == 3
+
+
+def test_local_quiz_is_not_served_to_the_llm_engine():
+    transcript = make_transcript(50)
+    cache = make_cache()
+    assert QuizService('key', use_mock=True, cache=cache).generate_quiz(transcript, num_questions=3)['success']
+
+    deepseek = QuizService('key', use_mock=False, cache=cache)
+    assert deepseek.find_cached_quiz(transcript, num_questions=3) is None
+
+
+def test_questions_follow_the_video_whatever_order_chunks_finish_in():
+    service = QuizService('key', use_mock=True, chunk_tokens=200)
+    starts = [0.0, 300.0, 600.0]
+
+    def out_of_order(transcript, question_type, num_questions, progress=None, stats=None):
+        for start in reversed(starts):
+            yield {'question': f'Q at {start}', 'options': [], 'correct_answer': '', 'explanation': '',
+                   'segment_start': start}
+
+    service.stream_questions = out_of_order
+    streamed = []
+    quiz = service.generate_quiz(make_transcript(50), num_questions=3, on_question=streamed.append)
+    assert [question['segment_start'] for question in quiz['questions']] == starts
+
+    # The preview shown while streaming already puts the cards where the quiz will
+    preview = create_quiz_progress(0.9, 'Generating...', streamed).children[1:]
+    assert [card.children[1].children[0].children for card in preview] == \
+        [question['question'] for question in quiz['questions']]
+
+
+def test_fallback_quiz_is_not_cached_when_the_llm_is_unreachable():
+    transcript = make_transcript(50)
+    service = QuizService('key', use_mock=False, cache=make_cache(), http=HttpClient(max_retries=0))
+    # Nothing listens on port 9, so every completion request fails
+    service.base_url = 'http://127.0.0.1:9/v1'
+
+    quiz = service.generate_quiz(transcript, num_questions=3)
+    assert quiz['success'] and len(quiz['questions']) == 3
+    assert quiz['preprocessing']['fallback_questions'] == 3
+
+    again = service.generate_quiz(transcript, num_questions=3)
+    assert again['cached'] is False
+
+
+def test_short_transcript_gives_a_short_quiz_without_repeats():
+    transcript = [{'text': 'A qubit can hold a superposition of zero and one.', 'start': 0.0, 'duration': 4.0}]
+    quiz = QuizService('key', use_mock=True).generate_quiz(transcript, num_questions=5)
+
+    assert quiz['success']
+    keys = [QuizService._question_key(question) for question in quiz['questions']]
+    assert len(keys) == len(set(keys))
+    assert quiz['preprocessing']['missing_questions'] == 5 - len(keys)
+
+
+def test_empty_transcript_fails_and_is_not_cached():
+    cache = make_cache()
+    service = QuizService('key', use_mock=True, cache=cache)
+    transcript = [{'text': '[Music] ♪ um', 'start': 0.0, 'duration': 3.0}]
+
+    quiz = service.generate_quiz(transcript, num_questions=3)
+    assert not quiz['success'] and quiz['error']
+    assert cache.collection.count_documents({}) == 0
+    assert service.find_cached_quiz(transcript, num_questions=3) is None
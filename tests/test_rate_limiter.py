@@ -0,0 +1,49 @@
+import threading
+import time
+
+from utils.rate_limiter import SlidingWindowLimiter, SQLiteSlidingWindowLimiter
+
+
+def test_hit_refuses_events_over_the_limit():
+    limiter = SlidingWindowLimiter(2, window=60)
+    assert limiter.hit('a') and limiter.hit('a')
+    assert not limiter.hit('a')
+    assert limiter.hit('b')
+
+
+def test_wait_spaces_events_out_across_threads():
+    limiter = SlidingWindowLimiter(1, window=0.05)
+    started = time.monotonic()
+
+    def fetch():
+        limiter.wait()
+
+    threads = [threading.Thread(target=fetch) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # The first fetch goes straight through, each of the others waits a window
+    assert time.monotonic() - started >= 0.15
+
+
+def test_sqlite_limiters_on_one_file_share_the_limit(tmp_path):
+    path = str(tmp_path / 'limits.db')
+    # Each stands in for a different worker process
+    first = SQLiteSlidingWindowLimiter(path, 2, window=60, name='login')
+    second = SQLiteSlidingWindowLimiter(path, 2, window=60, name='login')
+    other = SQLiteSlidingWindowLimiter(path, 2, window=60, name='signup')
+
+    assert first.hit('a') and second.hit('a')
+    assert not first.hit('a') and not second.hit('a')
+    assert second.hit('b')
+    assert other.hit('a')
+
+
+def test_sqlite_limiter_frees_slots_as_the_window_slides(tmp_path):
+    limiter = SQLiteSlidingWindowLimiter(str(tmp_path / 'limits.db'), 1, window=0.05)
+    started = time.monotonic()
+    limiter.wait()
+    limiter.wait()
+    assert time.monotonic() - started >= 0.04
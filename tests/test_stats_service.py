@@ -0,0 +1,51 @@
+import mongomock
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from services.database import ensure_indexes, remove_duplicate_results
+from services.stats_service import StatsService
+
+
+def result(quiz_id, score=3):
+    return {'user_id': 'u1', 'quiz_id': quiz_id, 'video_id': 'v1', 'score': score, 'total': 5,
+            'timestamp': '2026-01-01T10:00:00'}
+
+
+def test_a_quiz_is_recorded_once_per_user():
+    db = mongomock.MongoClient().db
+    ensure_indexes(db)
+    db.quiz_results.insert_one(result('q1'))
+    with pytest.raises(DuplicateKeyError):
+        db.quiz_results.insert_one(result('q1', score=5))
+    db.quiz_results.insert_one(result('q2'))
+    db.quiz_results.insert_one(dict(result('q1'), user_id='u2'))
+    assert db.quiz_results.count_documents({}) == 3
+
+
+def test_record_result_folds_results_into_the_user_stats():
+    db = mongomock.MongoClient().db
+    stats = StatsService(db)
+    stats.record_result('u1', 'v1', 3, 5, '2026-01-01T10:00:00', title='Video')
+    stats.record_result('u1', 'v1', 5, 5, '2026-01-02T10:00:00')
+
+    doc = stats.get_stats('u1')
+    assert (doc['quizzes'], doc['questions'], doc['correct']) == (2, 10, 8)
+    assert doc['best_pct'] == 100.0
+    assert doc['videos']['v1'] == {'attempts': 2, 'best_pct': 100.0, 'title': 'Video'}
+    assert (doc['first_at'], doc['last_at']) == ('2026-01-01T10:00:00', '2026-01-02T10:00:00')
+
+
+def test_duplicates_are_removed_before_the_unique_index_is_built():
+    db = mongomock.MongoClient().db
+    db.quiz_results.insert_many([
+        dict(result('q1', score=2), timestamp='2026-01-01T10:00:00'),
+        dict(result('q1', score=5), timestamp='2026-01-01T10:05:00'),
+        dict(result('q1', score=5), timestamp='2026-01-01T10:06:00'),
+        result('q2'),
+    ])
+    with pytest.raises(RuntimeError):
+        ensure_indexes(db)
+
+    assert remove_duplicate_results(db) == 2
+    ensure_indexes(db)
+    assert [doc['score'] for doc in db.quiz_results.find({'quiz_id': 'q1'})] == [2]
@@ -0,0 +1,36 @@
+from bson import BSON
+
+from benchmarks.stubs import make_transcript
+from utils.transcript_codec import decode_transcript, encode_transcript
+
+
+def test_round_trip_is_lossless():
+    transcript = [
+        {'text': 'héllo wörld ♪ 日本語', 'start': 0.1, 'duration': 1 / 3},
+        {'text': '', 'start': 1e-9, 'duration': 0.0},
+        {'text': 'line\nbreak \x00 nul', 'start': 12345.678901234, 'duration': 2.5},
+    ]
+    assert decode_transcript(encode_transcript(transcript)) == transcript
+
+
+def test_round_trip_through_bson():
+    transcript = make_transcript(200)
+    doc = BSON.encode({'transcript': encode_transcript(transcript)}).decode()
+    assert decode_transcript(doc['transcript']) == transcript
+
+
+def test_empty_and_legacy_transcripts():
+    assert decode_transcript(encode_transcript([])) == []
+    legacy = [{'text': 'plain', 'start': 0.0, 'duration': 1.0}]
+    assert decode_transcript(legacy) is legacy
+
+
+def test_encoding_is_smaller_than_plain_documents():
+    transcript = make_transcript(500)
+    assert len(BSON.encode({'t': encode_transcript(transcript)})) * 2 < len(BSON.encode({'t': transcript}))
+
+
+def test_layout_is_the_same_on_every_platform():
+    doc = encode_transcript([{'text': 'ab', 'start': 1.0, 'duration': 0.5}])
+    assert bytes(doc['lengths']) == b'\x02\x00\x00\x00'
+    assert bytes(doc['start']) == b'\x00\x00\x00\x00\x00\x00\xf0\x3f'
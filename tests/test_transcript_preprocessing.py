@@ -0,0 +1,31 @@
+from utils.transcript_preprocessing import clean_segments, normalize_text
+
+
+def segments(*texts):
+    return [{'text': text, 'start': float(i), 'duration': 1.0} for i, text in enumerate(texts)]
+
+
+def test_fillers_and_caption_tags_are_removed():
+    assert normalize_text('[Music] So, um, the answer uh is ♪ (applause) 42') == 'So, the answer is 42'
+    assert normalize_text("It's, you know, really fast") == "It's really fast"
+    assert normalize_text('I mean, it works, you know.') == 'it works.'
+    assert normalize_text('Mm, okay') == 'okay'
+    assert normalize_text('Uh-huh, right') == 'right'
+
+
+def test_content_that_looks_like_filler_is_kept():
+    assert normalize_text('Do you know what a qubit is?') == 'Do you know what a qubit is?'
+    assert normalize_text('The board is 300 mm wide') == 'The board is 300 mm wide'
+    assert normalize_text('I mean it when I say so') == 'I mean it when I say so'
+    assert normalize_text('x[i] plus y[j]') == 'x[i] plus y[j]'
+
+
+def test_rolling_caption_repeats_are_dropped():
+    cleaned = clean_segments(segments('we start with the', 'start with the basics'))
+    assert [segment['text'] for segment in cleaned] == ['we start with the', 'basics']
+    assert [segment['start'] for segment in cleaned] == [0.0, 1.0]
+
+
+def test_single_shared_word_is_not_an_overlap():
+    cleaned = clean_segments(segments('one of the', 'the'))
+    assert [segment['text'] for segment in cleaned] == ['one of the', 'the']
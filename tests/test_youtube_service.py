@@ -0,0 +1,76 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.api_cache import ApiCache
+from services.quota_manager import QuotaExceededError, QuotaManager
+from services.youtube_service import YouTubeService
+from utils.http_client import HttpClient
+
+
+class FlakyApiHandler(BaseHTTPRequestHandler):
+    """Answers 503 to the first ``failures`` requests, then an empty video list"""
+    failures = 0
+    hits = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        type(self).hits += 1
+        body = json.dumps({'items': []}).encode()
+        self.send_response(503 if self.hits <= self.failures else 200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def flaky_api():
+    FlakyApiHandler.hits = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyApiHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def make_service(url, quota):
+    youtube = YouTubeService('key', http=HttpClient(max_retries=3, backoff_base=0, failure_threshold=100),
+                             quota=quota)
+    youtube.base_url = url
+    return youtube
+
+
+def test_every_attempt_is_charged(flaky_api, tmp_path):
+    FlakyApiHandler.failures = 2
+    quota = QuotaManager(str(tmp_path / 'quota.db'))
+
+    assert make_service(flaky_api, quota).get_videos_info(['a']) == {}
+    assert FlakyApiHandler.hits == 3
+    assert quota.usage()['youtube.videos']['units'] == 3
+
+
+def test_retries_stop_when_the_quota_runs_out(flaky_api, tmp_path):
+    FlakyApiHandler.failures = 10
+    quota = QuotaManager(str(tmp_path / 'quota.db'), daily_limit=2)
+
+    with pytest.raises(QuotaExceededError):
+        make_service(flaky_api, quota).get_videos_info(['a'])
+    assert FlakyApiHandler.hits == 2
+
+
+def test_stale_answer_is_served_when_a_retry_runs_out_of_quota(flaky_api, tmp_path):
+    FlakyApiHandler.failures = 10
+    quota = QuotaManager(str(tmp_path / 'quota.db'), daily_limit=2, degrade_at=1, costs={'youtube.search': 1})
+    youtube = make_service(flaky_api, quota)
+    youtube.api_cache = ApiCache(str(tmp_path / 'api_cache.db'))
+    stale = [{'id': 'a', 'title': 'Cached'}]
+    youtube.api_cache.set('search:5:python', stale, ttl=-1)
+
+    assert youtube.search_videos('Python', max_results=5) == stale
+    assert FlakyApiHandler.hits == 2
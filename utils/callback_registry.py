@@ -0,0 +1,27 @@
+class CallbackRegistry:
+    """Collects Dash callbacks at import time and registers them on an app later.
+
+    Use ``@callbacks.callback(...)`` and ``callbacks.clientside_callback(...)``
+    exactly like the ``app.`` versions. The decorated functions stay plain
+    module-level functions, and ``register(app)`` attaches them to an app
+    built by a factory.
+    """
+
+    def __init__(self):
+        self._callbacks = []
+        self._clientside = []
+
+    def callback(self, *args, **kwargs):
+        def decorator(func):
+            self._callbacks.append((args, kwargs, func))
+            return func
+        return decorator
+
+    def clientside_callback(self, *args, **kwargs):
+        self._clientside.append((args, kwargs))
+
+    def register(self, app):
+        for args, kwargs, func in self._callbacks:
+            app.callback(*args, **kwargs)(func)
+        for args, kwargs in self._clientside:
+            app.clientside_callback(*args, **kwargs)
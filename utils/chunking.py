@@ -0,0 +1,69 @@
+def estimate_tokens(text):
+    """Rough token count for prompt budgeting (~4 characters per token)"""
+    if not text:
+        return 0
+    return max(1, len(text) // 4)
+
+
+def chunk_transcript(transcript, max_tokens=3000):
+    """Split transcript segments into time-aligned chunks of at most max_tokens.
+
+    Segments are never split, so every chunk maps to a contiguous time range
+    of the video.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    for segment in transcript:
+        tokens = estimate_tokens(segment['text']) + 1
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(_make_chunk(len(chunks), current, current_tokens))
+            current = []
+            current_tokens = 0
+        current.append(segment)
+        current_tokens += tokens
+
+    if current:
+        chunks.append(_make_chunk(len(chunks), current, current_tokens))
+    return chunks
+
+
+def allocate_questions(chunks, num_questions):
+    """Spread num_questions over chunks in proportion to their duration.
+
+    Uses largest-remainder rounding so the quotas always add up exactly.
+    When there are more chunks than questions, the questions land on chunks
+    spread evenly across the video.
+    """
+    if not chunks or num_questions <= 0:
+        return [0] * len(chunks)
+
+    spans = [max(chunk['end'] - chunk['start'], 0.001) for chunk in chunks]
+    total = sum(spans)
+    exact = [num_questions * span / total for span in spans]
+    quotas = [int(value) for value in exact]
+
+    remaining = num_questions - sum(quotas)
+    if remaining:
+        if sum(quotas) == 0:
+            # Fewer questions than chunks: pick evenly spaced chunks
+            step = len(chunks) / remaining
+            for i in range(remaining):
+                quotas[int((i + 0.5) * step)] += 1
+        else:
+            by_remainder = sorted(range(len(chunks)), key=lambda i: exact[i] - quotas[i], reverse=True)
+            for i in by_remainder[:remaining]:
+                quotas[i] += 1
+    return quotas
+
+
+def _make_chunk(index, segments, tokens):
+    last = segments[-1]
+    return {
+        'index': index,
+        'start': segments[0]['start'],
+        'end': last['start'] + last.get('duration', 0),
+        'text': " ".join(segment['text'] for segment in segments),
+        'tokens': tokens,
+    }
@@ -1,3 +1,4 @@
+import re
 from datetime import datetime
 
 def format_timestamp(timestamp):
@@ -22,3 +23,13 @@ def validate_youtube_url(url):
     ]
     
     return any(pattern in url for pattern in patterns)
+
+def answers_match(answer, correct_answer):
+    """Compare answers ignoring case, punctuation and extra spaces"""
+    if answer is None:
+        return False
+    
+    def normalize(text):
+        return ' '.join(re.sub(r"[^\w\s']", ' ', str(text).lower()).split())
+    
+    return normalize(answer) == normalize(correct_answer)
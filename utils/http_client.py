@@ -0,0 +1,222 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Methods that are safe to send twice; others (POST) may already have been
+# acted on, e.g. a paid LLM generation, when a read times out
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+
+def _never_sent(error):
+    """Whether a failed request certainly never reached the server"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    # requests wraps urllib3's MaxRetryError, whose reason says what failed
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised when a host's circuit breaker is refusing calls"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for a single host.
+
+    Once ``reset_timeout`` has passed the breaker is half-open, and exactly
+    one trial call goes out. Its outcome closes or reopens the breaker. If it
+    never reports back, another trial is allowed after ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_started_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        """Whether a call may go out; half-open lets a single trial call through"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            if self.trial_started_at is not None and now - self.trial_started_at < self.reset_timeout:
+                return False
+            self.trial_started_at = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_started_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self.trial_started_at is not None:
+                self.opened_at = time.monotonic()
+                self.trial_started_at = None
+
+
+class HttpClient:
+    """Pooled HTTP client shared by the services.
+
+    Every call gets connect/read timeouts, jittered exponential retries on
+    connection errors, 429 and 5xx responses, and a per-host circuit breaker.
+    Non-idempotent requests are only retried when they never reached the
+    server: a failed connect, or a 429 refusal. Latency is recorded per
+    logical endpoint.
+    """
+
+    def __init__(self, connect_timeout=3.05, read_timeout=10, max_retries=2,
+                 backoff_base=0.5, backoff_max=8, pool_size=10,
+                 failure_threshold=5, reset_timeout=30, metrics=None):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._session = None
+        self._pid = None
+        self._breakers = {}
+        self._latency = {}
+        self._lock = threading.Lock()
+        self._duration = None
+        self._errors = None
+        if metrics is not None:
+            self._duration = metrics.histogram(
+                'http_client_request_duration_seconds', 'Outbound HTTP latency per attempt', ('endpoint',))
+            self._errors = metrics.counter(
+                'http_client_request_errors_total', 'Outbound HTTP attempts that failed', ('endpoint',))
+
+    @property
+    def session(self):
+        # Pooled sockets must not be shared with a forked child
+        if self._session is None or self._pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self._session = session
+            self._pid = os.getpid()
+        return self._session
+
+    def get(self, url, endpoint=None, **kwargs):
+        return self.request('GET', url, endpoint=endpoint, **kwargs)
+
+    def post(self, url, endpoint=None, **kwargs):
+        return self.request('POST', url, endpoint=endpoint, **kwargs)
+
+    def request(self, method, url, endpoint=None, retries=None, before_retry=None, **kwargs):
+        """Send a request, retrying transient failures
+
+        ``before_retry`` is called before every attempt after the first; an
+        exception it raises ends the request.
+        """
+        parsed = urlparse(url)
+        endpoint = endpoint or f"{method} {parsed.netloc}{parsed.path}"
+        breaker = self._breaker(parsed.netloc)
+        retries = self.max_retries if retries is None else retries
+        kwargs.setdefault('timeout', (self.connect_timeout, self.read_timeout))
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            if attempt and before_retry is not None:
+                before_retry()
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {parsed.netloc}, not calling {endpoint}")
+
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(endpoint, start, error=True)
+                breaker.record_failure()
+                if attempt >= retries or not (idempotent or _never_sent(e)):
+                    raise
+                self._backoff(attempt)
+                attempt += 1
+                continue
+
+            failed = response.status_code >= 500
+            self._record(endpoint, start, error=failed)
+            if failed:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+            retryable = response.status_code in RETRY_STATUSES if idempotent else response.status_code == 429
+            if retryable and attempt < retries:
+                retry_after = response.headers.get('Retry-After')
+                response.close()
+                self._backoff(attempt, retry_after)
+                attempt += 1
+                continue
+
+            return response
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None and retry_after.isdigit():
+            delay = min(int(retry_after), self.backoff_max)
+        else:
+            # "Full jitter" so workers retrying together don't stampede
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        time.sleep(delay)
+
+    def _breaker(self, host):
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._breakers[host] = breaker
+            return breaker
+
+    def _record(self, endpoint, start, error=False):
+        elapsed = time.perf_counter() - start
+        if self._duration is not None:
+            self._duration.observe(elapsed, endpoint)
+            if error:
+                self._errors.inc(endpoint)
+        with self._lock:
+            stats = self._latency.get(endpoint)
+            if stats is None:
+                stats = {'count': 0, 'errors': 0, 'total_seconds': 0.0, 'max_seconds': 0.0}
+                self._latency[endpoint] = stats
+            stats['count'] += 1
+            stats['total_seconds'] += elapsed
+            stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+            if error:
+                stats['errors'] += 1
+
+    def stats(self):
+        """Return per-endpoint latency and per-host breaker state"""
+        with self._lock:
+            endpoints = {name: dict(values) for name, values in self._latency.items()}
+            breakers = {host: breaker.state for host, breaker in self._breakers.items()}
+        for values in endpoints.values():
+            values['avg_seconds'] = values['total_seconds'] / values['count'] if values['count'] else 0.0
+        return {'endpoints': endpoints, 'breakers': breakers}
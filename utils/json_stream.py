@@ -0,0 +1,55 @@
+import json
+
+
+class JsonArrayItemParser:
+    """Incrementally extracts objects that are elements of a JSON array.
+
+    Feed it text as it streams in (e.g. ``{"questions": [{...}, {...``) and
+    it returns each array element object as soon as its closing brace
+    arrives, without waiting for the rest of the document.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self._capturing = False
+
+    def feed(self, text):
+        """Consume more text and return the objects it completed"""
+        items = []
+        for char in text:
+            if self._capturing:
+                self._buffer.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '[{':
+                if char == '{' and not self._capturing and self._stack and self._stack[-1] == '[':
+                    self._capturing = True
+                    self._buffer = ['{']
+                    self._stack.append('*')
+                else:
+                    self._stack.append(char)
+            elif char in ']}':
+                if not self._stack:
+                    continue
+                opened = self._stack.pop()
+                if opened == '*':
+                    self._capturing = False
+                    try:
+                        items.append(json.loads(''.join(self._buffer)))
+                    except ValueError:
+                        pass
+                    self._buffer = []
+        return items
@@ -1,35 +1,154 @@
+import atexit
+import contextvars
+import functools
+import json
 import logging
-from logging.handlers import RotatingFileHandler
 import os
-from datetime import datetime
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from config import Config
 
+LOGGER_NAME = 'youtube_quiz_app'
+
+# Set per request / per callback and attached to every record logged there
+request_id_var = contextvars.ContextVar('request_id', default=None)
+user_id_var = contextvars.ContextVar('user_id', default=None)
+callback_var = contextvars.ContextVar('callback', default=None)
+
+CONTEXT_VARS = {'request_id': request_id_var, 'user_id': user_id_var, 'callback': callback_var}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including the request context"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in CONTEXT_VARS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    def format(self, record):
+        text = f"{record.levelname}: {record.getMessage()}"
+        if getattr(record, 'request_id', None):
+            text += f" [request {record.request_id}]"
+        if record.exc_info:
+            text += '\n' + self.formatException(record.exc_info)
+        return text
+
+
+class ContextQueueHandler(QueueHandler):
+    """Hands records to a background listener without blocking the caller.
+
+    Context variables are read here, on the calling thread, because the
+    listener thread cannot see them. The queue is bounded: when the writer
+    falls behind, records are dropped and counted rather than making
+    requests wait on the disk.
+    """
+
+    def __init__(self, log_queue, handlers):
+        super().__init__(log_queue)
+        self.handlers = handlers
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+
+    def prepare(self, record):
+        # Merge args now (they may change later) but leave the formatting to the listener
+        record.msg = record.getMessage()
+        record.args = None
+        for field, var in CONTEXT_VARS.items():
+            setattr(record, field, var.get())
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_listener(self):
+        # Neither the listener thread nor the queue's locks survive a fork, so
+        # a new process gets a fresh queue as well as its own listener
+        if self._listener is None or self._pid != os.getpid():
+            if self._pid is not None:
+                self.queue = queue.Queue(self.queue.maxsize)
+            self._listener = QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def close(self):
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+        super().close()
+
+
 def setup_logger():
-    """Configure application logging"""
-    logger = logging.getLogger('youtube_quiz_app')
+    """Configure application logging; safe to call more than once"""
+    logger = logging.getLogger(LOGGER_NAME)
+    if any(isinstance(handler, ContextQueueHandler) for handler in logger.handlers):
+        return logger
+
+    # Records never need the caller's file and line, so skip the frame walk
+    logging._srcfile = None
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
     logger.setLevel(logging.DEBUG if Config.DEBUG else logging.INFO)
-    
+    logger.propagate = False
+
     # Create logs directory if it doesn't exist
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
-    
+    os.makedirs(Config.LOG_DIR, exist_ok=True)
+
     # File handler with rotation
     file_handler = RotatingFileHandler(
-        f"logs/app_{datetime.now().strftime('%Y%m%d')}.log",
+        os.path.join(Config.LOG_DIR, f"app_{datetime.now().strftime('%Y%m%d')}.log"),
         maxBytes=1024 * 1024 * 5,  # 5MB
         backupCount=5
     )
-    file_handler.setFormatter(logging.Formatter(
-        '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-    ))
-    
+    file_handler.setFormatter(JsonFormatter())
+
     # Console handler
     console_handler = logging.StreamHandler()
-    console_handler.setFormatter(logging.Formatter(
-        '%(levelname)s: %(message)s'
-    ))
-    
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
+    console_handler.setFormatter(ConsoleFormatter())
+
+    queue_handler = ContextQueueHandler(queue.Queue(Config.LOG_QUEUE_SIZE), [file_handler, console_handler])
+    logger.addHandler(queue_handler)
+    atexit.register(queue_handler.close)
+
     return logger
+
+
+def bind_callback_names(dash_app):
+    """Make records logged inside each server-side callback carry its name"""
+    for entry in dash_app.callback_map.values():
+        func = entry.get('callback')
+        if func is None or getattr(func, '_logging_bound', False):
+            continue
+        entry['callback'] = _with_callback_name(func, func.__name__)
+
+
+def _with_callback_name(func, name):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = callback_var.set(name)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            callback_var.reset(token)
+
+    wrapper._logging_bound = True
+    return wrapper
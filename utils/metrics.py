@@ -0,0 +1,336 @@
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from dash.exceptions import PreventUpdate
+from pymongo import monitoring
+
+# Latency buckets in seconds, from sub-millisecond Mongo reads to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label set"""
+
+    type = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram per label set"""
+
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                # Per-bucket counts (last one is +Inf), sum, count
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            values = {labels: (list(entry[0]), entry[1], entry[2]) for labels, entry in self._values.items()}
+        for labels, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f'{self.name}_bucket', _format_labels(self.labelnames, labels, le), cumulative
+            yield f'{self.name}_sum', _format_labels(self.labelnames, labels), total
+            yield f'{self.name}_count', _format_labels(self.labelnames, labels), count
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Gauge:
+    """Values read from a callback at scrape time.
+
+    ``fn`` returns a number, or a dict of label-value tuples to numbers.
+    Pass ``type='counter'`` for totals a component already keeps itself, and
+    ``shared=True`` for values every worker reads from the same store.
+    """
+
+    def __init__(self, name, help, fn, labelnames=(), type='gauge', shared=False):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+        self.type = type
+        self.shared = shared
+
+    def samples(self):
+        values = self.fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in sorted(values.items()):
+            if value is None:
+                continue
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class MetricsRegistry:
+    """In-process metrics rendered in the Prometheus text format.
+
+    Recording is a dict update under a lock, a few microseconds at most.
+    Gauges are computed only when ``/metrics`` is scraped.
+
+    Without a ``directory`` the numbers are those of the scraped process
+    only. With several workers, give every worker the same empty directory:
+    each one writes a snapshot there every ``flush_interval`` seconds, and a
+    scrape sums the snapshots of all workers. Totals of workers that have
+    exited are kept, so counters never go backwards; their gauges are
+    dropped. Shared gauges are the same in every worker and are read once.
+    """
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._writer_pid = None
+        self._snapshot_name = None
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, fn, labelnames=(), type='gauge', shared=False):
+        return self._register(Gauge(name, help, fn, labelnames, type, shared))
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format"""
+        collected = self._collect()
+        if self.directory:
+            self._write_snapshot(collected)
+            collected = self._merge_snapshots(collected)
+
+        lines = []
+        for name, help, type, samples in collected:
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {type}')
+            for sample_name, labels, value in samples:
+                lines.append(f'{sample_name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def ensure_writer(self):
+        """Start this process's snapshot writer if a directory is set; cheap to call often"""
+        if not self.directory or self._writer_pid == os.getpid():
+            return
+        with self._lock:
+            # A thread started before a fork does not run in the child
+            if self._writer_pid == os.getpid():
+                return
+            self._writer_pid = os.getpid()
+        os.makedirs(self.directory, exist_ok=True)
+        threading.Thread(target=self._write_loop, name='metrics-writer', daemon=True).start()
+
+    def _collect(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        collected = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                # A broken gauge must not take the whole endpoint down
+                continue
+            collected.append((metric.name, metric.help, metric.type, samples))
+        return collected
+
+    def _write_loop(self):
+        pid = os.getpid()
+        while self._writer_pid == pid:
+            try:
+                self._write_snapshot(self._collect())
+            except OSError:
+                pass
+            time.sleep(self.flush_interval)
+
+    def _snapshot_path(self):
+        # pids get reused, so a new process must not overwrite an old one's totals
+        pid = os.getpid()
+        with self._lock:
+            if self._snapshot_name is None or self._snapshot_name[0] != pid:
+                self._snapshot_name = (pid, f'metrics_{pid}_{uuid.uuid4().hex[:12]}.json')
+            return os.path.join(self.directory, self._snapshot_name[1])
+
+    def _write_snapshot(self, collected):
+        # Shared gauges are read from the store at scrape time instead
+        metrics = [[name, help, type, samples] for name, help, type, samples in collected
+                   if not getattr(self._metrics.get(name), 'shared', False)]
+        path = self._snapshot_path()
+        # The writer thread and a scrape may both be writing
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(metrics, f)
+        os.replace(tmp_path, path)
+
+    def _merge_snapshots(self, collected):
+        merged = {}
+        for name, help, type, samples in collected:
+            if getattr(self._metrics.get(name), 'shared', False):
+                merged[name] = (help, type, {(sample, labels): value for sample, labels, value in samples})
+            else:
+                merged[name] = (help, type, {})
+
+        for filename in sorted(os.listdir(self.directory)):
+            # metrics_<pid>_<token>.json, or metrics_<pid>.json from older versions
+            pid = filename[len('metrics_'):-len('.json')].split('_')[0]
+            if not (filename.startswith('metrics_') and filename.endswith('.json') and pid.isdigit()):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    metrics = json.load(f)
+            except (OSError, ValueError):
+                continue
+            alive = _process_alive(int(pid))
+            for name, help, type, samples in metrics:
+                if type == 'gauge' and not alive:
+                    continue
+                if name not in merged:
+                    merged[name] = (help, type, {})
+                values = merged[name][2]
+                for sample, labels, value in samples:
+                    values[(sample, labels)] = values.get((sample, labels), 0) + value
+
+        return [(name, help, type, [(sample, labels, value) for (sample, labels), value in values.items()])
+                for name, (help, type, values) in merged.items()]
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times every MongoDB command using the driver's own measurements"""
+
+    def __init__(self, registry):
+        self.duration = registry.histogram(
+            'mongodb_command_duration_seconds', 'MongoDB command latency', ('command',))
+        self.errors = registry.counter(
+            'mongodb_command_errors_total', 'MongoDB commands that failed', ('command',))
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.duration.observe(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        self.duration.observe(event.duration_micros / 1e6, event.command_name)
+        self.errors.inc(event.command_name)
+
+
+def instrument_callbacks(dash_app, registry):
+    """Time every server-side callback registered on dash_app so far"""
+    duration = registry.histogram(
+        'dash_callback_duration_seconds', 'Server-side Dash callback latency', ('callback',))
+    errors = registry.counter(
+        'dash_callback_errors_total', 'Dash callbacks that raised', ('callback',))
+
+    for entry in dash_app.callback_map.values():
+        func = entry.get('callback')
+        if func is None or getattr(func, '_instrumented', False):
+            continue
+        entry['callback'] = _timed_callback(func, func.__name__, duration, errors)
+
+
+def _timed_callback(func, name, duration, errors):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except PreventUpdate:
+            raise
+        except Exception:
+            errors.inc(name)
+            raise
+        finally:
+            duration.observe(time.perf_counter() - start, name)
+
+    wrapper._instrumented = True
+    return wrapper
@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import deque
+from utils.sqlite import SQLiteConnections
+
+
+class SlidingWindowLimiter:
+    """Allows at most ``max_events`` per key within a sliding ``window`` of seconds
+
+    The events are kept in memory, so every process has its own limit. Use
+    SQLiteSlidingWindowLimiter where several workers must share one.
+    """
+
+    def __init__(self, max_events, window=60, max_keys=100000):
+        self.max_events = max_events
+        self.window = window
+        self.max_keys = max_keys
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key):
+        """Record an event for key; returns False if the key is over its limit"""
+        return self._record(key) == 0
+
+    def wait(self, key=None):
+        """Block until key is under its limit, then record an event for it"""
+        while True:
+            delay = self._record(key)
+            if not delay:
+                return
+            time.sleep(delay)
+
+    def _record(self, key):
+        # Returns 0 if the event was recorded, else the seconds until a slot frees up
+        now = time.monotonic()
+        cutoff = now - self.window
+        with self._lock:
+            events = self._events.get(key)
+            if events is None:
+                if len(self._events) >= self.max_keys:
+                    self._prune(cutoff)
+                events = deque()
+                self._events[key] = events
+            while events and events[0] <= cutoff:
+                events.popleft()
+            if len(events) >= self.max_events:
+                return events[0] - cutoff
+            events.append(now)
+            return 0
+
+    def _prune(self, cutoff):
+        for key in [key for key, events in self._events.items() if not events or events[-1] <= cutoff]:
+            del self._events[key]
+
+
+class SQLiteSlidingWindowLimiter(SlidingWindowLimiter):
+    """SlidingWindowLimiter whose events are shared by all processes using one SQLite file.
+
+    ``name`` keeps limiters that share the file apart. Each check is a single
+    short write transaction, as for the YouTube quota.
+    """
+
+    def __init__(self, path, max_events, window=60, name='default'):
+        self.path = path
+        self.max_events = max_events
+        self.window = window
+        self.name = name
+        self._connections = SQLiteConnections(path)
+
+        conn = self._connections.get()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS rate_limit_events ('
+            ' name TEXT NOT NULL,'
+            ' key TEXT NOT NULL,'
+            ' at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS rate_limit_events_key ON rate_limit_events (name, key, at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS rate_limit_events_at ON rate_limit_events (name, at)')
+        conn.commit()
+
+    def _record(self, key):
+        # Wall-clock time, since monotonic clocks are not comparable across processes
+        now = time.time()
+        cutoff = now - self.window
+        key = '' if key is None else str(key)
+
+        conn = self._connections.get()
+        # IMMEDIATE takes the write lock up front so two workers can't both take the last slot
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM rate_limit_events WHERE name = ? AND at <= ?', (self.name, cutoff))
+            count, oldest = conn.execute(
+                'SELECT COUNT(*), MIN(at) FROM rate_limit_events WHERE name = ? AND key = ?',
+                (self.name, key)
+            ).fetchone()
+            if count >= self.max_events:
+                delay = oldest - cutoff
+            else:
+                delay = 0
+                conn.execute('INSERT INTO rate_limit_events (name, key, at) VALUES (?, ?, ?)',
+                             (self.name, key, now))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return delay
@@ -0,0 +1,32 @@
+import os
+import sqlite3
+import threading
+
+
+class SQLiteConnections:
+    """Hands each thread of each process its own connection to one SQLite file.
+
+    sqlite3 connections can't be shared across threads, and one inherited
+    through a fork must not be used, so a connection is opened on first use
+    in every thread and again after a fork. The database runs in WAL mode so
+    that several workers can read while one of them writes.
+    """
+
+    def __init__(self, path, timeout=5):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
@@ -0,0 +1,45 @@
+import importlib
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupReport:
+    """Times the steps of a worker's boot, for the startup log line.
+
+    An import is timed when the module is first loaded. Later imports of
+    the same module are free, so each entry only counts what that import
+    added. For a per-module breakdown run ``python -X importtime wsgi.py``.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps = []
+
+    def import_module(self, name):
+        loaded = len(sys.modules)
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        self.steps.append((f'import {name}', time.perf_counter() - start, len(sys.modules) - loaded))
+        return module
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - start, None))
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def log(self, logger):
+        parts = []
+        for name, seconds, modules in self.steps:
+            part = f'{name} {seconds * 1000:.0f} ms'
+            if modules:
+                part += f' ({modules} modules)'
+            parts.append(part)
+        logger.info("Startup took %.0f ms: %s", self.total * 1000, ', '.join(parts))
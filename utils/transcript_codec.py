@@ -0,0 +1,57 @@
+import struct
+import zlib
+from bson.binary import Binary
+
+CODEC_VERSION = 1
+
+
+# Standard sizes and little-endian order, so every platform reads the same bytes:
+# 'd' is an 8-byte float64 and 'I' a 4-byte unsigned int
+def _pack(typecode, values):
+    return Binary(struct.pack(f'<{len(values)}{typecode}', *values))
+
+
+def _unpack(typecode, data):
+    data = bytes(data)
+    count = len(data) // struct.calcsize(f'<{typecode}')
+    return struct.unpack(f'<{count}{typecode}', data)
+
+
+def encode_transcript(transcript):
+    """Pack a list of {'text', 'start', 'duration'} dicts into a compact document.
+
+    start/duration become little-endian float64 arrays and all texts one
+    zlib-compressed UTF-8 blob, with per-segment uint32 byte lengths so texts
+    may contain any character. Float64 keeps the values bit-exact.
+    """
+    encoded_texts = [segment['text'].encode('utf-8') for segment in transcript]
+    return {
+        'v': CODEC_VERSION,
+        'n': len(transcript),
+        'start': _pack('d', [segment['start'] for segment in transcript]),
+        'duration': _pack('d', [segment['duration'] for segment in transcript]),
+        'lengths': _pack('I', [len(text) for text in encoded_texts]),
+        'text': Binary(zlib.compress(b''.join(encoded_texts), 6)),
+    }
+
+
+def decode_transcript(doc):
+    """Inverse of encode_transcript; plain lists are passed through unchanged"""
+    if isinstance(doc, list):
+        return doc
+
+    starts = _unpack('d', doc['start'])
+    durations = _unpack('d', doc['duration'])
+    lengths = _unpack('I', doc['lengths'])
+    blob = zlib.decompress(bytes(doc['text']))
+
+    transcript = []
+    offset = 0
+    for start, duration, length in zip(starts, durations, lengths):
+        transcript.append({
+            'text': blob[offset:offset + length].decode('utf-8'),
+            'start': start,
+            'duration': duration,
+        })
+        offset += length
+    return transcript
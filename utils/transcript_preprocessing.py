@@ -0,0 +1,127 @@
+import html
+import re
+from collections import Counter
+from utils.chunking import estimate_tokens
+
+# Auto-caption annotations such as [Music], (applause) or ♪. Only known tags
+# are removed, so brackets that are part of the content (x[i]) are kept.
+NOISE_PATTERN = re.compile(
+    r'[\[(]\s*(?:music|applause|laughter|laughs|inaudible|silence|cheering)\s*[\])]|[♪♫]+',
+    re.IGNORECASE
+)
+# Hesitations that never carry meaning
+FILLER_PATTERN = re.compile(r'\b(?:u+m+|u+h+|erm+)\b(?!-)[,.]?\s*', re.IGNORECASE)
+# Phrases that are only filler when set off by commas: "it's, you know, fast"
+# but not "do you know what a qubit is" or "300 mm wide"
+HEDGE_PATTERN = re.compile(
+    r'(?:^|,)\s*(?:you know|i mean|hmm+|mm+|uh-huh)\s*(?:,\s*|(?=[.?!]|$))',
+    re.IGNORECASE
+)
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"\'])')
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Auto-captions often have no punctuation; fall back to windows of this many words
+FALLBACK_SENTENCE_WORDS = 25
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further get
+got had has have having he her here hers herself him himself his how i if in into is it its itself
+just let me more most my myself no nor not now of off on once only or other our ours ourselves out
+over own really right same she should so some such than that the their theirs them themselves then
+there these they this those through to too under until up very was we well were what when where
+which while who whom why will with would yeah you your yours yourself yourselves okay gonna going
+""".split())
+
+
+def normalize_text(text):
+    """Unescape entities and strip caption noise, filler words and extra spaces"""
+    text = html.unescape(text).replace('\n', ' ')
+    text = NOISE_PATTERN.sub(' ', text)
+    text = HEDGE_PATTERN.sub(lambda match: ' ' if match.group().rstrip().endswith(',') else '', text)
+    text = FILLER_PATTERN.sub('', text)
+    return ' '.join(text.split())
+
+
+def clean_segments(transcript):
+    """Normalize segments and drop text repeated by rolling captions.
+
+    Rolling auto-captions repeat the tail of the previous line at the start
+    of the next one; only the new words are kept. Timings are untouched, so
+    the result stays time-aligned with the video.
+    """
+    cleaned = []
+    previous_words = []
+
+    for segment in transcript:
+        words = normalize_text(segment['text']).split()
+        overlap = _overlap(previous_words, words)
+        new_words = words[overlap:]
+        if words:
+            previous_words = words
+        if not new_words:
+            continue
+        cleaned.append({
+            'text': ' '.join(new_words),
+            'start': segment['start'],
+            'duration': segment.get('duration', 0),
+        })
+    return cleaned
+
+
+def split_sentences(text):
+    """Split text into sentences, or into word windows if it has no punctuation"""
+    sentences = [sentence.strip() for sentence in SENTENCE_PATTERN.split(text) if sentence.strip()]
+    result = []
+    for sentence in sentences:
+        words = sentence.split()
+        if len(words) <= FALLBACK_SENTENCE_WORDS * 2:
+            result.append(sentence)
+            continue
+        for i in range(0, len(words), FALLBACK_SENTENCE_WORDS):
+            result.append(' '.join(words[i:i + FALLBACK_SENTENCE_WORDS]))
+    return result
+
+
+def select_key_sentences(text, token_budget):
+    """Keep the most informative sentences that fit token_budget, in original order.
+
+    Sentences are scored by how often their content words occur across the
+    whole text, a cheap extractive summary that favours the main topics.
+    """
+    if estimate_tokens(text) <= token_budget:
+        return text
+
+    sentences = split_sentences(text)
+    tokenized = [[word for word in WORD_PATTERN.findall(sentence.lower()) if word not in STOPWORDS]
+                 for sentence in sentences]
+    frequencies = Counter(word for words in tokenized for word in words)
+
+    scored = []
+    for index, words in enumerate(tokenized):
+        if words:
+            score = sum(frequencies[word] for word in words) / (len(words) ** 0.5)
+            scored.append((score, index))
+    scored.sort(reverse=True)
+
+    chosen = set()
+    used = 0
+    for score, index in scored:
+        tokens = estimate_tokens(sentences[index]) + 1
+        if used + tokens > token_budget:
+            continue
+        chosen.add(index)
+        used += tokens
+    return ' '.join(sentences[index] for index in sorted(chosen))
+
+
+def _overlap(previous, current):
+    """Length of the longest suffix of previous that is a prefix of current.
+
+    Only runs of two or more words count, so "... of the" followed by
+    "the ..." is left alone.
+    """
+    for size in range(min(len(previous), len(current)), 1, -1):
+        if previous[-size:] == current[:size]:
+            return size
+    return 0
@@ -0,0 +1,16 @@
+"""WSGI entry point, e.g. ``WEB_CONCURRENCY=4 gunicorn --preload wsgi:server``
+
+See ServiceContainer for why the app can be built before gunicorn forks.
+"""
+from utils.startup import StartupReport
+
+startup = StartupReport()
+for module in ('flask', 'dash', 'dash_bootstrap_components', 'flask_login', 'pymongo'):
+    startup.import_module(module)
+app_module = startup.import_module('app')
+
+with startup.step('create_app'):
+    app = app_module.create_app()
+server = app.server
+
+startup.log(app_module.logger)